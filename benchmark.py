@@ -0,0 +1,193 @@
+#!/bin/python3
+
+import argparse
+import json
+import os
+import sys
+import glob
+import time
+import platform
+import tempfile
+import contextlib
+import subprocess
+import factorioRecipeDependency as frd
+
+
+def timeIt(function, repeat: int, setup=None) -> dict:
+    # Run function repeat times and keep min/mean/max duration in seconds, setup is run before each call and not timed
+    durations = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {"repeat": repeat, "min": min(durations), "mean": sum(durations) / len(durations), "max": max(durations)}
+
+
+def scaleRecipes(recipesByName: frd.RecipesByName, consumptionData: tuple[dict, tuple[dict, list[str]], dict[str, str]], scale: int) -> tuple[frd.RecipesByName, tuple[dict, tuple[dict, list[str]], dict[str, str]]]:
+    # Duplicate recipes and consumption data scale times, items without recipe are shared between copies
+    requestedRates, recipesPreferences, factoriesPreferences = consumptionData
+    producedItems = {resultName for recipe in recipesByName.values() for resultName in recipe.results.keys()}
+    def copyName(name: str, copyIndex: int) -> str:
+        return "{}#{}".format(name, copyIndex) if name in producedItems or name in recipesByName else name
+    # Recipe used to add a cycle in each copy: its first ingredient is produced back from its result
+    cycleRecipe = next(recipe for recipe in recipesByName.values()
+                       if len(recipe.results) == 1 and len(recipe.ingredients) > 0 and list(recipe.ingredients.keys())[0] in producedItems
+                       and list(recipe.ingredients.keys())[0] not in recipesPreferences[0])
+    cycleResultName = list(cycleRecipe.results.keys())[0]
+    cycleIngredientName = list(cycleRecipe.ingredients.keys())[0]
+    cycleIngredientRecipes = [recipe for recipe in recipesByName.values() if cycleIngredientName in recipe.results]
+    scaledRecipes = frd.RecipesByName()
+    scaledRequestedRates = {}
+    scaledRecipesPreferences = {}
+    scaledOverproductionEndOrder = []
+    for copyIndex in range(scale):
+        for recipe in recipesByName.values():
+            scaledRecipes[copyName(recipe.name, copyIndex)] = frd.Recipe(copyName(recipe.name, copyIndex),
+                                                                         {copyName(itemName, copyIndex): count for itemName, count in recipe.ingredients.items()},
+                                                                         recipe.time,
+                                                                         {copyName(itemName, copyIndex): count for itemName, count in recipe.results.items()},
+                                                                         recipe.category)
+        recyclingName = "{}-recycling#{}".format(cycleResultName, copyIndex)
+        scaledRecipes[recyclingName] = frd.Recipe(recyclingName, {copyName(cycleResultName, copyIndex): 1}, 1.0,
+                                                  {copyName(cycleIngredientName, copyIndex): 1}, cycleRecipe.category)
+        scaledRecipesPreferences[copyName(cycleIngredientName, copyIndex)] = [{copyName(recipe.name, copyIndex): 0.9 / len(cycleIngredientRecipes)} for recipe in cycleIngredientRecipes] + [{recyclingName: 0.1}]
+        for itemName, rate in requestedRates.items():
+            scaledRequestedRates[copyName(itemName, copyIndex)] = rate
+        scaledRequestedRates[copyName(cycleIngredientName, copyIndex)] = scaledRequestedRates.get(copyName(cycleIngredientName, copyIndex), 0.0) + 1.0
+        for resultName, recipesNamesRatiosList in recipesPreferences[0].items():
+            scaledRecipesPreferences[copyName(resultName, copyIndex)] = [{copyName(recipeName, copyIndex): ratio for recipeName, ratio in recipeNameRatio.items()}
+                                                                         for recipeNameRatio in recipesNamesRatiosList]
+        scaledOverproductionEndOrder.extend(copyName(itemName, copyIndex) for itemName in recipesPreferences[1])
+    return scaledRecipes, (scaledRequestedRates, (scaledRecipesPreferences, scaledOverproductionEndOrder), factoriesPreferences)
+
+
+def benchmarkConsumption(results: dict, name: str, recipesByName: frd.RecipesByName, craftingFactoriesByName: frd.CraftingFactoriesByName, factorioEquipment: frd.FactorioEquipment,
+                         consumptionData: tuple[dict, tuple[dict, list[str]], dict[str, str]], consumptionSolversName: list[str], repeat: int):
+    requestedRates, recipesPreferences, factoriesPreferences = consumptionData
+    recipesByName, factoriesPreferences = frd.applyFactoriesModules(recipesByName, craftingFactoriesByName, factoriesPreferences, factorioEquipment)
+    results["recipesByName2recipesByResult[{}]".format(name)] = timeIt(lambda: frd.recipesByName2recipesByResult(recipesByName, recipesPreferences[0]), repeat)
+    for consumptionSolverName in consumptionSolversName:
+        consumptionSolver = frd.consumptionSolvers[consumptionSolverName]
+        if consumptionSolverName in frd.consumptionSolversWithAlternatives:
+            recipesByResult = frd.recipesByName2recipesByResult(recipesByName, recipesPreferences[0], True)
+        else:
+            recipesByResult = frd.recipesByName2recipesByResult(recipesByName, recipesPreferences[0])
+        # Overproduction end order is consumed by the solver
+        solve = lambda: consumptionSolver(recipesByResult, requestedRates, craftingFactoriesByName, factoriesPreferences, list(recipesPreferences[1]))
+        # Each run starts with an empty unit consumption cache, then runs reuse the cache filled by the previous ones
+        results["{}[{}]".format(consumptionSolver.__name__, name)] = timeIt(solve, repeat, frd.unitConsumptionCache.clear)
+        if consumptionSolverName == "iterative":
+            results["{}[{}]".format(consumptionSolver.__name__, name)].update({key: frd.consumptionSolverStats[key] for key in ["iterations", "visits", "revisits"]})
+            solve()
+            results["{}[{}][warm-cache]".format(consumptionSolver.__name__, name)] = timeIt(solve, repeat)
+            frd.unitConsumptionCache.clear()
+
+
+def runBenchmarks(fixtureFactorioPath: str, factorioDataFilePath: str, consumptionDataFilesPaths: list[str], groupsDataFilePath: str,
+                  scales: list[int], consumptionSolversName: list[str], repeat: int) -> dict:
+    results = {}
+    craftingFactoriesByName, recipesToAdd, recipesToRemove, _ = frd.loadFactorioData(factorioDataFilePath)
+    factorioEquipment = frd.loadFactorioEquipment(factorioDataFilePath)
+    # Loaders
+    results["getRecipes"] = timeIt(lambda: frd.getRecipes(fixtureFactorioPath, recipesToRemove), repeat)
+    recipesByName = frd.getRecipes(fixtureFactorioPath, recipesToRemove)
+    recipesByName.update(recipesToAdd)
+    with tempfile.TemporaryDirectory() as tmpDirPath:
+        recipesJsonFilePath = os.path.join(tmpDirPath, "recipesAll.json")
+        results["writeRecipesJsonFile"] = timeIt(lambda: frd.writeRecipesJsonFile(recipesByName, recipesJsonFilePath), repeat)
+        results["loadRecipes"] = timeIt(lambda: frd.loadRecipes(recipesJsonFilePath), repeat)
+        recipesPackedFilePath = os.path.join(tmpDirPath, "recipesAll.recipes")
+        results["writeRecipesPackedFile"] = timeIt(lambda: frd.writeRecipesPackedFile(recipesByName, recipesPackedFilePath), repeat)
+        results["loadRecipes[packed]"] = timeIt(lambda: dict(frd.loadRecipes(recipesPackedFilePath)), repeat)
+        # Solver on each consumption data file
+        consumptionDataByName = {}
+        for consumptionDataFilePath in consumptionDataFilesPaths:
+            name = os.path.splitext(os.path.basename(consumptionDataFilePath))[0]
+            consumptionDataByName[name] = frd.loadConsumptionData(consumptionDataFilePath)
+            benchmarkConsumption(results, name, recipesByName, craftingFactoriesByName, factorioEquipment, consumptionDataByName[name], consumptionSolversName, repeat)
+        # Writers
+        results["RecipeGraph"] = timeIt(lambda: frd.RecipeGraph(recipesByName), repeat)
+        recipeGraph = frd.RecipeGraph(recipesByName)
+        results["generateDot"] = timeIt(lambda: frd.generateDot(recipeGraph, os.path.join(tmpDirPath, "recipesAll.dot"), "img"), repeat)
+        results["ingredientsByUsage2Html"] = timeIt(lambda: frd.ingredientsByUsage2Html(frd.ingredientsByUsage(recipeGraph), os.path.join(tmpDirPath, "recipesAllUsage.html"), "img"), repeat)
+        for name, (requestedRates, recipesPreferences, factoriesPreferences) in consumptionDataByName.items():
+            modulesRecipesByName, factoriesPreferences = frd.applyFactoriesModules(recipesByName, craftingFactoriesByName, factoriesPreferences, factorioEquipment)
+            recipesByResult = frd.recipesByName2recipesByResult(modulesRecipesByName, recipesPreferences[0])
+            consumption = frd.computeConsumptionRates(recipesByResult, requestedRates, craftingFactoriesByName, factoriesPreferences, list(recipesPreferences[1]))
+            htmlFilePath = os.path.join(tmpDirPath, name + ".html")
+            with open(os.devnull, "w") as devNull, contextlib.redirect_stdout(devNull):
+                results["consumption2Html[{}]".format(name)] = timeIt(lambda: frd.consumption2Html(requestedRates, *consumption, htmlFilePath, "img", factorioEquipment=factorioEquipment), repeat)
+        if groupsDataFilePath:
+            requestedAndProvidedListByGroup = {}
+            for groupName, recipesNames in frd.loadGroups(groupsDataFilePath).items():
+                # Groups data is written for the full game, keep only recipes of the fixture
+                recipesGroup = {recipeName: recipesByName[recipeName] for recipeName in recipesNames if recipeName in recipesByName}
+                if groupName not in {"noNeed", "onlyOnce"} and len(recipesGroup) > 0:
+                    requestedAndProvidedListByGroup[groupName] = frd.getRequestedAndProvidedList(frd.RecipeGraph(recipesGroup))
+            results["analyzeGroups"] = timeIt(lambda: frd.analyzeGroups(requestedAndProvidedListByGroup), repeat)
+            groupsAnalysis = frd.analyzeGroups(requestedAndProvidedListByGroup)
+            results["groupsDependenciesToDot"] = timeIt(lambda: frd.groupsDependenciesToDot(groupsAnalysis.groupsDependencies, os.path.join(tmpDirPath, "groups.dot"), "img"), repeat)
+            results["groupsDependenciesToHtml"] = timeIt(lambda: frd.groupsDependenciesToHtml(groupsAnalysis, os.path.join(tmpDirPath, "groups.html"), "img"), repeat)
+        # Synthetic scaled up recipes with cycles, based on the biggest consumption data
+        if len(consumptionDataByName) > 0:
+            name, consumptionData = max(consumptionDataByName.items(), key=lambda item: len(item[1][0]))
+            for scale in scales:
+                scaledRecipesByName, scaledConsumptionData = scaleRecipes(recipesByName, consumptionData, scale)
+                benchmarkConsumption(results, "{}x{}".format(name, scale), scaledRecipesByName, craftingFactoriesByName, factorioEquipment, scaledConsumptionData, consumptionSolversName, repeat)
+                scaledRecipeGraph = frd.RecipeGraph(scaledRecipesByName)
+                results["generateDot[x{}]".format(scale)] = timeIt(lambda: frd.generateDot(scaledRecipeGraph, os.path.join(tmpDirPath, "scaled.dot"), "img"), repeat)
+    return results
+
+
+def compareResults(previousResults: dict, results: dict, threshold: float) -> list[str]:
+    # Print each benchmark ratio to the previous run and return the regressed ones
+    regressions = []
+    for name, result in results.items():
+        if name not in previousResults:
+            print("{:60} {:10.6f}s (new)".format(name, result["min"]))
+            continue
+        ratio = result["min"] / previousResults[name]["min"] if previousResults[name]["min"] > 0.0 else 1.0
+        isRegression = ratio > threshold
+        print("{:60} {:10.6f}s x{:.2f}{}".format(name, result["min"], ratio, " REGRESSION" if isRegression else ""))
+        if isRegression:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    scriptDirPath = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Time loaders, consumption solvers and writers of factorioRecipeDependency.py")
+    parser.add_argument('--fixture-factorio-path', type=str, default=os.path.join(scriptDirPath, "data", "benchmark"), help="Factorio path with the recipe.lua used to time getRecipes")
+    parser.add_argument('--input-factorio-data', type=str, default=os.path.join(scriptDirPath, "data", "factorio-1.1.76.json"), help="Recipes and factories data")
+    parser.add_argument('--input-consumption-data', type=str, nargs='+', default=sorted(glob.glob(os.path.join(scriptDirPath, "data", "consumption*.json"))), help="Consumption data files to solve")
+    parser.add_argument('--input-groups-data', type=str, default=os.path.join(scriptDirPath, "data", "recipesGroups.json"), help="Groups used to time groups writers")
+    parser.add_argument('--scales', type=int, nargs='*', default=[10, 100], help="Synthetic recipes sizes as multiple of the fixture recipes")
+    parser.add_argument('--consumption-solvers', choices=list(frd.consumptionSolvers.keys()), nargs='+', default=["iterative"], help="Consumption solvers to time")
+    parser.add_argument('--repeat', type=int, default=5, help="Run count of each benchmark, the minimum duration is compared")
+    parser.add_argument('--output', type=str, help="Write results in the given json file")
+    parser.add_argument('--compare', type=str, help="Json file of a previous run to compare with")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Ratio to the previous run from which a benchmark is a regression")
+    args = parser.parse_args()
+
+    # Writers read data/script.js relatively to the current folder
+    os.chdir(scriptDirPath)
+    results = runBenchmarks(args.fixture_factorio_path, args.input_factorio_data, args.input_consumption_data, args.input_groups_data,
+                            args.scales, args.consumption_solvers, args.repeat)
+    commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    benchmarkJson = {"commit": commit, "python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.output:
+        with open(args.output, 'w') as jsonFile:
+            json.dump(benchmarkJson, jsonFile, indent=3)
+        print("Benchmark json file \"{}\" writen".format(args.output))
+    if args.compare:
+        with open(args.compare, 'r') as jsonFile:
+            previousResults = json.load(jsonFile)["results"]
+        regressions = compareResults(previousResults, results, args.threshold)
+        if len(regressions) > 0:
+            print("{} regressions compared to {}".format(len(regressions), args.compare))
+            sys.exit(1)
+    else:
+        for name, result in results.items():
+            print("{:60} {:10.6f}s".format(name, result["min"]))
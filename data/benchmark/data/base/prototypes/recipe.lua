@@ -0,0 +1,752 @@
+data:extend(
+{
+  {
+    type = "recipe",
+    name = "iron-plate",
+    category = "smelting",
+    energy_required = 3.2,
+    ingredients = {{ "iron-ore", 1}},
+    result = "iron-plate"
+  },
+  {
+    type = "recipe",
+    name = "copper-plate",
+    category = "smelting",
+    energy_required = 3.2,
+    ingredients = {{ "copper-ore", 1}},
+    result = "copper-plate"
+  },
+  {
+    type = "recipe",
+    name = "steel-plate",
+    category = "smelting",
+    normal =
+    {
+      enabled = false,
+      energy_required = 16,
+      ingredients = {{"iron-plate", 5}},
+      result = "steel-plate"
+    },
+    expensive =
+    {
+      enabled = false,
+      energy_required = 32,
+      ingredients = {{"iron-plate", 10}},
+      result = "steel-plate"
+    }
+  },
+  {
+    type = "recipe",
+    name = "stone-brick",
+    category = "smelting",
+    energy_required = 3.2,
+    enabled = true,
+    ingredients = {{"stone", 2}},
+    result = "stone-brick"
+  },
+  {
+    type = "recipe",
+    name = "iron-gear-wheel",
+    normal =
+    {
+      ingredients = {{"iron-plate", 2}},
+      result = "iron-gear-wheel"
+    },
+    expensive =
+    {
+      ingredients = {{"iron-plate", 4}},
+      result = "iron-gear-wheel"
+    }
+  },
+  {
+    type = "recipe",
+    name = "iron-stick",
+    ingredients = {{"iron-plate", 1}},
+    result = "iron-stick",
+    result_count = 2
+  },
+  {
+    type = "recipe",
+    name = "copper-cable",
+    ingredients = {{"copper-plate", 1}},
+    result = "copper-cable",
+    result_count = 2
+  },
+  {
+    type = "recipe",
+    name = "pipe",
+    normal =
+    {
+      ingredients = {{"iron-plate", 1}},
+      result = "pipe"
+    },
+    expensive =
+    {
+      ingredients = {{"iron-plate", 2}},
+      result = "pipe"
+    }
+  },
+  {
+    type = "recipe",
+    name = "electronic-circuit",
+    normal =
+    {
+      ingredients =
+      {
+        {"iron-plate", 1},
+        {"copper-cable", 3}
+      },
+      result = "electronic-circuit"
+    },
+    expensive =
+    {
+      ingredients =
+      {
+        {"iron-plate", 2},
+        {"copper-cable", 8}
+      },
+      result = "electronic-circuit"
+    }
+  },
+  {
+    type = "recipe",
+    name = "advanced-circuit",
+    normal =
+    {
+      enabled = false,
+      energy_required = 6,
+      ingredients =
+      {
+        {"electronic-circuit", 2},
+        {"plastic-bar", 2},
+        {"copper-cable", 4}
+      },
+      result = "advanced-circuit"
+    },
+    expensive =
+    {
+      enabled = false,
+      energy_required = 6,
+      ingredients =
+      {
+        {"electronic-circuit", 2},
+        {"plastic-bar", 4},
+        {"copper-cable", 8}
+      },
+      result = "advanced-circuit"
+    }
+  },
+  {
+    type = "recipe",
+    name = "processing-unit",
+    category = "crafting-with-fluid",
+    normal =
+    {
+      enabled = false,
+      energy_required = 10,
+      ingredients =
+      {
+        {"electronic-circuit", 20},
+        {"advanced-circuit", 2},
+        {type = "fluid", name = "sulfuric-acid", amount = 5}
+      },
+      result = "processing-unit"
+    }
+  },
+  {
+    type = "recipe",
+    name = "engine-unit",
+    category = "advanced-crafting",
+    energy_required = 10,
+    ingredients =
+    {
+      {"steel-plate", 1},
+      {"iron-gear-wheel", 1},
+      {"pipe", 2}
+    },
+    result = "engine-unit",
+    enabled = false
+  },
+  {
+    type = "recipe",
+    name = "electric-engine-unit",
+    category = "crafting-with-fluid",
+    energy_required = 10,
+    ingredients =
+    {
+      {"engine-unit", 1},
+      {type = "fluid", name = "lubricant", amount = 15},
+      {"electronic-circuit", 2}
+    },
+    result = "electric-engine-unit",
+    enabled = false
+  },
+  {
+    type = "recipe",
+    name = "battery",
+    category = "chemistry",
+    energy_required = 4,
+    enabled = false,
+    ingredients =
+    {
+      {type = "fluid", name = "sulfuric-acid", amount = 20},
+      {"iron-plate", 1},
+      {"copper-plate", 1}
+    },
+    result = "battery",
+    crafting_machine_tint = { primary = {r = 0.965, g = 0.482, b = 0.338, a = 1.000} }
+  },
+  {
+    type = "recipe",
+    name = "flying-robot-frame",
+    energy_required = 20,
+    enabled = false,
+    ingredients =
+    {
+      {"electric-engine-unit", 1},
+      {"battery", 2},
+      {"steel-plate", 1},
+      {"electronic-circuit", 3}
+    },
+    result = "flying-robot-frame"
+  },
+  {
+    type = "recipe",
+    name = "advanced-oil-processing",
+    category = "oil-processing",
+    enabled = false,
+    energy_required = 5,
+    ingredients =
+    {
+      {type = "fluid", name = "water", amount = 50},
+      {type = "fluid", name = "crude-oil", amount = 100}
+    },
+    results =
+    {
+      {type = "fluid", name = "heavy-oil", amount = 25},
+      {type = "fluid", name = "light-oil", amount = 45},
+      {type = "fluid", name = "petroleum-gas", amount = 55}
+    },
+    icon = "__base__/graphics/icons/fluid/advanced-oil-processing.png",
+    icon_size = 64, icon_mipmaps = 4,
+    subgroup = "fluid-recipes",
+    order = "a[oil-processing]-b[advanced-oil-processing]"
+  },
+  {
+    type = "recipe",
+    name = "basic-oil-processing",
+    category = "oil-processing",
+    enabled = false,
+    energy_required = 5,
+    ingredients =
+    {
+      {type = "fluid", name = "crude-oil", amount = 100}
+    },
+    results =
+    {
+      {type = "fluid", name = "petroleum-gas", amount = 45}
+    }
+  },
+  {
+    type = "recipe",
+    name = "heavy-oil-cracking",
+    category = "chemistry",
+    enabled = false,
+    energy_required = 2,
+    ingredients =
+    {
+      {type = "fluid", name = "water", amount = 30},
+      {type = "fluid", name = "heavy-oil", amount = 40}
+    },
+    results =
+    {
+      {type = "fluid", name = "light-oil", amount = 30}
+    }
+  },
+  {
+    type = "recipe",
+    name = "light-oil-cracking",
+    category = "chemistry",
+    enabled = false,
+    energy_required = 2,
+    ingredients =
+    {
+      {type = "fluid", name = "water", amount = 30},
+      {type = "fluid", name = "light-oil", amount = 30}
+    },
+    results =
+    {
+      {type = "fluid", name = "petroleum-gas", amount = 20}
+    }
+  },
+  {
+    type = "recipe",
+    name = "sulfuric-acid",
+    category = "chemistry",
+    energy_required = 1,
+    enabled = false,
+    ingredients =
+    {
+      {type = "item", name = "sulfur", amount = 5},
+      {type = "item", name = "iron-plate", amount = 1},
+      {type = "fluid", name = "water", amount = 100}
+    },
+    results =
+    {
+      {type = "fluid", name = "sulfuric-acid", amount = 50}
+    }
+  },
+  {
+    type = "recipe",
+    name = "plastic-bar",
+    category = "chemistry",
+    energy_required = 1,
+    enabled = false,
+    ingredients =
+    {
+      {type = "fluid", name = "petroleum-gas", amount = 20},
+      {type = "item", name = "coal", amount = 1}
+    },
+    results =
+    {
+      {type = "item", name = "plastic-bar", amount = 2}
+    }
+  },
+  {
+    type = "recipe",
+    name = "solid-fuel-from-light-oil",
+    category = "chemistry",
+    energy_required = 2,
+    ingredients =
+    {
+      {type = "fluid", name = "light-oil", amount = 10}
+    },
+    results =
+    {
+      {type = "item", name = "solid-fuel", amount = 1}
+    }
+  },
+  {
+    type = "recipe",
+    name = "solid-fuel-from-petroleum-gas",
+    category = "chemistry",
+    energy_required = 2,
+    ingredients =
+    {
+      {type = "fluid", name = "petroleum-gas", amount = 20}
+    },
+    results =
+    {
+      {type = "item", name = "solid-fuel", amount = 1}
+    }
+  },
+  {
+    type = "recipe",
+    name = "solid-fuel-from-heavy-oil",
+    category = "chemistry",
+    energy_required = 2,
+    ingredients =
+    {
+      {type = "fluid", name = "heavy-oil", amount = 20}
+    },
+    results =
+    {
+      {type = "item", name = "solid-fuel", amount = 1}
+    }
+  },
+  {
+    type = "recipe",
+    name = "sulfur",
+    category = "chemistry",
+    energy_required = 1,
+    enabled = false,
+    ingredients =
+    {
+      {type = "fluid", name = "water", amount = 30},
+      {type = "fluid", name = "petroleum-gas", amount = 30}
+    },
+    results =
+    {
+      {type = "item", name = "sulfur", amount = 2}
+    }
+  },
+  {
+    type = "recipe",
+    name = "lubricant",
+    category = "chemistry",
+    enabled = false,
+    energy_required = 1,
+    ingredients =
+    {
+      {type = "fluid", name = "heavy-oil", amount = 10}
+    },
+    results =
+    {
+      {type = "fluid", name = "lubricant", amount = 10}
+    }
+  },
+  {
+    type = "recipe",
+    name = "explosives",
+    category = "chemistry",
+    energy_required = 4,
+    enabled = false,
+    ingredients =
+    {
+      {type = "item", name = "sulfur", amount = 1},
+      {type = "item", name = "coal", amount = 1},
+      {type = "fluid", name = "water", amount = 10}
+    },
+    result = "explosives",
+    result_count = 2
+  },
+  {
+    type = "recipe",
+    name = "automation-science-pack",
+    energy_required = 5,
+    ingredients =
+    {
+      {"copper-plate", 1},
+      {"iron-gear-wheel", 1}
+    },
+    result = "automation-science-pack"
+  },
+  {
+    type = "recipe",
+    name = "logistic-science-pack",
+    enabled = false,
+    energy_required = 6,
+    ingredients =
+    {
+      {"inserter", 1},
+      {"transport-belt", 1}
+    },
+    result = "logistic-science-pack"
+  },
+  {
+    type = "recipe",
+    name = "military-science-pack",
+    enabled = false,
+    energy_required = 10,
+    ingredients =
+    {
+      {"piercing-rounds-magazine", 1},
+      {"grenade", 1},
+      {"stone-wall", 2}
+    },
+    result_count = 2,
+    result = "military-science-pack"
+  },
+  {
+    type = "recipe",
+    name = "chemical-science-pack",
+    enabled = false,
+    energy_required = 24,
+    ingredients =
+    {
+      {"engine-unit", 2},
+      {"advanced-circuit", 3},
+      {"sulfur", 1}
+    },
+    result_count = 2,
+    result = "chemical-science-pack"
+  },
+  {
+    type = "recipe",
+    name = "production-science-pack",
+    enabled = false,
+    energy_required = 21,
+    ingredients =
+    {
+      {"electric-furnace", 1},
+      {"productivity-module", 1},
+      {"rail", 30}
+    },
+    result_count = 3,
+    result = "production-science-pack"
+  },
+  {
+    type = "recipe",
+    name = "utility-science-pack",
+    enabled = false,
+    energy_required = 21,
+    ingredients =
+    {
+      {"low-density-structure", 3},
+      {"processing-unit", 2},
+      {"flying-robot-frame", 1}
+    },
+    result_count = 3,
+    result = "utility-science-pack"
+  },
+  {
+    type = "recipe",
+    name = "inserter",
+    ingredients =
+    {
+      {"electronic-circuit", 1},
+      {"iron-gear-wheel", 1},
+      {"iron-plate", 1}
+    },
+    result = "inserter"
+  },
+  {
+    type = "recipe",
+    name = "transport-belt",
+    ingredients =
+    {
+      {"iron-plate", 1},
+      {"iron-gear-wheel", 1}
+    },
+    result = "transport-belt",
+    result_count = 2
+  },
+  {
+    type = "recipe",
+    name = "firearm-magazine",
+    energy_required = 1,
+    ingredients = {{"iron-plate", 4}},
+    result = "firearm-magazine",
+    result_count = 1
+  },
+  {
+    type = "recipe",
+    name = "piercing-rounds-magazine",
+    enabled = false,
+    energy_required = 3,
+    ingredients =
+    {
+      {"firearm-magazine", 1},
+      {"steel-plate", 1},
+      {"copper-plate", 5}
+    },
+    result = "piercing-rounds-magazine"
+  },
+  {
+    type = "recipe",
+    name = "grenade",
+    enabled = false,
+    energy_required = 8,
+    ingredients =
+    {
+      {"steel-plate", 5},
+      {"coal", 10}
+    },
+    result = "grenade"
+  },
+  {
+    type = "recipe",
+    name = "stone-wall",
+    enabled = false,
+    ingredients = {{"stone-brick", 5}},
+    result = "stone-wall"
+  },
+  {
+    type = "recipe",
+    name = "rail",
+    enabled = false,
+    ingredients =
+    {
+      {"stone", 1},
+      {"iron-stick", 1},
+      {"steel-plate", 1}
+    },
+    result = "rail",
+    result_count = 2
+  },
+  {
+    type = "recipe",
+    name = "electric-furnace",
+    ingredients = {{"steel-plate", 10}, {"advanced-circuit", 5}, {"stone-brick", 10}},
+    result = "electric-furnace",
+    energy_required = 5,
+    enabled = false
+  },
+  {
+    type = "recipe",
+    name = "productivity-module",
+    enabled = false,
+    ingredients =
+    {
+      {"advanced-circuit", 5},
+      {"electronic-circuit", 5}
+    },
+    energy_required = 15,
+    result = "productivity-module"
+  },
+  {
+    type = "recipe",
+    name = "speed-module",
+    enabled = false,
+    ingredients =
+    {
+      {"advanced-circuit", 5},
+      {"electronic-circuit", 5}
+    },
+    energy_required = 15,
+    result = "speed-module"
+  },
+  {
+    type = "recipe",
+    name = "low-density-structure",
+    category = "crafting",
+    normal =
+    {
+      energy_required = 20,
+      enabled = false,
+      ingredients =
+      {
+        {"steel-plate", 2},
+        {"copper-plate", 20},
+        {"plastic-bar", 5}
+      },
+      result = "low-density-structure"
+    }
+  },
+  {
+    type = "recipe",
+    name = "rocket-fuel",
+    energy_required = 30,
+    enabled = false,
+    category = "crafting-with-fluid",
+    ingredients =
+    {
+      {"solid-fuel", 10},
+      {type = "fluid", name = "light-oil", amount = 10}
+    },
+    result = "rocket-fuel"
+  },
+  {
+    type = "recipe",
+    name = "rocket-control-unit",
+    energy_required = 30,
+    enabled = false,
+    ingredients =
+    {
+      {"processing-unit", 1},
+      {"speed-module", 1}
+    },
+    result = "rocket-control-unit"
+  },
+  {
+    type = "recipe",
+    name = "rocket-part",
+    energy_required = 3,
+    enabled = false,
+    hidden = true,
+    category = "rocket-building",
+    ingredients =
+    {
+      {"rocket-control-unit", 10},
+      {"low-density-structure", 10},
+      {"rocket-fuel", 10}
+    },
+    result = "rocket-part"
+  },
+  {
+    type = "recipe",
+    name = "solar-panel",
+    energy_required = 10,
+    enabled = false,
+    ingredients =
+    {
+      {"steel-plate", 5},
+      {"electronic-circuit", 15},
+      {"copper-plate", 5}
+    },
+    result = "solar-panel"
+  },
+  {
+    type = "recipe",
+    name = "accumulator",
+    energy_required = 10,
+    enabled = false,
+    ingredients =
+    {
+      {"iron-plate", 2},
+      {"battery", 5}
+    },
+    result = "accumulator"
+  },
+  {
+    type = "recipe",
+    name = "radar",
+    ingredients =
+    {
+      {"electronic-circuit", 5},
+      {"iron-gear-wheel", 5},
+      {"iron-plate", 10}
+    },
+    result = "radar"
+  },
+  {
+    type = "recipe",
+    name = "satellite",
+    energy_required = 5,
+    enabled = false,
+    category = "crafting",
+    ingredients =
+    {
+      {"low-density-structure", 100},
+      {"solar-panel", 100},
+      {"accumulator", 100},
+      {"radar", 5},
+      {"processing-unit", 100},
+      {"rocket-fuel", 50}
+    },
+    result = "satellite",
+    requester_paste_multiplier = 1
+  },
+  {
+    type = "recipe",
+    name = "uranium-processing",
+    energy_required = 12,
+    enabled = false,
+    category = "centrifuging",
+    ingredients = {{"uranium-ore", 10}},
+    icon = "__base__/graphics/icons/uranium-processing.png",
+    icon_size = 64, icon_mipmaps = 4,
+    subgroup = "raw-material",
+    order = "k[uranium-processing]",
+    results =
+    {
+      {
+        name = "uranium-235",
+        probability = 0.007,
+        amount = 1
+      },
+      {
+        name = "uranium-238",
+        probability = 0.993,
+        amount = 1
+      }
+    }
+  },
+  {
+    type = "recipe",
+    name = "kovarex-enrichment-process",
+    energy_required = 60,
+    enabled = false,
+    category = "centrifuging",
+    ingredients = {{"uranium-235", 40}, {"uranium-238", 5}},
+    icon = "__base__/graphics/icons/kovarex-enrichment-process.png",
+    icon_size = 64, icon_mipmaps = 4,
+    subgroup = "intermediate-product",
+    order = "r[uranium-processing]-c[kovarex-enrichment-process]",
+    main_product = "",
+    results =
+    {
+      {"uranium-235", 41},
+      {"uranium-238", 2}
+    },
+    allow_decomposition = false
+  },
+  {
+    type = "recipe",
+    name = "electric-energy-interface",
+    energy_required = 0.5,
+    enabled = false,
+    ingredients = {{"iron-plate", 2}, {"electronic-circuit", 5}},
+    result = "electric-energy-interface"
+  }
+})
@@ -7,17 +7,42 @@ import os
 import lupa
 import shutil
 from PIL import Image
-import yattag
 from typing import NamedTuple
 import math
 import pathlib
 from collections import Counter
-
-
-debug = False
-def printDebug(toPrint: str):
-    if debug:
-        print(toPrint)
+import contextlib
+import html
+import glob
+import copy
+import concurrent.futures
+import hashlib
+import pickle
+import array
+import sys
+import collections.abc
+import time
+import heapq
+import itertools
+import csv
+import mmap
+import struct
+import functools
+
+
+htmlIndent = True
+ZERO_TOLERANCE = 0.0004
+# Debug trace levels, a message is only formatted when its level is enabled
+TRACE_LEVELS = {"off": 0, "info": 1, "detail": 2}
+traceLevel = TRACE_LEVELS["off"]
+# Json lines file receiving solver iterations, None to disable
+traceFile = None
+def printDebug(toPrint: str, *args, level: int=TRACE_LEVELS["info"]):
+    if traceLevel >= level:
+        print(toPrint.format(*args) if len(args) > 0 else toPrint)
+
+def writeTrace(record: dict):
+    traceFile.write(json.dumps(record)+"\n")
 
 class Recipe(NamedTuple):
     name: str
@@ -35,10 +60,56 @@ class CraftingFactory(NamedTuple):
     consumptionQuantity: int
     speed: float
     categories: str
+    moduleSlots: int = 0
 CraftingFactoriesByName = dict[str, CraftingFactory]
 CraftingFactoriesByCategories = dict[str, CraftingFactory]
 
 
+class Module(NamedTuple):
+    name: str
+    speed: float
+    productivity: float
+    consumption: float
+ModulesByName = dict[str, Module]
+
+
+class Beacon(NamedTuple):
+    name: str
+    distributionEffectivity: float
+    moduleSlots: int
+
+
+class TransportBelt(NamedTuple):
+    name: str
+    speed: float
+TransportBeltsByName = dict[str, TransportBelt]
+
+
+class FactorioEquipment(NamedTuple):
+    # Modules and beacon used by factories preferencies with modules,
+    # transport belts and fluids used to compute belt lanes of items flows in consumption outputs
+    modulesByName: ModulesByName
+    beacon: Beacon
+    transportBeltsByName: TransportBeltsByName
+    fluids: set[str]
+NO_FACTORIO_EQUIPMENT = FactorioEquipment(ModulesByName(), None, TransportBeltsByName(), set())
+
+
+class GroupsAnalysis(NamedTuple):
+    # For each item: groups providing it and groups requesting it
+    itemsGroups: dict[str, tuple[list[str], list[str]]]
+    # For each group: provider group ("" when none) of each requested item
+    groupsDependencies: dict[str, dict[str, set[str]]]
+    # For each provider group: groups requesting each of its items
+    itemsUsedByGroup: dict[str, dict[str, list[str]]]
+    # Requested items provided by several groups, with these groups
+    conflicts: dict[str, list[str]]
+    # Groups depending on each other
+    cycles: list[list[str]]
+    # Longest dependencies chain to groups without dependencies, groups of a cycle share the same depth
+    depths: dict[str, int]
+
+
 def getVersion(factoriopath:string) -> string:
     # Read info.json file
     with open(os.path.join(factoriopath, "data", "base", "info.json")) as infoFile:
@@ -48,6 +119,77 @@ def getVersion(factoriopath:string) -> string:
     return infoJson["version"]
 
 
+def fromLuaRecipe(recipeName: str, recipeLua) -> Recipe:
+    # Check recipe type
+    if recipeLua["type"] != "recipe":
+        raise ValueError("Invalid recipe type for \"{}\"".format(recipeName))
+    # Get category
+    recipeCategory = "basic-crafting"
+    if "category" in recipeLua:
+        recipeCategory = recipeLua["category"]
+    # Get lua recipe ingrediants
+    ingredients = {}
+    if "ingredients" in recipeLua:
+        ingredientsLua = recipeLua["ingredients"]
+    elif "ingredients" in recipeLua["normal"]:
+        ingredientsLua = recipeLua["normal"]["ingredients"]
+    else:
+        raise ValueError("No ingredients found for \"{}\"".format(recipeName))
+    # Convert lua recipe ingrediants into python
+    for indexIngredient in range(1, len(ingredientsLua)+1):
+
+        if 1 in ingredientsLua[indexIngredient]:
+            ingredientName = ingredientsLua[indexIngredient][1]
+        elif "name" in ingredientsLua[indexIngredient]:
+            ingredientName = ingredientsLua[indexIngredient]["name"]
+        else:
+            raise ValueError("No ingredient name found for \"{}\" at {}".format(recipeName, indexIngredient))
+        if 2 in ingredientsLua[indexIngredient]:
+            ingredientAmount = ingredientsLua[indexIngredient][2]
+        elif "amount" in ingredientsLua[indexIngredient]:
+            ingredientAmount = ingredientsLua[indexIngredient]["amount"]
+        else:
+            raise ValueError("No ingredient amount found for \"{}\" at {}".format(recipeName, indexIngredient))
+        ingredients[ingredientName] = ingredientAmount
+    # Get optional recipe energy required
+    time = 0.5
+    if "energy_required" in recipeLua:
+        time = recipeLua["energy_required"]
+    elif "normal" in recipeLua and "energy_required" in recipeLua["normal"]:
+        time = recipeLua["normal"]["energy_required"]
+    # Get recipe result
+    results = {}
+    if "result" in recipeLua:
+        resultCount = 1
+        if "result_count" in recipeLua:
+            resultCount = recipeLua["result_count"]
+        results[recipeLua["result"]] = resultCount
+    elif "results" in recipeLua:
+        for indexResult in range(1, len(recipeLua["results"])+1):
+            if "name" in recipeLua["results"][indexResult]:
+                resultName = recipeLua["results"][indexResult]["name"]
+            elif recipeLua["results"][indexResult][1] != None:
+                resultName = recipeLua["results"][indexResult][1]
+            else:
+                raise ValueError("No result name found for \"{}\" at {}".format(recipeName, indexResult))
+            resultAmount = recipeLua["results"][indexResult]["amount"]
+            if "amount" in recipeLua["results"][indexResult]:
+                resultAmount = recipeLua["results"][indexResult]["amount"]
+            elif recipeLua["results"][indexResult][2] != None:
+                resultAmount = recipeLua["results"][indexResult][2]
+            else:
+                raise ValueError("No result amount found for \"{}\" at {}".format(recipeName, indexResult))
+            results[resultName] = resultAmount
+    elif "result" in recipeLua["normal"]:
+        resultCount = 1
+        if "result_count" in recipeLua["normal"]:
+            resultCount = recipeLua["normal"]["result_count"]
+        results[recipeLua["normal"]["result"]] = resultCount
+    else:
+        raise ValueError("No result found for \"{}\"".format(recipeName))
+    return Recipe(recipeName, ingredients, time, results, recipeCategory)
+
+
 def getRecipes(factoriopath:string, recipesToRemove:set) -> RecipesByName:
     # read recipe.lua
     with open(os.path.join(factoriopath, "data", "base", "prototypes", "recipe.lua")) as recipeFile:
@@ -70,92 +212,279 @@ def getRecipes(factoriopath:string, recipesToRemove:set) -> RecipesByName:
             raise ValueError("No name found for recipe")
         if recipeName in recipesToRemove:
             continue
-        # Check recipe type
-        if recipeLua[index]["type"] != "recipe":
-            raise ValueError("Invalid recipe type for \"{}\"".format(recipeName))
-        # Get category
-        recipeCategory = "basic-crafting"
-        if "category" in recipeLua[index]:
-            recipeCategory = recipeLua[index]["category"]
-        # Get lua recipe ingrediants
-        ingredients = {}
-        if "ingredients" in recipeLua[index]:
-            ingredientsLua = recipeLua[index]["ingredients"]
-        elif "ingredients" in recipeLua[index]["normal"]:
-            ingredientsLua = recipeLua[index]["normal"]["ingredients"]
-        else:
-            raise ValueError("No ingredients found for \"{}\"".format(recipeName))
-        # Convert lua recipe ingrediants into python
-        for indexIngredient in range(1, len(ingredientsLua)+1):
-
-            if 1 in ingredientsLua[indexIngredient]:
-                ingredientName = ingredientsLua[indexIngredient][1]
-            elif "name" in ingredientsLua[indexIngredient]:
-                ingredientName = ingredientsLua[indexIngredient]["name"]
-            else:
-                raise ValueError("No ingredient name found for \"{}\" at {}".format(recipeName, indexIngredient))
-            if 2 in ingredientsLua[indexIngredient]:
-                ingredientAmount = ingredientsLua[indexIngredient][2]
-            elif "amount" in ingredientsLua[indexIngredient]:
-                ingredientAmount = ingredientsLua[indexIngredient]["amount"]
-            else:
-                raise ValueError("No ingredient amount found for \"{}\" at {}".format(recipeName, indexIngredient))
-            ingredients[ingredientName] = ingredientAmount
-        # Get optional recipe energy required
-        time = 0.5
-        if "energy_required" in recipeLua[index]:
-            time = recipeLua[index]["energy_required"]
-        elif "normal" in recipeLua[index] and "energy_required" in recipeLua[index]["normal"]:
-            time = recipeLua[index]["normal"]["energy_required"]
-        # Get recipe result
-        results = {}
-        if "result" in recipeLua[index]:
-            resultCount = 1
-            if "result_count" in recipeLua[index]:
-                resultCount = recipeLua[index]["result_count"]
-            results[recipeLua[index]["result"]] = resultCount
-        elif "results" in recipeLua[index]:
-            for indexResult in range(1, len(recipeLua[index]["results"])+1):
-                if "name" in recipeLua[index]["results"][indexResult]:
-                    resultName = recipeLua[index]["results"][indexResult]["name"]
-                elif recipeLua[index]["results"][indexResult][1] != None:
-                    resultName = recipeLua[index]["results"][indexResult][1]
-                else:
-                    raise ValueError("No result name found for \"{}\" at {}".format(recipeName, indexResult))
-                resultAmount = recipeLua[index]["results"][indexResult]["amount"]
-                if "amount" in recipeLua[index]["results"][indexResult]:
-                    resultAmount = recipeLua[index]["results"][indexResult]["amount"]
-                elif recipeLua[index]["results"][indexResult][2] != None:
-                    resultAmount = recipeLua[index]["results"][indexResult][2]
-                else:
-                    raise ValueError("No result amount found for \"{}\" at {}".format(recipeName, indexResult))
-                results[resultName] = resultAmount
-        elif "result" in recipeLua[index]["normal"]:
-            resultCount = 1
-            if "result_count" in recipeLua[index]["normal"]:
-                resultCount = recipeLua[index]["normal"]["result_count"]
-            results[recipeLua[index]["normal"]["result"]] = resultCount
-        else:
-            raise ValueError("No result found for \"{}\"".format(recipeName))
-        recipes[recipeName] = Recipe(recipeName, ingredients, time, results, recipeCategory)
+        recipes[recipeName] = fromLuaRecipe(recipeName, recipeLua[index])
     # return recipes dict
     return recipes
 
 
+CACHE_VERSION = 2
+
+
+def getCachedData(cacheDirPath:string, cacheName:str, cacheKey:list, rebuildCache:bool, computeData):
+    # computeData must return plain data to not depend on the module name used to run this script
+    cacheKeyHash = hashlib.sha256(json.dumps([CACHE_VERSION]+cacheKey).encode("utf8")).hexdigest()
+    cacheFilePath = os.path.join(cacheDirPath, "{}-{}.pickle".format(cacheName, cacheKeyHash))
+    if not rebuildCache and os.path.exists(cacheFilePath):
+        printDebug("Load {} from cache {}", cacheName, cacheFilePath)
+        with open(cacheFilePath, 'rb') as cacheFile:
+            return pickle.load(cacheFile)
+    cachedData = computeData()
+    if not os.path.exists(cacheDirPath):
+        os.makedirs(cacheDirPath)
+    with open(cacheFilePath+".tmp", 'wb') as cacheFile:
+        pickle.dump(cachedData, cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cacheFilePath+".tmp", cacheFilePath)
+    return cachedData
+
+
+def getRecipesCached(factoriopath:string, recipesToRemove:set, cacheDirPath:string, rebuildCache:bool=False) -> RecipesByName:
+    # Cache key from factorio version, recipe.lua content and recipes to remove
+    with open(os.path.join(factoriopath, "data", "base", "prototypes", "recipe.lua"), 'rb') as recipeFile:
+        recipeDataHash = hashlib.sha256(recipeFile.read()).hexdigest()
+    cacheKey = [getVersion(factoriopath), recipeDataHash, sorted(recipesToRemove)]
+    recipesTuples = getCachedData(cacheDirPath, "recipes", cacheKey, rebuildCache,
+                                  lambda: [tuple(recipe) for recipe in getRecipes(factoriopath, recipesToRemove).values()])
+    return {recipeTuple[0]: Recipe(*recipeTuple) for recipeTuple in recipesTuples}
+
+
+# Lua environment of the factorio data stage: data:extend collect prototypes in data.raw
+# and require search files in current mod, in "__mod-name__/" mod or in core lualib
+LUA_PROTOTYPES_LOADER = """
+data = {raw = {}}
+function data:extend(prototypes)
+    for _, prototype in ipairs(prototypes) do
+        if prototype.type ~= nil and prototype.name ~= nil then
+            data.raw[prototype.type] = data.raw[prototype.type] or {}
+            data.raw[prototype.type][prototype.name] = prototype
+        end
+    end
+end
+local definesMeta = {}
+definesMeta.__index = function(table, key)
+    local value = setmetatable({}, definesMeta)
+    rawset(table, key, value)
+    return value
+end
+defines = setmetatable({}, definesMeta)
+settings = {startup = setmetatable({}, {__index = function() return {} end})}
+feature_flags = {}
+mods = {}
+log = function() end
+local modsPaths = {}
+local corePath = ""
+local currentModPath = ""
+local builtinModules = {}
+local function findModuleFile(name)
+    local modName, path = name:match("^__(.-)__[/.](.+)$")
+    path = (path or name):gsub("%.lua$", "")
+    if not path:find("/") then
+        path = path:gsub("%.", "/")
+    end
+    local roots = {currentModPath, corePath.."/lualib", corePath}
+    if modName ~= nil then
+        roots = {modsPaths[modName] or ""}
+    end
+    for _, root in ipairs(roots) do
+        local filePath = root.."/"..path..".lua"
+        local file = io.open(filePath, "r")
+        if file ~= nil then
+            file:close()
+            return filePath
+        end
+    end
+    return nil
+end
+table.insert(package.searchers or package.loaders, 2, function(name)
+    local filePath = findModuleFile(name)
+    if filePath == nil then
+        return "\\n\\tno factorio file for "..name
+    end
+    return assert(loadfile(filePath)), filePath
+end)
+function initPrototypesLoader(inputModsPaths, inputModsVersions, inputCorePath)
+    for modName, modPath in pairs(inputModsPaths) do
+        modsPaths[modName] = modPath
+        mods[modName] = inputModsVersions[modName]
+    end
+    corePath = inputCorePath
+    for name, _ in pairs(package.loaded) do
+        builtinModules[name] = true
+    end
+end
+function runModFile(modPath, filePath)
+    -- Each mod have its own required modules
+    for name, _ in pairs(package.loaded) do
+        if not builtinModules[name] then
+            package.loaded[name] = nil
+        end
+    end
+    currentModPath = modPath
+    assert(loadfile(filePath))()
+end
+"""
+
+PROTOTYPES_DATA_STAGES = ["data.lua", "data-updates.lua", "data-final-fixes.lua"]
+CRAFTING_FACTORY_PROTOTYPE_TYPES = ["assembling-machine", "furnace", "rocket-silo"]
+ITEM_PROTOTYPE_TYPES = ["item", "fluid", "tool", "module", "capsule", "ammo", "gun", "armor", "item-with-entity-data", "rail-planner",
+                        "repair-tool", "selection-tool", "spidertron-remote", "item-with-tags", "item-with-label", "item-with-inventory",
+                        "blueprint", "blueprint-book", "deconstruction-item", "upgrade-item", "copy-paste-tool", "mining-tool"]
+
+
+def getModsPaths(factoriopath:string, modsDirPaths: list[str]) -> tuple[dict[str, str], dict[str, str]]:
+    # base first then mods in given order
+    modsPaths = {"base": os.path.join(factoriopath, "data", "base")}
+    modsVersions = {"base": getVersion(factoriopath)}
+    for modDirPath in modsDirPaths:
+        with open(os.path.join(modDirPath, "info.json")) as infoFile:
+            infoJson = json.load(infoFile)
+        modsPaths[infoJson["name"]] = str(modDirPath)
+        modsVersions[infoJson["name"]] = infoJson["version"]
+    return modsPaths, modsVersions
+
+
+def newPrototypesLuaRuntime(factoriopath:string, modsPaths: dict[str, str], modsVersions: dict[str, str]) -> lupa.LuaRuntime:
+    lua = lupa.LuaRuntime()
+    lua.execute(LUA_PROTOTYPES_LOADER)
+    lua.globals().initPrototypesLoader(lua.table_from(modsPaths), lua.table_from(modsVersions), os.path.join(factoriopath, "data", "core"))
+    return lua
+
+
+def energyToWatt(energy: str) -> float:
+    prefixes = {"": 1.0, "k": 1.0e3, "M": 1.0e6, "G": 1.0e9, "T": 1.0e12, "P": 1.0e15}
+    energy = energy.rstrip("WJ")
+    if len(energy)>0 and energy[-1] in prefixes:
+        return float(energy[:-1]) * prefixes[energy[-1]]
+    return float(energy)
+
+
+def iconPath(iconName: str, modsPaths: dict[str, str], corePath: string) -> string:
+    # "__base__/graphics/icons/iron-plate.png" to file path
+    if iconName.startswith("__core__/"):
+        return os.path.join(corePath, iconName[len("__core__/"):])
+    for modName, modPath in modsPaths.items():
+        if iconName.startswith("__{}__/".format(modName)):
+            return os.path.join(modPath, iconName[len(modName)+5:])
+    return iconName
+
+
+def extractPrototypes(lua: lupa.LuaRuntime, factoriopath:string, modsPaths: dict[str, str], recipesToRemove:set) -> tuple[RecipesByName, CraftingFactoriesByName, dict[str, str]]:
+    # Read recipes, crafting factories and items icon from data.raw in only one pass
+    dataRaw = lua.globals().data.raw
+    recipes = {}
+    if "recipe" in dataRaw:
+        for recipeName, recipeLua in dataRaw["recipe"].items():
+            if recipeName not in recipesToRemove:
+                recipes[recipeName] = fromLuaRecipe(recipeName, recipeLua)
+    craftingFactories = {}
+    for prototypeType in CRAFTING_FACTORY_PROTOTYPE_TYPES:
+        if prototypeType not in dataRaw:
+            continue
+        for factoryName, factoryLua in dataRaw[prototypeType].items():
+            if "crafting_categories" not in factoryLua or "energy_usage" not in factoryLua:
+                continue
+            consumptionType = "electric"
+            if "energy_source" in factoryLua and "type" in factoryLua["energy_source"]:
+                consumptionType = factoryLua["energy_source"]["type"]
+            moduleSlots = 0
+            if "module_specification" in factoryLua and "module_slots" in factoryLua["module_specification"]:
+                moduleSlots = factoryLua["module_specification"]["module_slots"]
+            craftingFactories[factoryName] = CraftingFactory(factoryName, consumptionType, energyToWatt(factoryLua["energy_usage"]),
+                                                             factoryLua["crafting_speed"], list(factoryLua["crafting_categories"].values()), moduleSlots)
+    itemsIconPath = {}
+    corePath = os.path.join(factoriopath, "data", "core")
+    for prototypeType in ITEM_PROTOTYPE_TYPES:
+        if prototypeType not in dataRaw:
+            continue
+        for itemName, itemLua in dataRaw[prototypeType].items():
+            if itemName in itemsIconPath:
+                continue
+            if "icon" in itemLua:
+                itemsIconPath[itemName] = iconPath(itemLua["icon"], modsPaths, corePath)
+            elif "icons" in itemLua and 1 in itemLua["icons"]:
+                itemsIconPath[itemName] = iconPath(itemLua["icons"][1]["icon"], modsPaths, corePath)
+    return recipes, craftingFactories, itemsIconPath
+
+
+def loadPrototypesFiles(factoriopath:string, modsPaths: dict[str, str], modsVersions: dict[str, str], modsFilesPaths: list[tuple[str, str]], recipesToRemove:set) -> tuple[RecipesByName, CraftingFactoriesByName, dict[str, str]]:
+    lua = newPrototypesLuaRuntime(factoriopath, modsPaths, modsVersions)
+    for modPath, filePath in modsFilesPaths:
+        lua.globals().runModFile(modPath, filePath)
+    return extractPrototypes(lua, factoriopath, modsPaths, recipesToRemove)
+
+
+def getPrototypesFilesPaths(modsPaths: dict[str, str]) -> list[tuple[str, str]]:
+    # Data stage files are loaded like factorio do, stage by stage in one session, they require the prototype files
+    modsFilesPaths = []
+    for stage in PROTOTYPES_DATA_STAGES:
+        for modPath in modsPaths.values():
+            if os.path.exists(os.path.join(modPath, stage)):
+                modsFilesPaths.append((modPath, os.path.join(modPath, stage)))
+    return modsFilesPaths
+
+
+def getPrototypes(factoriopath:string, modsDirPaths: list[str], recipesToRemove:set) -> tuple[RecipesByName, CraftingFactoriesByName, dict[str, str]]:
+    modsPaths, modsVersions = getModsPaths(factoriopath, modsDirPaths)
+    return loadPrototypesFiles(factoriopath, modsPaths, modsVersions, getPrototypesFilesPaths(modsPaths), recipesToRemove)
+
+
+def getPrototypesCached(factoriopath:string, modsDirPaths: list[str], recipesToRemove:set, cacheDirPath:string, rebuildCache:bool=False) -> tuple[RecipesByName, CraftingFactoriesByName, dict[str, str]]:
+    # Cache key from mods versions and size and modification time of all lua files, cheaper than hashing thousands of files
+    modsPaths, modsVersions = getModsPaths(factoriopath, modsDirPaths)
+    filesStats = []
+    for modPath in list(modsPaths.values())+[os.path.join(factoriopath, "data", "core", "lualib")]:
+        for filePath in sorted(glob.glob(os.path.join(modPath, "**", "*.lua"), recursive=True)):
+            fileStat = os.stat(filePath)
+            filesStats.append([filePath, fileStat.st_size, fileStat.st_mtime_ns])
+    cacheKey = [modsVersions, filesStats, sorted(recipesToRemove)]
+    def computePrototypes():
+        recipes, craftingFactories, itemsIconPath = getPrototypes(factoriopath, modsDirPaths, recipesToRemove)
+        return [tuple(recipe) for recipe in recipes.values()], [tuple(craftingFactory) for craftingFactory in craftingFactories.values()], itemsIconPath
+    recipesTuples, craftingFactoriesTuples, itemsIconPath = getCachedData(cacheDirPath, "prototypes", cacheKey, rebuildCache, computePrototypes)
+    return ({recipeTuple[0]: Recipe(*recipeTuple) for recipeTuple in recipesTuples},
+            {craftingFactoryTuple[0]: CraftingFactory(*craftingFactoryTuple) for craftingFactoryTuple in craftingFactoriesTuples},
+            itemsIconPath)
+
+
 def fromJsonRecipe(recipeName: str, jsonRecipe: dict) -> Recipe:
     return Recipe(recipeName, jsonRecipe["ingredients"], jsonRecipe["time"], jsonRecipe["results"], jsonRecipe["category"])
 
 
-def loadRecipes(jsonFilePath: string) -> RecipesByName:
-    with open(jsonFilePath, 'r') as jsonFile:
-        jsonRecipes = json.load(jsonFile)
+def fromJsonRecipes(jsonRecipes: dict) -> RecipesByName:
     recipes = RecipesByName()
     for recipeName, jsonRecipe in jsonRecipes.items():
         recipes[recipeName] = fromJsonRecipe(recipeName, jsonRecipe)
     return recipes
 
 
-def recipesByName2recipesByResult(recipesByName: RecipesByName, recipesPreferences: dict[str, list[dict[str, float]]]) -> RecipesByResult:
+def loadRecipesJson(jsonFilePath: string) -> RecipesByName:
+    # orjson is used when installed
+    try:
+        import orjson
+    except ImportError:
+        with open(jsonFilePath, 'r') as jsonFile:
+            return fromJsonRecipes(json.load(jsonFile))
+    with open(jsonFilePath, 'rb') as jsonFile:
+        return fromJsonRecipes(orjson.loads(jsonFile.read()))
+
+
+def loadRecipesMsgpack(msgpackFilePath: string) -> RecipesByName:
+    import msgpack
+    with open(msgpackFilePath, 'rb') as msgpackFile:
+        return fromJsonRecipes(msgpack.unpackb(msgpackFile.read()))
+
+
+def loadRecipes(filePath: string) -> RecipesByName:
+    # Format chosen by file extension, packed recipes files are mapped and each recipe is only read when used
+    extension = os.path.splitext(filePath)[1]
+    if extension == ".msgpack":
+        return loadRecipesMsgpack(filePath)
+    elif extension == ".recipes":
+        return PackedRecipes(filePath)
+    return loadRecipesJson(filePath)
+
+
+def recipesByName2recipesByResult(recipesByName: RecipesByName, recipesPreferences: dict[str, list[dict[str, float]]], keepAlternatives: bool=False) -> RecipesByResult:
+    # With keepAlternatives, items without preferencies keep all their recipes with a None ratio
     recipesByResult = RecipesByResult()
     for resultName, recipesNamesRatiosList in recipesPreferences.items():
         ratioTotal = 0.0
@@ -171,6 +500,8 @@ def recipesByName2recipesByResult(recipesByName: RecipesByName, recipesPreferenc
         for resultName in recipe.results.keys():
             if resultName in recipesPreferences:
                 continue
+            elif keepAlternatives:
+                recipesByResult.setdefault(resultName, []).append((None, recipe))
             elif resultName in recipesByResult:
                 raise ValueError("There are more than one recipe to produce {} you have to set your preferencies in consumption data file".format(resultName))
             else:
@@ -178,64 +509,402 @@ def recipesByName2recipesByResult(recipesByName: RecipesByName, recipesPreferenc
     return recipesByResult
 
 
-def recipesRemoveItem(recipes: RecipesByName, itemsToRemove):
-    recipesToDelete = []
-    for recipeName, recipe in recipes.items():
-        for ingredientName in list(recipe.ingredients.keys()):
-            if ingredientName in itemsToRemove:
-                del recipe.ingredients[ingredientName]
-        for resultName in list(recipe.results.keys()):
-            if resultName in itemsToRemove:
-                del recipe.results[resultName]
-        if len(recipe.ingredients)==0 or len(recipe.results)==0:
-            recipesToDelete.append(recipeName)
+class CompactItems(collections.abc.Mapping):
+    # Read only item name to count map over a slice of the compact recipes buffers
+    __slots__ = ("itemsName", "itemsId", "counts", "start", "end")
+
+    def __init__(self, itemsName: list[str], itemsId: array.array, counts: array.array, start: int, end: int):
+        self.itemsName = itemsName
+        self.itemsId = itemsId
+        self.counts = counts
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, itemName: str) -> float:
+        for index in range(self.start, self.end):
+            if self.itemsName[self.itemsId[index]] == itemName:
+                return self.counts[index]
+        raise KeyError(itemName)
+
+    def __iter__(self):
+        return (self.itemsName[self.itemsId[index]] for index in range(self.start, self.end))
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def items(self) -> list[tuple[str, float]]:
+        return [(self.itemsName[self.itemsId[index]], self.counts[index]) for index in range(self.start, self.end)]
+
+
+class CompactRecipe:
+    # Read only view with the same attributes as Recipe
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.store.recipesName[self.index]
+
+    @property
+    def ingredients(self) -> CompactItems:
+        return CompactItems(self.store.itemsName, self.store.ingredientsItemId, self.store.ingredientsCount,
+                            self.store.ingredientsOffset[self.index], self.store.ingredientsOffset[self.index+1])
+
+    @property
+    def time(self) -> float:
+        return self.store.times[self.index]
+
+    @property
+    def results(self) -> CompactItems:
+        return CompactItems(self.store.itemsName, self.store.resultsItemId, self.store.resultsCount,
+                            self.store.resultsOffset[self.index], self.store.resultsOffset[self.index+1])
+
+    @property
+    def category(self) -> str:
+        return self.store.categories[self.index]
+
+    def __repr__(self) -> str:
+        return "CompactRecipe(name={!r}, ingredients={!r}, time={!r}, results={!r}, category={!r})".format(
+            self.name, dict(self.ingredients.items()), self.time, dict(self.results.items()), self.category)
+
+
+class CompactRecipes(collections.abc.Mapping):
+    # Read only recipes by name, item names interned to ids and ingredients and results of all recipes stored in shared
+    # buffers, those of the recipe i are at offsets [i, i+1[ (CSR layout, buffers can be wrapped with numpy.frombuffer)
+    def __init__(self, recipes: RecipesByName):
+        self.itemsId = {}
+        self.itemsName = []
+        self.recipesIndex = {}
+        self.recipesName = []
+        self.categories = []
+        self.times = array.array("d")
+        self.ingredientsOffset = array.array("q", [0])
+        self.ingredientsItemId = array.array("l")
+        self.ingredientsCount = array.array("d")
+        self.resultsOffset = array.array("q", [0])
+        self.resultsItemId = array.array("l")
+        self.resultsCount = array.array("d")
+        for recipe in recipes.values():
+            self.recipesIndex[recipe.name] = len(self.recipesName)
+            self.recipesName.append(sys.intern(recipe.name))
+            self.categories.append(sys.intern(recipe.category))
+            self.times.append(recipe.time)
+            for ingredientName, ingredientCount in recipe.ingredients.items():
+                self.ingredientsItemId.append(self.itemId(ingredientName))
+                self.ingredientsCount.append(ingredientCount)
+            self.ingredientsOffset.append(len(self.ingredientsItemId))
+            for resultName, resultCount in recipe.results.items():
+                self.resultsItemId.append(self.itemId(resultName))
+                self.resultsCount.append(resultCount)
+            self.resultsOffset.append(len(self.resultsItemId))
+        # Views created once so a recipe is always the same object, as with RecipesByName
+        self.views = [CompactRecipe(self, index) for index in range(len(self.recipesName))]
+
+    def itemId(self, itemName: str) -> int:
+        if itemName not in self.itemsId:
+            self.itemsId[itemName] = len(self.itemsName)
+            self.itemsName.append(sys.intern(itemName))
+        return self.itemsId[itemName]
+
+    def __getitem__(self, recipeName: str) -> CompactRecipe:
+        return self.views[self.recipesIndex[recipeName]]
+
+    def __iter__(self):
+        return iter(self.recipesName)
+
+    def __len__(self) -> int:
+        return len(self.recipesName)
+
+
+def compactCraftingFactories(craftingFactoriesByName: CraftingFactoriesByName) -> CraftingFactoriesByName:
+    # Share name, consumption type and categories strings with the compact recipes ones
+    return {sys.intern(factoryName): CraftingFactory(sys.intern(factory.name), sys.intern(factory.consumptionType), factory.consumptionQuantity,
+                                                     factory.speed, tuple(sys.intern(category) for category in factory.categories), factory.moduleSlots)
+            for factoryName, factory in craftingFactoriesByName.items()}
+
+
+# Header of packed recipes files: magic, version, recipes, items, categories, ingredients and results count, strings size
+PACKED_RECIPES_HEADER = struct.Struct("=4sIQQQQQQ")
+PACKED_RECIPES_MAGIC = b"FRDR"
+PACKED_RECIPES_VERSION = 1
+
+
+def fromPackedNumber(value: float):
+    # Counts and times are stored as double, integers are given back as in json files
+    return int(value) if value.is_integer() else value
+
+
+class PackedRecipes(collections.abc.MutableMapping):
+    # Recipes by name over a memory mapped packed recipes file (CompactRecipes buffers written after the names),
+    # a Recipe is only built on first access, removed and added recipes are kept aside from the file
+    def __init__(self, packedFilePath: string):
+        with open(packedFilePath, 'rb') as packedFile:
+            self.mappedFile = mmap.mmap(packedFile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, recipesCount, itemsCount, categoriesCount, ingredientsCount, resultsCount, stringsSize = PACKED_RECIPES_HEADER.unpack_from(self.mappedFile)
+        if magic != PACKED_RECIPES_MAGIC or version != PACKED_RECIPES_VERSION:
+            raise ValueError("{} is not a packed recipes file version {} of this byte order".format(packedFilePath, PACKED_RECIPES_VERSION))
+        offset = PACKED_RECIPES_HEADER.size
+        strings = [sys.intern(name) for name in self.mappedFile[offset:offset+stringsSize].decode("utf8").split("\0")] if stringsSize > 0 else []
+        self.recipesName = strings[:recipesCount]
+        self.itemsName = strings[recipesCount:recipesCount+itemsCount]
+        self.categoriesName = strings[recipesCount+itemsCount:]
+        offset += stringsSize + (-stringsSize % 8)
+        buffer = memoryview(self.mappedFile)
+        def nextArray(arrayFormat: str, length: int) -> memoryview:
+            nonlocal offset
+            view = buffer[offset:offset+8*length].cast(arrayFormat)
+            offset += 8*length
+            return view
+        self.times = nextArray("d", recipesCount)
+        self.categoriesId = nextArray("q", recipesCount)
+        self.ingredientsOffset = nextArray("q", recipesCount+1)
+        self.ingredientsItemId = nextArray("q", ingredientsCount)
+        self.ingredientsCount = nextArray("d", ingredientsCount)
+        self.resultsOffset = nextArray("q", recipesCount+1)
+        self.resultsItemId = nextArray("q", resultsCount)
+        self.resultsCount = nextArray("d", resultsCount)
+        self.recipesIndex = {recipeName: index for index, recipeName in enumerate(self.recipesName)}
+        self.recipes = {}
+        self.removed = set()
+        self.added = {}
+
+    def readRecipe(self, index: int) -> Recipe:
+        ingredients = {self.itemsName[self.ingredientsItemId[itemIndex]]: fromPackedNumber(self.ingredientsCount[itemIndex])
+                       for itemIndex in range(self.ingredientsOffset[index], self.ingredientsOffset[index+1])}
+        results = {self.itemsName[self.resultsItemId[itemIndex]]: fromPackedNumber(self.resultsCount[itemIndex])
+                   for itemIndex in range(self.resultsOffset[index], self.resultsOffset[index+1])}
+        return Recipe(self.recipesName[index], ingredients, fromPackedNumber(self.times[index]), results, self.categoriesName[self.categoriesId[index]])
+
+    def __getitem__(self, recipeName: str) -> Recipe:
+        if recipeName in self.added:
+            return self.added[recipeName]
+        if recipeName in self.removed or recipeName not in self.recipesIndex:
+            raise KeyError(recipeName)
+        if recipeName not in self.recipes:
+            self.recipes[recipeName] = self.readRecipe(self.recipesIndex[recipeName])
+        return self.recipes[recipeName]
+
+    def __setitem__(self, recipeName: str, recipe: Recipe):
+        if recipeName in self.recipesIndex and recipeName not in self.removed:
+            self.recipes[recipeName] = recipe
+        else:
+            self.added[recipeName] = recipe
+
+    def __delitem__(self, recipeName: str):
+        if recipeName in self.added:
+            del self.added[recipeName]
+        elif recipeName in self.recipesIndex and recipeName not in self.removed:
+            self.removed.add(recipeName)
+            self.recipes.pop(recipeName, None)
+        else:
+            raise KeyError(recipeName)
+
+    def __iter__(self):
+        yield from (recipeName for recipeName in self.recipesName if recipeName not in self.removed)
+        yield from self.added.keys()
+
+    def __len__(self) -> int:
+        return len(self.recipesName) - len(self.removed) + len(self.added)
+
+    def __reduce__(self):
+        # The mapped file can't be sent to other processes, they receive a dict
+        return (dict, (list(self.items()),))
+
+
+class RecipeGraph:
+    # Recipes indexed by items, built once after loading then updated locally by each filter
+    def __init__(self, recipes: RecipesByName):
+        self.recipes = recipes
+        # Items interned in first seen order, with for each item id the recipes producing and consuming it
+        self.itemsId = {}
+        self.itemsName = []
+        self.producers = []
+        self.consumers = []
+        for recipe in recipes.values():
+            self.indexRecipe(recipe)
+
+    def itemId(self, itemName: str) -> int:
+        if itemName not in self.itemsId:
+            self.itemsId[itemName] = len(self.itemsName)
+            self.itemsName.append(itemName)
+            # dict used as ordered set, in recipes order
+            self.producers.append({})
+            self.consumers.append({})
+        return self.itemsId[itemName]
+
+    def indexRecipe(self, recipe: Recipe):
+        for ingredientName in recipe.ingredients.keys():
+            self.consumers[self.itemId(ingredientName)][recipe.name] = None
+        for resultName in recipe.results.keys():
+            self.producers[self.itemId(resultName)][recipe.name] = None
+
+    def removeRecipe(self, recipeName: str):
+        recipe = self.recipes.pop(recipeName)
+        for ingredientName in recipe.ingredients.keys():
+            del self.consumers[self.itemsId[ingredientName]][recipeName]
+        for resultName in recipe.results.keys():
+            del self.producers[self.itemsId[resultName]][recipeName]
+
+    def removeIngredient(self, recipeName: str, ingredientName: str):
+        del self.recipes[recipeName].ingredients[ingredientName]
+        del self.consumers[self.itemsId[ingredientName]][recipeName]
+
+    def removeResult(self, recipeName: str, resultName: str):
+        del self.recipes[recipeName].results[resultName]
+        del self.producers[self.itemsId[resultName]][recipeName]
+
+    def inDegree(self, itemName: str) -> int:
+        # Count of recipes producing this item
+        if itemName not in self.itemsId:
+            return 0
+        return len(self.producers[self.itemsId[itemName]])
+
+    def outDegree(self, itemName: str) -> int:
+        # Count of recipes consuming this item
+        if itemName not in self.itemsId:
+            return 0
+        return len(self.consumers[self.itemsId[itemName]])
+
+    def producingRecipes(self, itemName: str) -> list[Recipe]:
+        if itemName not in self.itemsId:
+            return []
+        return [self.recipes[recipeName] for recipeName in self.producers[self.itemsId[itemName]]]
+
+    def consumingRecipes(self, itemName: str) -> list[Recipe]:
+        if itemName not in self.itemsId:
+            return []
+        return [self.recipes[recipeName] for recipeName in self.consumers[self.itemsId[itemName]]]
+
+    def items(self) -> list[str]:
+        # Items still used by at least one recipe, in first seen order
+        return [itemName for itemId, itemName in enumerate(self.itemsName) if len(self.producers[itemId])>0 or len(self.consumers[itemId])>0]
+
+
+def recipesRemoveItem(recipeGraph: RecipeGraph, itemsToRemove):
+    recipesToDelete = set()
+    for itemName in itemsToRemove:
+        for recipe in recipeGraph.consumingRecipes(itemName):
+            recipeGraph.removeIngredient(recipe.name, itemName)
+            recipesToDelete.add(recipe.name)
+        for recipe in recipeGraph.producingRecipes(itemName):
+            recipeGraph.removeResult(recipe.name, itemName)
+            recipesToDelete.add(recipe.name)
     for recipeName in recipesToDelete:
-        del recipes[recipeName]
+        if len(recipeGraph.recipes[recipeName].ingredients)==0 or len(recipeGraph.recipes[recipeName].results)==0:
+            recipeGraph.removeRecipe(recipeName)
 
 
-def writeRecipesJsonFile(recipes: RecipesByName, filePath: string):
+def recipes2JsonData(recipes: RecipesByName) -> dict:
     jsonData = {}
     for recipeName, recipe in recipes.items():
-        jsonData[recipeName] = {"ingredients": recipe.ingredients, "time": recipe.time, "results": recipe.results, "category": recipe.category}
-    with open(filePath, 'w') as jsonFile:
-        json.dump(jsonData, jsonFile, ensure_ascii=False, indent=3)
+        jsonData[recipeName] = {"ingredients": dict(recipe.ingredients.items()), "time": recipe.time, "results": dict(recipe.results.items()), "category": recipe.category}
+    return jsonData
 
 
-def ingredientsByUsage(recipes: RecipesByName) -> dict:
+def writeRecipesJsonFile(recipes: RecipesByName, filePath: string):
+    # Always written by json, orjson can't indent by 3 spaces
+    with open(filePath, 'w') as jsonFile:
+        json.dump(recipes2JsonData(recipes), jsonFile, ensure_ascii=False, indent=3)
+
+
+def writeRecipesMsgpackFile(recipes: RecipesByName, filePath: string):
+    import msgpack
+    with open(filePath, 'wb') as msgpackFile:
+        msgpackFile.write(msgpack.packb(recipes2JsonData(recipes)))
+
+
+def writeRecipesPackedFile(recipes: RecipesByName, filePath: string):
+    # Names then CompactRecipes buffers with 64 bits values, read by PackedRecipes
+    compactRecipes = CompactRecipes(recipes)
+    categoriesId = {}
+    for category in compactRecipes.categories:
+        if category not in categoriesId:
+            categoriesId[category] = len(categoriesId)
+    strings = "\0".join(compactRecipes.recipesName + compactRecipes.itemsName + list(categoriesId.keys())).encode("utf8")
+    with open(filePath, 'wb') as packedFile:
+        packedFile.write(PACKED_RECIPES_HEADER.pack(PACKED_RECIPES_MAGIC, PACKED_RECIPES_VERSION, len(compactRecipes.recipesName), len(compactRecipes.itemsName),
+                                                    len(categoriesId), len(compactRecipes.ingredientsItemId), len(compactRecipes.resultsItemId), len(strings)))
+        packedFile.write(strings + bytes(-len(strings) % 8))
+        for values in [compactRecipes.times, array.array("q", [categoriesId[category] for category in compactRecipes.categories]),
+                       compactRecipes.ingredientsOffset, array.array("q", compactRecipes.ingredientsItemId), compactRecipes.ingredientsCount,
+                       compactRecipes.resultsOffset, array.array("q", compactRecipes.resultsItemId), compactRecipes.resultsCount]:
+            packedFile.write(values.tobytes())
+
+
+def writeRecipesFile(recipes: RecipesByName, filePath: string):
+    # Format chosen by file extension like loadRecipes
+    extension = os.path.splitext(filePath)[1]
+    if extension == ".msgpack":
+        writeRecipesMsgpackFile(recipes, filePath)
+    elif extension == ".recipes":
+        writeRecipesPackedFile(recipes, filePath)
+    else:
+        writeRecipesJsonFile(recipes, filePath)
+
+
+def ingredientsByUsage(recipeGraph: RecipeGraph) -> dict:
     usage = {}
-    for recipe in recipes.values():
+    for recipe in recipeGraph.recipes.values():
         for ingredientName in recipe.ingredients.keys():
             if ingredientName not in usage:
-                usage[ingredientName] = []
-            for result in recipe.results.keys():
-                usage[ingredientName].append(result)
+                usage[ingredientName] = [resultName for consumingRecipe in recipeGraph.consumingRecipes(ingredientName) for resultName in consumingRecipe.results.keys()]
     return dict(sorted(usage.items(), key=lambda item: len(item[1]), reverse=True))
 
 
-def removeLeafe(recipes: RecipesByName):
-    itemUsedAsIngredient = set()
-    for recipe in recipes.values():
-        for ingredientName in recipe.ingredients.keys():
-            itemUsedAsIngredient.add(ingredientName)
-    for recipeName in list(recipes.keys()):
-        for resultName in list(recipes[recipeName].results.keys()):
-            if resultName not in itemUsedAsIngredient:
-                del recipes[recipeName].results[resultName]
-        if len(recipes[recipeName].results) == 0:
-            del recipes[recipeName]
-
-
-def keepOnlyLeafe(recipes: RecipesByName):
-    itemUsedAsIngredient = set()
-    for recipe in recipes.values():
-        for ingredientName in recipe.ingredients.keys():
-            itemUsedAsIngredient.add(ingredientName)
-    for recipeName in list(recipes.keys()):
-        if len(set(recipes[recipeName].results.keys()).difference(itemUsedAsIngredient))==0:
-            del recipes[recipeName]
-
-
-def itemPngPath(itemName: string, factoriopath: string, itemPngRenames: dict[str,str]) -> string:
+def removeLeafe(recipeGraph: RecipeGraph):
+    leafes = [itemName for itemName in recipeGraph.items() if recipeGraph.outDegree(itemName)==0]
+    for leafeName in leafes:
+        for recipe in recipeGraph.producingRecipes(leafeName):
+            recipeGraph.removeResult(recipe.name, leafeName)
+            if len(recipe.results) == 0:
+                recipeGraph.removeRecipe(recipe.name)
+
+
+def keepOnlyLeafe(recipeGraph: RecipeGraph):
+    recipesToRemove = [recipe.name for recipe in recipeGraph.recipes.values() if all(recipeGraph.outDegree(resultName)>0 for resultName in recipe.results.keys())]
+    for recipeName in recipesToRemove:
+        recipeGraph.removeRecipe(recipeName)
+
+
+def keepItemsSubgraph(recipeGraph: RecipeGraph, itemsNames: list[str], upstreamDepth: int=-1, downstreamDepth: int=0):
+    # Keep recipes producing the items up to upstreamDepth recipes away, and consuming them up to downstreamDepth, negative depth for no limit
+    # Items missing from these recipes are skipped, so the same items list can be used on every group file
+    if upstreamDepth == 0 and downstreamDepth == 0:
+        raise ValueError("Upstream and downstream depths of items {} are both 0, no recipe would be kept".format(", ".join(itemsNames)))
+    missingItemsNames = [itemName for itemName in itemsNames if recipeGraph.inDegree(itemName) == 0 and recipeGraph.outDegree(itemName) == 0]
+    if len(missingItemsNames) == len(itemsNames):
+        raise ValueError("Items {} not found in recipes".format(", ".join(itemsNames)))
+    if len(missingItemsNames) > 0:
+        print("Warning: items [{}] not found in recipes".format(", ".join(missingItemsNames)))
+        itemsNames = [itemName for itemName in itemsNames if itemName not in missingItemsNames]
+    recipesToKeep = set()
+    for depth, nextRecipes, nextItems in [(upstreamDepth, recipeGraph.producingRecipes, lambda recipe: recipe.ingredients.keys()),
+                                          (downstreamDepth, recipeGraph.consumingRecipes, lambda recipe: recipe.results.keys())]:
+        # Breadth first search by hop, each item is expanded once at its smallest distance
+        visited = set(itemsNames)
+        toVisit = list(visited)
+        hop = 0
+        while len(toVisit) > 0 and hop != depth:
+            nextToVisit = []
+            for itemName in toVisit:
+                for recipe in nextRecipes(itemName):
+                    recipesToKeep.add(recipe.name)
+                    for nextItemName in nextItems(recipe):
+                        if nextItemName not in visited:
+                            visited.add(nextItemName)
+                            nextToVisit.append(nextItemName)
+            toVisit = nextToVisit
+            hop += 1
+    for recipeName in [recipeName for recipeName in recipeGraph.recipes.keys() if recipeName not in recipesToKeep]:
+        recipeGraph.removeRecipe(recipeName)
+
+
+def itemPngPath(itemName: string, factoriopath: string, itemPngRenames: dict[str,str], itemsIconPath: dict[str,str]={}) -> string:
+    if itemName in itemsIconPath and os.path.exists(itemsIconPath[itemName]):
+        return itemsIconPath[itemName]
     if itemName in itemPngRenames:
         itemName = itemPngRenames[itemName]
     filePathes = [os.path.join(factoriopath, "data", "base", "graphics", "icons", itemName+".png"),
@@ -247,86 +916,384 @@ def itemPngPath(itemName: string, factoriopath: string, itemPngRenames: dict[str
     raise FileNotFoundError("PNG file for \"{}\" not found in factorio path \"{}\"".format(itemName, factoriopath))
 
 
-def itemPngCopy(itemName: string, factoriopath:string, dstFolderPath: string, itemPngRenames: dict[str,str]):
-    imgSrc = Image.open(itemPngPath(itemName, factoriopath, itemPngRenames))
-    imgdst = imgSrc.crop((64, 0, 64+32, 32)) # left, upper, right, and lower 
+def itemPngCrop(itemName: string, factoriopath:string, itemPngRenames: dict[str,str], itemsIconPath: dict[str,str]={}) -> Image.Image:
+    imgSrc = Image.open(itemPngPath(itemName, factoriopath, itemPngRenames, itemsIconPath))
+    return imgSrc.crop((64, 0, 64+32, 32)) # left, upper, right, and lower 
+
+
+def itemPngCopy(itemName: string, factoriopath:string, dstFolderPath: string, itemPngRenames: dict[str,str], itemsIconPath: dict[str,str]={}):
+    imgdst = itemPngCrop(itemName, factoriopath, itemPngRenames, itemsIconPath)
     imgdst.save(os.path.join(dstFolderPath, itemName+".png"))
 
 
-def itemsPngCopy(recipes: RecipesByName, factoriopath:string, dstFolderPath: string, itemPngRenames: dict[str,str]):
-    itemsName = set()
-    for recipe in recipes.values():
-        for ingredientName in recipe.ingredients.keys():
-            if ingredientName not in itemsName:
-                itemPngCopy(ingredientName, factoriopath, dstFolderPath, itemPngRenames)
-                itemsName.add(ingredientName)
-        for resultName in recipe.results.keys():
-            if resultName not in itemsName:
-                itemPngCopy(resultName, factoriopath, dstFolderPath, itemPngRenames)
-                itemsName.add(resultName)
-
-
-def ingredientsByUsage2Html(ingredientsByUsage: dict, htmlFilePath: string, itemsPngCopyFolderPath: string):
-    doc, tag, text = yattag.Doc().tagtext()
-    with tag('html'):
-        with tag("head"):
-            with tag("style"):
-                text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
-        with tag('body'):
-            with tag('table'):
-                with tag('tr'):
-                    with tag('th'):
-                        text("name")
-                    with tag('th'):
-                        text("icon")
-                    with tag('th'):
-                        text("count")
-                    with tag('th'):
-                        text("used by")
-                for ingredientName, resultList in ingredientsByUsage.items():
+def fileSha256(filePath: string) -> str:
+    with open(filePath, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def itemsPngCopy(recipeGraph: RecipeGraph, factoriopath:string, dstFolderPath: string, itemPngRenames: dict[str,str], itemsIconPath: dict[str,str]={}, jobs:int=1) -> tuple[int, int]:
+    itemsName = recipeGraph.items()
+    # Manifest of the source png path and hash used for each item png already generated
+    manifestFilePath = os.path.join(dstFolderPath, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifestFilePath):
+        with open(manifestFilePath, 'r') as manifestFile:
+            manifest = json.load(manifestFile)
+    # Skip items png generated from the same source path when newer than its source or with the same source content,
+    # a png generated from another source (renames changed) is always generated again
+    itemsNameToCopy = []
+    skippedCount = 0
+    for itemName in itemsName:
+        srcFilePath = itemPngPath(itemName, factoriopath, itemPngRenames, itemsIconPath)
+        dstFilePath = os.path.join(dstFolderPath, itemName+".png")
+        itemManifest = manifest.get(itemName)
+        if os.path.exists(dstFilePath) and isinstance(itemManifest, dict) and itemManifest["source"] == srcFilePath:
+            if os.path.getmtime(dstFilePath) >= os.path.getmtime(srcFilePath):
+                skippedCount += 1
+                continue
+            if itemManifest["sha256"] == fileSha256(srcFilePath):
+                skippedCount += 1
+                continue
+        itemsNameToCopy.append(itemName)
+    if jobs <= 1:
+        for itemName in itemsNameToCopy:
+            itemPngCopy(itemName, factoriopath, dstFolderPath, itemPngRenames, itemsIconPath)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(itemPngCopy, itemName, factoriopath, dstFolderPath, itemPngRenames, itemsIconPath) for itemName in itemsNameToCopy]
+            for future in futures:
+                future.result()
+    for itemName in itemsNameToCopy:
+        srcFilePath = itemPngPath(itemName, factoriopath, itemPngRenames, itemsIconPath)
+        manifest[itemName] = {"source": srcFilePath, "sha256": fileSha256(srcFilePath)}
+    with open(manifestFilePath, 'w') as manifestFile:
+        json.dump(manifest, manifestFile, indent=3, sort_keys=True)
+    return len(itemsNameToCopy), skippedCount
+
+
+def itemsSpriteSheet(recipeGraph: RecipeGraph, factoriopath:string, spriteSheetFilePath: string, itemPngRenames: dict[str,str], itemsIconPath: dict[str,str]={}) -> int:
+    itemsName = recipeGraph.items()
+    # All 32x32 item png in a square grid
+    columnCount = max(1, math.ceil(math.sqrt(len(itemsName))))
+    rowCount = max(1, math.ceil(len(itemsName) / columnCount))
+    spriteSheet = Image.new("RGBA", (columnCount*32, rowCount*32))
+    spritesPosition = {}
+    for index, itemName in enumerate(itemsName):
+        spritesPosition[itemName] = ((index % columnCount) * 32, (index // columnCount) * 32)
+        spriteSheet.paste(itemPngCrop(itemName, factoriopath, itemPngRenames, itemsIconPath), spritesPosition[itemName])
+    spriteSheet.save(spriteSheetFilePath)
+    # Json index and css class by item, next to the png
+    spriteSheetFileName = os.path.basename(spriteSheetFilePath)
+    spriteSheetPathWithoutExt = os.path.splitext(spriteSheetFilePath)[0]
+    with open(spriteSheetPathWithoutExt+".json", 'w') as jsonFile:
+        json.dump({"image": spriteSheetFileName, "size": 32, "sprites": spritesPosition}, jsonFile, indent=3)
+    with open(spriteSheetPathWithoutExt+".css", 'w') as cssFile:
+        cssFile.write(".sprite {{display: inline-block; width: 32px; height: 32px; background-image: url({});}}\n".format(spriteSheetFileName))
+        for itemName, (x, y) in spritesPosition.items():
+            cssFile.write(".sprite-{} {{background-position: -{}px -{}px;}}\n".format(itemName, x, y))
+    return len(itemsName)
+
+
+class HtmlStreamDoc:
+    # Same interface than yattag.Doc but write each tag to the file as soon as possible,
+    # to not keep the whole page in memory
+    def __init__(self, htmlFile, indent: bool=True):
+        self.htmlFile = htmlFile
+        self.indent = indent
+        # For each opened tag: [has children tags, is inline because it contains text]
+        self.openedTags = [[False, False]]
+        self.isEmpty = True
+
+    def tagtext(self):
+        return self, self.tag, self.text
+
+    def newLine(self):
+        # Like yattag.indent, children of a tag are on separate lines unless the tag contains text
+        if self.indent and not self.isEmpty and not self.openedTags[-1][1]:
+            self.htmlFile.write("\n" + "  " * (len(self.openedTags)-1))
+        self.isEmpty = False
+
+    def attributes(self, attrs: tuple, kwargs: dict) -> str:
+        attributesList = list(attrs) + [("class" if key == "klass" else key, value) for key, value in kwargs.items()]
+        return "".join(' {}="{}"'.format(key, html.escape(str(value))) for key, value in attributesList)
+
+    @contextlib.contextmanager
+    def tag(self, tagName: str, *attrs, **kwargs):
+        self.openedTags[-1][0] = True
+        self.newLine()
+        self.htmlFile.write("<{}{}>".format(tagName, self.attributes(attrs, kwargs)))
+        self.openedTags.append([False, self.openedTags[-1][1]])
+        yield
+        hasChildTags, isInline = self.openedTags.pop()
+        if self.indent and hasChildTags and not isInline:
+            self.htmlFile.write("\n" + "  " * (len(self.openedTags)-1))
+        self.htmlFile.write("</{}>".format(tagName))
+
+    def stag(self, tagName: str, *attrs, **kwargs):
+        self.openedTags[-1][0] = True
+        self.newLine()
+        self.htmlFile.write("<{}{} />".format(tagName, self.attributes(attrs, kwargs)))
+
+    def line(self, tagName: str, textContent: str, *attrs, **kwargs):
+        with self.tag(tagName, *attrs, **kwargs):
+            self.text(textContent)
+
+    def text(self, *strings):
+        for string in strings:
+            if str(string) != "":
+                self.openedTags[-1][1] = True
+            self.htmlFile.write(html.escape(str(string), quote=False))
+
+    def asis(self, *strings):
+        for string in strings:
+            self.htmlFile.write(string)
+
+
+def itemIconHtml(doc: "HtmlStreamDoc", itemName: string, itemsPngCopyFolderPath: string, spriteSheetCssPath: string=None):
+    if spriteSheetCssPath:
+        doc.line("span", "", klass="sprite sprite-"+itemName, title=itemName)
+    else:
+        doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, itemName+".png"), alt=itemName, title=itemName)
+
+
+def ingredientsByUsage2Html(ingredientsByUsage: dict, htmlFilePath: string, itemsPngCopyFolderPath: string, spriteSheetCssPath: string=None):
+    with open(htmlFilePath, "w", encoding="utf8") as htmlFile:
+        doc, tag, text = HtmlStreamDoc(htmlFile, htmlIndent).tagtext()
+        with tag('html'):
+            with tag("head"):
+                if spriteSheetCssPath:
+                    doc.stag("link", rel="stylesheet", href=spriteSheetCssPath)
+                with tag("style"):
+                    text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
+            with tag('body'):
+                with tag('table'):
                     with tag('tr'):
-                        with tag('td'):
-                            text(ingredientName)
-                        with tag('td'):
-                            doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, ingredientName+".png"), alt=ingredientName, title=ingredientName)
-                        with tag('td'):
-                            text(len(resultList))
+                        with tag('th'):
+                            text("name")
+                        with tag('th'):
+                            text("icon")
+                        with tag('th'):
+                            text("count")
+                        with tag('th'):
+                            text("used by")
+                    for ingredientName, resultList in ingredientsByUsage.items():
+                        with tag('tr'):
                             with tag('td'):
-                                for resultName in resultList:
-                                    doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, resultName+".png"), alt=resultName, title=resultName)
-
-    html = yattag.indent(doc.getvalue())
-    with open(htmlFilePath, "wb") as htmlFile:
-        htmlFile.write(bytes(html, "utf8"))
+                                text(ingredientName)
+                            with tag('td'):
+                                itemIconHtml(doc, ingredientName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                            with tag('td'):
+                                text(len(resultList))
+                                with tag('td'):
+                                    for resultName in resultList:
+                                        itemIconHtml(doc, resultName, itemsPngCopyFolderPath, spriteSheetCssPath)
 
 
-def generateDot(recipes: RecipesByName, dotFilePath: string, itemsPngCopyFolderPath: string):
+def generateDot(recipeGraph: RecipeGraph, dotFilePath: string, itemsPngCopyFolderPath: string):
     def convertItemName(name:str):
         return name.replace("-", "_").replace(" ", "_ ")
     def generateNode(ingredientName:str) -> str:
         return '   {0} [shape=none, label="", image="{1}.png"];\n'.format(convertItemName(ingredientName), os.path.join(itemsPngCopyFolderPath, ingredientName))
     with open(dotFilePath, "w") as dotFile:
         dotFile.write("digraph {\n")
-        itemsName = set()
         # Write Node
-        for recipe in recipes.values():
-            for ingredientName in recipe.ingredients.keys():
-                if ingredientName not in itemsName:
-                    dotFile.write(generateNode(ingredientName))
-                    itemsName.add(ingredientName)
-            for resultName in recipe.results.keys():
-                if resultName not in itemsName:
-                    dotFile.write(generateNode(resultName))
-                    itemsName.add(resultName)
+        for itemName in recipeGraph.items():
+            dotFile.write(generateNode(itemName))
         dotFile.write("\n")
         # Write edge 
-        for recipe in recipes.values():
+        for recipe in recipeGraph.recipes.values():
             for resultName in recipe.results.keys():
                 ingredients = ', '.join(convertItemName(ingredientName) for ingredientName in recipe.ingredients.keys())
                 dotFile.write("   {{{}}} -> {}\n".format(ingredients, convertItemName(resultName)))
         dotFile.write("}\n")
 
 
+def layeredLayout(nodes: list[str], edges: list[tuple[str, str]], sweeps: int=8, maxSpan: int=8) -> tuple[list[list[int]], list[list[int]]]:
+    # Sugiyama style layered layout: break cycles, assign layers by longest path, split edges up to maxSpan layers long
+    # with dummy nodes and reduce crossings with barycenter sweeps. Return layers of nodes indexes ordered from left to
+    # right, indexes after nodes ones are dummy nodes, and the path of nodes indexes of each edge
+    nodeIndex = {node: index for index, node in enumerate(nodes)}
+    edgesIndexes = list(dict.fromkeys((nodeIndex[source], nodeIndex[target]) for source, target in edges if source != target))
+    successors = [[] for _ in nodes]
+    for source, target in edgesIndexes:
+        successors[source].append(target)
+    # Edges going back to a node being visited by a depth first search close a cycle, they are reversed
+    NOT_VISITED, VISITING, VISITED = 0, 1, 2
+    states = [NOT_VISITED] * len(nodes)
+    backEdges = set()
+    for root in range(len(nodes)):
+        if states[root] != NOT_VISITED:
+            continue
+        states[root] = VISITING
+        stack = [(root, iter(successors[root]))]
+        while len(stack) > 0:
+            node, successorsIterator = stack[-1]
+            for successor in successorsIterator:
+                if states[successor] == VISITING:
+                    backEdges.add((node, successor))
+                elif states[successor] == NOT_VISITED:
+                    states[successor] = VISITING
+                    stack.append((successor, iter(successors[successor])))
+                    break
+            else:
+                states[node] = VISITED
+                stack.pop()
+    dagEdges = [(target, source) if (source, target) in backEdges else (source, target) for source, target in edgesIndexes]
+    # Longest path layering in topological order
+    dagSuccessors = [[] for _ in nodes]
+    inDegrees = [0] * len(nodes)
+    for source, target in dagEdges:
+        dagSuccessors[source].append(target)
+        inDegrees[target] += 1
+    nodesLayer = [0] * len(nodes)
+    sources = [node for node in range(len(nodes)) if inDegrees[node] == 0]
+    toVisit = list(sources)
+    while len(toVisit) > 0:
+        node = toVisit.pop()
+        for successor in dagSuccessors[node]:
+            nodesLayer[successor] = max(nodesLayer[successor], nodesLayer[node] + 1)
+            inDegrees[successor] -= 1
+            if inDegrees[successor] == 0:
+                toVisit.append(successor)
+    # Sources are moved just above their nearest successor, instead of all being on the first layer
+    for node in sources:
+        if len(dagSuccessors[node]) > 0:
+            nodesLayer[node] = min(nodesLayer[successor] for successor in dagSuccessors[node]) - 1
+    # Dummy nodes on each layer crossed by an edge, so its segments join 2 consecutive layers. Longer edges are drawn
+    # straight without taking part in crossing reduction, to bound dummy nodes count on dense graphs
+    paths = []
+    for (source, target), (dagSource, dagTarget) in zip(edgesIndexes, dagEdges):
+        path = [dagSource]
+        if nodesLayer[dagTarget] - nodesLayer[dagSource] <= maxSpan:
+            for layer in range(nodesLayer[dagSource] + 1, nodesLayer[dagTarget]):
+                path.append(len(nodesLayer))
+                nodesLayer.append(layer)
+        path.append(dagTarget)
+        paths.append(path if dagSource == source else path[::-1])
+    upperNeighbors = [[] for _ in nodesLayer]
+    lowerNeighbors = [[] for _ in nodesLayer]
+    for path in paths:
+        for node1, node2 in zip(path, path[1:]):
+            if abs(nodesLayer[node1] - nodesLayer[node2]) != 1:
+                continue
+            upper, lower = (node1, node2) if nodesLayer[node1] < nodesLayer[node2] else (node2, node1)
+            upperNeighbors[lower].append(upper)
+            lowerNeighbors[upper].append(lower)
+    layers = [[] for _ in range(max(nodesLayer, default=-1) + 1)]
+    for node, layer in enumerate(nodesLayer):
+        layers[layer].append(node)
+    # Alternate down and up sweeps ordering each layer by the mean position of its neighbors in the previous one
+    positions = [0] * len(nodesLayer)
+    def updatePositions(layer: list[int]):
+        for position, node in enumerate(layer):
+            positions[node] = position
+    for layer in layers:
+        updatePositions(layer)
+    def barycenter(node: int, neighbors: list[list[int]]) -> float:
+        if len(neighbors[node]) == 0:
+            return positions[node]
+        return sum(positions[neighbor] for neighbor in neighbors[node]) / len(neighbors[node])
+    bestLayers = [list(layer) for layer in layers]
+    bestCrossings = countLayersCrossings(layers, lowerNeighbors, positions)
+    for sweep in range(sweeps):
+        if sweep % 2 == 0:
+            layersIndexes, neighbors = range(1, len(layers)), upperNeighbors
+        else:
+            layersIndexes, neighbors = range(len(layers) - 2, -1, -1), lowerNeighbors
+        for layerIndex in layersIndexes:
+            layers[layerIndex].sort(key=lambda node: barycenter(node, neighbors))
+            updatePositions(layers[layerIndex])
+        crossings = countLayersCrossings(layers, lowerNeighbors, positions)
+        if crossings < bestCrossings:
+            bestLayers = [list(layer) for layer in layers]
+            bestCrossings = crossings
+    return bestLayers, paths
+
+
+def countLayersCrossings(layers: list[list[int]], lowerNeighbors: list[list[int]], positions: list[int]) -> int:
+    # Segments between 2 layers cross when their lower ends are in reverse order of their upper ends,
+    # count these inversions with a binary indexed tree
+    crossings = 0
+    for upperLayer, lowerLayer in zip(layers, layers[1:]):
+        segments = sorted((positions[upper], positions[lower]) for upper in upperLayer for lower in lowerNeighbors[upper])
+        lowerPositions = [lowerPosition for upperPosition, lowerPosition in segments]
+        tree = [0] * (len(lowerLayer) + 1)
+        for count, lowerPosition in enumerate(lowerPositions):
+            # Count previous segments ending after this one
+            index = lowerPosition + 1
+            previousBefore = 0
+            while index > 0:
+                previousBefore += tree[index]
+                index -= index & -index
+            crossings += count - previousBefore
+            index = lowerPosition + 1
+            while index <= len(lowerLayer):
+                tree[index] += 1
+                index += index & -index
+    return crossings
+
+
+def writeLayeredSvg(nodes: list[str], edges: list[tuple[str, str]], svgFilePath: string, nodeWidth, nodeSvg, nodeHeight: int=32):
+    # Lay out the graph and write nodes with nodeSvg(doc, node, x, y, width, height) and edges as arrows from top to bottom
+    layers, paths = layeredLayout(nodes, edges)
+    DUMMY_WIDTH, SPACING_X, SPACING_Y, MARGIN = 4, 16, 48, 16
+    widths = [nodeWidth(node) for node in nodes]
+    layersWidth = [sum(widths[node] if node < len(nodes) else DUMMY_WIDTH for node in layer) + SPACING_X * max(len(layer) - 1, 0) for layer in layers]
+    svgWidth = max(layersWidth, default=0) + 2 * MARGIN
+    svgHeight = len(layers) * (nodeHeight + SPACING_Y) - SPACING_Y + 2 * MARGIN
+    # Center of each node, layers are centered
+    centers = {}
+    for layerIndex, layer in enumerate(layers):
+        x = MARGIN + (svgWidth - 2 * MARGIN - layersWidth[layerIndex]) / 2
+        y = MARGIN + layerIndex * (nodeHeight + SPACING_Y) + nodeHeight / 2
+        for node in layer:
+            width = widths[node] if node < len(nodes) else DUMMY_WIDTH
+            centers[node] = (x + width / 2, y)
+            x += width + SPACING_X
+    with open(svgFilePath, "w", encoding="utf8") as svgFile:
+        doc, tag, text = HtmlStreamDoc(svgFile, htmlIndent).tagtext()
+        with tag('svg', xmlns="http://www.w3.org/2000/svg", width=str(int(svgWidth)), height=str(max(int(svgHeight), 0)), viewBox="0 0 {} {}".format(int(svgWidth), max(int(svgHeight), 0))):
+            with tag('defs'):
+                with tag('marker', id="arrow", viewBox="0 0 10 10", refX="10", refY="5", markerWidth="6", markerHeight="6", orient="auto"):
+                    doc.stag('path', d="M 0 0 L 10 5 L 0 10 z")
+            with tag('g', stroke="black", fill="none"):
+                for path in paths:
+                    points = [centers[node] for node in path]
+                    # Arrows start and end on the node border, above or below its center
+                    direction = 1 if points[-1][1] > points[0][1] else -1
+                    points[0] = (points[0][0], points[0][1] + direction * nodeHeight / 2)
+                    points[-1] = (points[-1][0], points[-1][1] - direction * nodeHeight / 2)
+                    doc.stag('polyline', ("marker-end", "url(#arrow)"), points=" ".join("{:.1f},{:.1f}".format(x, y) for x, y in points))
+            for index, node in enumerate(nodes):
+                x, y = centers[index]
+                nodeSvg(doc, node, x - widths[index] / 2, y - nodeHeight / 2, widths[index], nodeHeight)
+
+
+def generateSvg(recipeGraph: RecipeGraph, svgFilePath: string, itemsPngCopyFolderPath: string):
+    # Same graph than generateDot without graphviz, ingredients above their results
+    def nodeSvg(doc: HtmlStreamDoc, itemName: str, x: float, y: float, width: int, height: int):
+        with doc.tag('g'):
+            doc.line('title', itemName)
+            doc.stag('image', href=os.path.join(itemsPngCopyFolderPath, itemName+".png"), x="{:.1f}".format(x), y="{:.1f}".format(y), width=str(width), height=str(height))
+    edges = [(ingredientName, resultName) for recipe in recipeGraph.recipes.values() for resultName in recipe.results.keys() for ingredientName in recipe.ingredients.keys()]
+    writeLayeredSvg(list(recipeGraph.items()), edges, svgFilePath, lambda itemName: 32, nodeSvg)
+
+
+def generateGroupsSvg(recipesGroups: dict[str, list[str]], recipesByName: RecipesByName, svgDirPath: string, itemsPngCopyFolderPath: string, jobs: int=1) -> list[str]:
+    # Recipes graph of each group, groups are laid out in parallel
+    svgFilePaths = {groupName: os.path.join(svgDirPath, "recipes"+groupName[0].upper()+groupName[1:]+"All.svg") for groupName in recipesGroups.keys()}
+    recipeGraphs = {groupName: RecipeGraph({recipeName: recipesByName[recipeName] for recipeName in recipesNames}) for groupName, recipesNames in recipesGroups.items()}
+    if jobs <= 1:
+        for groupName, recipeGraph in recipeGraphs.items():
+            generateSvg(recipeGraph, svgFilePaths[groupName], itemsPngCopyFolderPath)
+        return list(svgFilePaths.values())
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(generateSvg, recipeGraph, svgFilePaths[groupName], itemsPngCopyFolderPath) for groupName, recipeGraph in recipeGraphs.items()]
+        for future in futures:
+            future.result()
+    return list(svgFilePaths.values())
+
+
 def loadFactorioData(factorioDataJsonFilePath: string) -> tuple[CraftingFactoriesByName, RecipesByName, set[str], dict[str,str]]:
     with open(factorioDataJsonFilePath, 'r') as factorioDataJsonFile:
         factorioDataJson = json.load(factorioDataJsonFile)
@@ -337,43 +1304,416 @@ def loadFactorioData(factorioDataJsonFilePath: string) -> tuple[CraftingFactorie
                                                              jsonFactory["consumption"]["type"],
                                                              jsonFactory["consumption"]["quantity"],
                                                              jsonFactory["crafting"]["speed"],
-                                                             jsonFactory["crafting"]["categories"])
+                                                             jsonFactory["crafting"]["categories"],
+                                                             jsonFactory["module"]["slots"] if "module" in jsonFactory else 0)
     recipes = {}
     for recipeName, jsonRecipe in factorioDataJson["recipes-to-add"].items():
         recipes[recipeName] = fromJsonRecipe(recipeName, jsonRecipe)
     return craftingFactories, recipes, set(factorioDataJson["recipes-to-remove"]), factorioDataJson["item-png-renames"]
 
 
-def loadConsumptionData(consumptionDataJsonFilePath) -> tuple[dict, tuple[dict, list[str]], dict[str, str]]:
-    with open(consumptionDataJsonFilePath, 'r') as consumptionDataJsonFile:
-        consumptionDataJson = json.load(consumptionDataJsonFile)
+def loadFactorioModules(factorioDataJsonFilePath: string) -> tuple[ModulesByName, Beacon]:
+    with open(factorioDataJsonFilePath, 'r') as factorioDataJsonFile:
+        factorioDataJson = json.load(factorioDataJsonFile)
+    modules = ModulesByName()
+    for moduleName, jsonModule in factorioDataJson.get("modules", {}).items():
+        modules[moduleName] = Module(moduleName, jsonModule.get("speed", 0.0), jsonModule.get("productivity", 0.0), jsonModule.get("consumption", 0.0))
+    factorioBeacon = None
+    for factoryName, jsonFactory in factorioDataJson["factories"].items():
+        if "beacon" in jsonFactory:
+            factorioBeacon = Beacon(factoryName, jsonFactory["beacon"]["distribution-effectivity"], jsonFactory["module"]["slots"])
+    return modules, factorioBeacon
+
+
+def loadTransportBelts(factorioDataJsonFilePath: string) -> tuple[TransportBeltsByName, set[str]]:
+    # Belts from the slowest to the fastest, and fluids which are not moved by belts
+    with open(factorioDataJsonFilePath, 'r') as factorioDataJsonFile:
+        factorioDataJson = json.load(factorioDataJsonFile)
+    transportBelts = [TransportBelt(factoryName, jsonFactory["transport"]["speed"]) for factoryName, jsonFactory in factorioDataJson["factories"].items() if "transport" in jsonFactory]
+    return {transportBelt.name: transportBelt for transportBelt in sorted(transportBelts, key=lambda transportBelt: transportBelt.speed)}, set(factorioDataJson.get("fluids", []))
+
+
+def loadFactorioEquipment(factorioDataJsonFilePath: string) -> FactorioEquipment:
+    return FactorioEquipment(*loadFactorioModules(factorioDataJsonFilePath), *loadTransportBelts(factorioDataJsonFilePath))
+
+
+def getBeltsLanes(consumptionRate: dict, noRecipes: dict, factorioEquipment: FactorioEquipment) -> tuple[dict, dict]:
+    # Lanes of each belt needed by results and ingredients flows of each recipe, and by base rates: {belt: lanes}, a belt have 2 lanes
+    def flowLanes(rate: float) -> dict[str, float]:
+        return {transportBelt.name: rate / (transportBelt.speed / 2.0) for transportBelt in factorioEquipment.transportBeltsByName.values()}
+    recipesLanes = {}
+    for recipeName, production in consumptionRate.items():
+        recipesLanes[recipeName] = {key: {itemName: flowLanes(rate) for itemName, rate in production[key].items() if itemName not in factorioEquipment.fluids} for key in ["results", "ingredients"]}
+    return recipesLanes, {itemName: flowLanes(rate) for itemName, rate in noRecipes.items() if itemName not in factorioEquipment.fluids}
+
+
+def isOverOneBelt(lanes: dict[str, float]) -> bool:
+    # Even the fastest belt is not enough
+    return min(lanes.values()) > 2.0 + ZERO_TOLERANCE
+
+
+def fromJsonConsumptionData(consumptionDataJson: dict) -> tuple[dict, tuple[dict, list[str]], dict[str, str]]:
     overproductionEndOrder = []
     if "overproduction-end-order" in consumptionDataJson["preferencies"]["recipes"]:
         overproductionEndOrder = consumptionDataJson["preferencies"]["recipes"].pop("overproduction-end-order")
     return consumptionDataJson["requested"], (consumptionDataJson["preferencies"]["recipes"], overproductionEndOrder), consumptionDataJson["preferencies"]["factories"]
 
 
+def loadConsumptionData(consumptionDataJsonFilePath) -> tuple[dict, tuple[dict, list[str]], dict[str, str]]:
+    with open(consumptionDataJsonFilePath, 'r') as consumptionDataJsonFile:
+        consumptionDataJson = json.load(consumptionDataJsonFile)
+    return fromJsonConsumptionData(consumptionDataJson)
+
+
+def loadConsumptionBatch(consumptionDataPathsPatterns: list[str], defaultConsumptionDataJsonFilePath=None) -> dict[str, tuple[dict, tuple[dict, list[str]], dict[str, str]]]:
+    # Default preferencies for jsonl lines without their own
+    defaultPreferencies = None
+    if defaultConsumptionDataJsonFilePath:
+        with open(defaultConsumptionDataJsonFilePath, 'r') as consumptionDataJsonFile:
+            defaultPreferencies = json.load(consumptionDataJsonFile)["preferencies"]
+    consumptionDataByName = {}
+    for consumptionDataPathsPattern in consumptionDataPathsPatterns:
+        consumptionDataPaths = sorted(glob.glob(str(consumptionDataPathsPattern)))
+        if len(consumptionDataPaths) == 0:
+            raise FileNotFoundError("No consumption data file found for \"{}\"".format(consumptionDataPathsPattern))
+        for consumptionDataPath in consumptionDataPaths:
+            consumptionDataName = pathlib.Path(consumptionDataPath).stem
+            if consumptionDataPath.endswith(".jsonl"):
+                # One consumption data by line, with a "requested" and optional "name" and "preferencies"
+                with open(consumptionDataPath, 'r') as consumptionDataJsonlFile:
+                    for lineIndex, line in enumerate(consumptionDataJsonlFile):
+                        if line.strip() == "":
+                            continue
+                        consumptionDataJson = json.loads(line)
+                        scenarioName = consumptionDataJson.pop("name", "{}{}".format(consumptionDataName, lineIndex))
+                        if "preferencies" not in consumptionDataJson:
+                            if defaultPreferencies is None:
+                                raise ValueError("No preferencies for \"{}\" in \"{}\" you have to provide a consumption data file".format(scenarioName, consumptionDataPath))
+                            consumptionDataJson["preferencies"] = copy.deepcopy(defaultPreferencies)
+                        if scenarioName in consumptionDataByName:
+                            raise ValueError("Consumption data \"{}\" is defined more than once".format(scenarioName))
+                        consumptionDataByName[scenarioName] = fromJsonConsumptionData(consumptionDataJson)
+            else:
+                if consumptionDataName in consumptionDataByName:
+                    raise ValueError("Consumption data \"{}\" is defined more than once".format(consumptionDataName))
+                consumptionDataByName[consumptionDataName] = loadConsumptionData(consumptionDataPath)
+    return consumptionDataByName
+
+
+# Consumption by unit rate of acyclic sub-chains, by item and preferencies, shared by solves and saved in cache dir, None to disable
+unitConsumptionCache = {}
+
+
+def unitConsumptionCacheFilePath(cacheDirPath: string, recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName) -> string:
+    # Unit consumptions are only valid for the recipes and factories used to compute them
+    recipesJson = [[recipe.name, dict(recipe.ingredients.items()), recipe.time, dict(recipe.results.items()), recipe.category] for recipe in recipesByName.values()]
+    factoriesJson = [[factory.name, factory.consumptionType, factory.consumptionQuantity, factory.speed, list(factory.categories), factory.moduleSlots] for factory in craftingFactoriesByName.values()]
+    cacheKeyHash = hashlib.sha256(json.dumps([CACHE_VERSION, recipesJson, factoriesJson]).encode("utf8")).hexdigest()
+    return os.path.join(cacheDirPath, "unitConsumption-{}.pickle".format(cacheKeyHash))
+
+
+def loadUnitConsumptionCache(cacheFilePath: string):
+    unitConsumptionCache.clear()
+    if os.path.exists(cacheFilePath):
+        printDebug("Load unit consumptions from cache {}", cacheFilePath)
+        with open(cacheFilePath, 'rb') as cacheFile:
+            unitConsumptionCache.update(pickle.load(cacheFile))
+
+
+def saveUnitConsumptionCache(cacheFilePath: string):
+    if not os.path.exists(os.path.dirname(cacheFilePath)):
+        os.makedirs(os.path.dirname(cacheFilePath))
+    with open(cacheFilePath+".tmp", 'wb') as cacheFile:
+        pickle.dump(unitConsumptionCache, cacheFile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(cacheFilePath+".tmp", cacheFilePath)
+
+
+# Hash of recipes by result, by id of recipes by result kept with it so the id is not reused, computed once per recipes by result
+recipesByResultHashCache = {}
+
+
+def getUnitConsumptionPreferenciesKey(recipesByResult: RecipesByResult, craftingFactoriesByCategories: CraftingFactoriesByCategories) -> tuple[str, str]:
+    # Unit consumptions depend on recipes by result ratios and on factory used by category
+    # Modules change recipes category and results, and factories speed
+    if id(recipesByResult) not in recipesByResultHashCache or recipesByResultHashCache[id(recipesByResult)][0] is not recipesByResult:
+        recipesByResultJson = [[resultName, [[ratio, recipe.name, recipe.category, list(recipe.results.values())] for ratio, recipe in recipes]] for resultName, recipes in recipesByResult.items()]
+        if len(recipesByResultHashCache) >= 16:
+            recipesByResultHashCache.clear()
+        recipesByResultHashCache[id(recipesByResult)] = (recipesByResult, hashlib.sha256(json.dumps(recipesByResultJson).encode("utf8")).hexdigest())
+    return (recipesByResultHashCache[id(recipesByResult)][1],
+            json.dumps({category: [factory.name, factory.speed] for category, factory in craftingFactoriesByCategories.items()}, sort_keys=True))
+
+
+def getUnitConsumption(itemName: str, recipesByResult: RecipesByResult, craftingFactoriesByCategories: CraftingFactoriesByCategories, preferenciesKey: tuple, expanding: set) -> tuple[dict, dict]:
+    # Return recipes consumption and items still requested to produce 1/s of item, or None when it can't be expanded alone:
+    # item without recipe, with an overproduction recipe or with a recipe with more than one result (other results can reduce other requests)
+    cacheKey = (itemName,) + preferenciesKey
+    if cacheKey in unitConsumptionCache:
+        return unitConsumptionCache[cacheKey]
+    if itemName not in recipesByResult:
+        return None
+    for ratio, recipe in recipesByResult[itemName]:
+        if ratio == "overproduction" or len(recipe.results) != 1:
+            return None
+    expanding.add(itemName)
+    unitRecipesConsumption = {}
+    unitRequestedRates = {}
+    def addRecipeConsumption(recipeName: str, recipeConsumption: dict, rate: float):
+        if recipeName not in unitRecipesConsumption:
+            unitRecipesConsumption[recipeName] = {"production-count": 0.0, "factories-count": 0.0, "category": recipeConsumption["category"], "results": {}, "ingredients": {}}
+        unitRecipesConsumption[recipeName]["production-count"] += recipeConsumption["production-count"] * rate
+        unitRecipesConsumption[recipeName]["factories-count"] += recipeConsumption["factories-count"] * rate
+        for key in ["results", "ingredients"]:
+            for name, itemRate in recipeConsumption[key].items():
+                unitRecipesConsumption[recipeName][key][name] = unitRecipesConsumption[recipeName][key].get(name, 0.0) + itemRate * rate
+    for ratio, recipe in recipesByResult[itemName]:
+        productionCount = ratio / (recipe.results[itemName] / recipe.time)
+        addRecipeConsumption(recipe.name, {"production-count": productionCount,
+                                           "factories-count": productionCount / craftingFactoriesByCategories[recipe.category].speed,
+                                           "category": recipe.category,
+                                           "results": {itemName: ratio},
+                                           "ingredients": {ingredientName: ingredientPerProduction / recipe.time * productionCount for ingredientName, ingredientPerProduction in recipe.ingredients.items()}},
+                             1.0)
+        for ingredientName, ingredientPerProduction in recipe.ingredients.items():
+            ingredientRate = ingredientPerProduction / recipe.time * productionCount
+            # An item of a cycle stay requested and is produced again by the solver
+            ingredientUnitConsumption = None
+            if ingredientName not in expanding:
+                ingredientUnitConsumption = getUnitConsumption(ingredientName, recipesByResult, craftingFactoriesByCategories, preferenciesKey, expanding)
+            if ingredientUnitConsumption is None:
+                unitRequestedRates[ingredientName] = unitRequestedRates.get(ingredientName, 0.0) + ingredientRate
+            else:
+                for recipeName, recipeConsumption in ingredientUnitConsumption[0].items():
+                    addRecipeConsumption(recipeName, recipeConsumption, ingredientRate)
+                for requestedName, requestedRate in ingredientUnitConsumption[1].items():
+                    unitRequestedRates[requestedName] = unitRequestedRates.get(requestedName, 0.0) + requestedRate * ingredientRate
+    expanding.remove(itemName)
+    unitConsumptionCache[cacheKey] = (unitRecipesConsumption, unitRequestedRates)
+    return unitConsumptionCache[cacheKey]
+
+
+def addUnitConsumption(consumptionRate: dict, unitConsumption: tuple[dict, dict], rate: float, craftingFactoriesByCategories: CraftingFactoriesByCategories):
+    # Add recipes consumption of a unit consumption scaled to rate, items still requested are left to the caller
+    for recipeName, unitRecipeConsumption in unitConsumption[0].items():
+        category = unitRecipeConsumption["category"]
+        if recipeName not in consumptionRate:
+            consumptionRate[recipeName] = {"production-count": 0.0, "factories-name": craftingFactoriesByCategories[category].name, "factories-count": 0.0, "electric-consumption": 0.0, "category": category, "results": {}, "ingredients": {}}
+        consumptionRate[recipeName]["production-count"] += unitRecipeConsumption["production-count"] * rate
+        consumptionRate[recipeName]["factories-count"] += unitRecipeConsumption["factories-count"] * rate
+        if craftingFactoriesByCategories[category].consumptionType == "electric":
+            consumptionRate[recipeName]["electric-consumption"] = consumptionRate[recipeName]["factories-count"] * craftingFactoriesByCategories[category].consumptionQuantity
+        for key in ["results", "ingredients"]:
+            for itemName, itemRate in unitRecipeConsumption[key].items():
+                consumptionRate[recipeName][key][itemName] = consumptionRate[recipeName][key].get(itemName, 0.0) + itemRate * rate
+
+
+def stronglyConnectedComponents(successorsByNode: dict[str, list[str]]) -> list[list[str]]:
+    # Tarjan algorithm without recursion, a component is returned after all the components it leads to
+    indexes = {}
+    lowLinks = {}
+    stack = []
+    onStack = set()
+    components = []
+    for root in successorsByNode.keys():
+        if root in indexes:
+            continue
+        indexes[root] = lowLinks[root] = len(indexes)
+        stack.append(root)
+        onStack.add(root)
+        callStack = [(root, iter(successorsByNode[root]))]
+        while len(callStack) > 0:
+            node, successorsIterator = callStack[-1]
+            for successor in successorsIterator:
+                if successor not in indexes:
+                    indexes[successor] = lowLinks[successor] = len(indexes)
+                    stack.append(successor)
+                    onStack.add(successor)
+                    callStack.append((successor, iter(successorsByNode[successor])))
+                    break
+                if successor in onStack:
+                    lowLinks[node] = min(lowLinks[node], indexes[successor])
+            else:
+                callStack.pop()
+                if len(callStack) > 0:
+                    parent = callStack[-1][0]
+                    lowLinks[parent] = min(lowLinks[parent], lowLinks[node])
+                if lowLinks[node] == indexes[node]:
+                    component = []
+                    while len(component) == 0 or component[-1] != node:
+                        component.append(stack.pop())
+                        onStack.remove(component[-1])
+                    components.append(component)
+    return components
+
+
+def getItemsTopologicalRank(recipesByResult: RecipesByResult) -> tuple[dict[str, int], list[list[str]]]:
+    # Strongly connected components of items linked to the ingredients of their recipes, ranked in topological
+    # order of the components so an item come before its ingredients, items of a cycle share consecutive ranks
+    ingredientsByItem = {}
+    for resultName, recipes in recipesByResult.items():
+        ingredientsByItem[resultName] = list(dict.fromkeys(ingredientName for _, recipe in recipes for ingredientName in recipe.ingredients.keys()))
+        for ingredientName in ingredientsByItem[resultName]:
+            ingredientsByItem.setdefault(ingredientName, [])
+    components = stronglyConnectedComponents(ingredientsByItem)
+    # Components are found ingredients first
+    components.reverse()
+    itemsRank = {itemName: rank for rank, itemName in enumerate(itemName for component in components for itemName in component)}
+    return itemsRank, components
+
+
+# Counters of the last iterative solve: loop iterations, visit count by item and cyclic components
+consumptionSolverStats = {}
+
+
 def computeConsumptionRates(recipesByResult: RecipesByResult, inputRequestedRates: dict, craftingFactoriesByName: CraftingFactoriesByName, factoriesPreferences: dict, overproductionEndOrder: list[str]) -> tuple[dict, dict, dict]:
     craftingFactoriesByCategories = craftingFactoriesByName2CraftingFactoriesByCategories(craftingFactoriesByName, factoriesPreferences)
     consumptionRate = {}
     requestedRates = dict(inputRequestedRates)
     toProduce = set(requestedRates.keys())
+    # Items are produced in topological order, so an item out of a cycle is produced once with all its requested rate
+    itemsRank, components = getItemsTopologicalRank(recipesByResult)
+    toProduceHeap = [(itemsRank.get(itemName, len(itemsRank)), itemName) for itemName in toProduce]
+    heapq.heapify(toProduceHeap)
+    visits = Counter()
     toProduceAtEnd = set()
     noRecipes = set()
     overproduction = set()
     counter = 0
-    ZERO_TOLERANCE = 0.0004
+    # Read once, so disabled tracing cost nothing in the loop
+    tracing = traceLevel >= TRACE_LEVELS["detail"]
+    recording = traceFile is not None
+    iterationDeltas = {}
+    iterationRecipes = {}
+    if recording:
+        writeTrace({"requested": requestedRates})
+    if unitConsumptionCache is not None:
+        preferenciesKey = getUnitConsumptionPreferenciesKey(recipesByResult, craftingFactoriesByCategories)
+    def addToProduce(itemName: str):
+        toProduce.add(itemName)
+        heapq.heappush(toProduceHeap, (itemsRank.get(itemName, len(itemsRank)), itemName))
+    def addRequestedRate(itemName: str, rate: float):
+        if itemName not in requestedRates:
+            requestedRates[itemName] = 0.0
+            addToProduce(itemName)
+        requestedRates[itemName] += rate
+        if recording:
+            iterationDeltas[itemName] = iterationDeltas.get(itemName, 0.0) + rate
+        if tracing:
+            printDebug("\t{}: consume {} += {} => {}", counter, itemName, rate, requestedRates[itemName], level=TRACE_LEVELS["detail"])
+        # If almost 0.0 remove it from all list
+        if math.isclose(requestedRates[itemName], 0.0, abs_tol=ZERO_TOLERANCE):
+            if tracing:
+                printDebug("\t{}: {} == 0.0 remove it from all list", counter, itemName, level=TRACE_LEVELS["detail"])
+            if itemName in toProduce:
+                toProduce.remove(itemName)
+            if itemName in toProduceAtEnd:
+                toProduceAtEnd.remove(itemName)
+            if itemName in overproduction:
+                overproduction.remove(itemName)
+            del requestedRates[itemName]
+        # If was overproduction and now to produce
+        elif requestedRates[itemName] > 0.0 and itemName in overproduction:
+            if tracing:
+                printDebug("\t{}: remove from overproduction of {}", counter, itemName, level=TRACE_LEVELS["detail"])
+            overproduction.remove(itemName)
+            addToProduce(itemName)
+    def produceRecipe(recipe: Recipe, productionCount: float):
+        if recording:
+            iterationRecipes[recipe.name] = iterationRecipes.get(recipe.name, 0.0) + productionCount
+        # If new recipe
+        if recipe.name not in consumptionRate:
+            # Add empty template
+            consumptionRate[recipe.name] = {"production-count": 0.0, "factories-name": craftingFactoriesByCategories[recipe.category].name, "factories-count": 0.0, "electric-consumption": 0.0, "category": recipe.category, "results": {}, "ingredients": {}}
+        # Update production count
+        consumptionRate[recipe.name]["production-count"] += productionCount
+        # Update factory count
+        consumptionRate[recipe.name]["factories-count"] += productionCount / craftingFactoriesByCategories[recipe.category].speed
+        # Update electric consumption
+        if craftingFactoriesByCategories[recipe.category].consumptionType == "electric":
+            consumptionRate[recipe.name]["electric-consumption"] = consumptionRate[recipe.name]["factories-count"] * craftingFactoriesByCategories[recipe.category].consumptionQuantity
+        # Update item produce
+        for resultName, resultPerProduction in recipe.results.items():
+            resultRate = resultPerProduction / recipe.time * productionCount
+            if resultName not in consumptionRate[recipe.name]["results"]:
+                consumptionRate[recipe.name]["results"][resultName] = 0.0
+            consumptionRate[recipe.name]["results"][resultName] += resultRate
+            if resultName not in requestedRates:
+                requestedRates[resultName] = 0.0
+                overproduction.add(resultName)
+            requestedRates[resultName] -= resultRate
+            if recording:
+                iterationDeltas[resultName] = iterationDeltas.get(resultName, 0.0) - resultRate
+            if tracing:
+                printDebug("\t{}: produce {} -= {} => {}", counter, resultName, resultRate, requestedRates[resultName], level=TRACE_LEVELS["detail"])
+            # If almost 0.0 remove it from all list
+            if math.isclose(requestedRates[resultName], 0.0, abs_tol=ZERO_TOLERANCE):
+                if tracing:
+                    printDebug("\t{}: {} == 0.0 remove it from all list", counter, resultName, level=TRACE_LEVELS["detail"])
+                if resultName in toProduce:
+                    toProduce.remove(resultName)
+                if resultName in toProduceAtEnd:
+                    toProduceAtEnd.remove(resultName)
+                if resultName in overproduction:
+                    overproduction.remove(resultName)
+                del requestedRates[resultName]
+            # If was to produce and now overproduction
+            elif requestedRates[resultName] < 0.0 and resultName in toProduce:
+                if tracing:
+                    printDebug("\t{}: overproduction of {}", counter, resultName, level=TRACE_LEVELS["detail"])
+                toProduce.remove(resultName)
+                overproduction.add(resultName)
+        # Update item requested
+        for ingredientName, ingredientPerProduction in recipe.ingredients.items():
+            ingredientRate = ingredientPerProduction / recipe.time * productionCount
+            if ingredientName not in consumptionRate[recipe.name]["ingredients"]:
+                consumptionRate[recipe.name]["ingredients"][ingredientName] = 0.0
+            consumptionRate[recipe.name]["ingredients"][ingredientName] += ingredientRate
+            addRequestedRate(ingredientName, ingredientRate)
+    def produceCyclicComponent(component: list[str]):
+        # Solve the rates of the cycle recipes at once with the linear problem limited to the component,
+        # its ingredients out of the cycle are requested and come later in topological order
+        import scipy.optimize
+        componentRequestedRates = {itemName: requestedRates[itemName] for itemName in component if requestedRates.get(itemName, 0.0) > 0.0}
+        for itemName in componentRequestedRates.keys():
+            toProduce.discard(itemName)
+            toProduceAtEnd.discard(itemName)
+        recipesIndex, _, producibleItems, matrix, requested = buildLinearConsumptionProblem({itemName: recipesByResult[itemName] for itemName in component}, componentRequestedRates)
+        costs = [1.0e-6] * (matrix.shape[1]-len(producibleItems)) + [1.0] * len(producibleItems)
+        solution = scipy.optimize.linprog(costs, A_eq=matrix, b_eq=requested, bounds=(0.0, None), method="highs")
+        if solution.status != 0:
+            raise ValueError("Iterative solver failed to compute consumption of the cycle of {}: {}".format(component, solution.message))
+        if tracing:
+            printDebug("{}: produce {} with cycle {}", counter, componentRequestedRates, component, level=TRACE_LEVELS["detail"])
+        for recipeColumns, recipe in recipesIndex.values():
+            productionCount = float(solution.x[recipeColumns].sum())
+            if not math.isclose(productionCount, 0.0, abs_tol=ZERO_TOLERANCE):
+                produceRecipe(recipe, productionCount)
+    # Items of cycles are produced with their whole component, without scipy the cycles are produced item by item until they converge
+    cyclicComponentByItem = {}
+    with contextlib.suppress(ImportError):
+        import scipy.optimize
+        for component in components:
+            if len(component) > 1 or any(component[0] in recipe.ingredients for _, recipe in recipesByResult.get(component[0], [])):
+                cyclicComponentByItem.update((itemName, component) for itemName in component)
     while len(toProduce)>0 or len(toProduceAtEnd)>0:
-        if debug:
-            consumption2Html(consumptionRate, {itemName: requestedRates[itemName] for itemName in toProduce|toProduceAtEnd|noRecipes},
-                             {itemName: requestedRates[itemName] for itemName in overproduction},
-                             "out/{}.html".format(counter), "img", "{}.html".format(counter-1), "{}.html".format(counter+1))
+        if recording and counter > 0:
+            writeTrace({"iteration": counter, "item": requestedName, "action": action, "recipes": iterationRecipes, "deltas": iterationDeltas})
+            iterationDeltas = {}
+            iterationRecipes = {}
         counter += 1
         # Get the next item to produce
         # If still have item at begin
         if len(toProduce)>0:
-            # Get item from begin
-            requestedName = toProduce.pop()
+            # Get item from begin, the first in topological order, heap can have items already produced
+            _, requestedName = heapq.heappop(toProduceHeap)
+            while requestedName not in toProduce:
+                _, requestedName = heapq.heappop(toProduceHeap)
+            toProduce.remove(requestedName)
+            if requestedName in cyclicComponentByItem:
+                visits[requestedName] += 1
+                produceCyclicComponent(cyclicComponentByItem[requestedName])
+                action = "cyclic-component"
+                continue
             # If a recipe for this item is mark "overproduction"
             if requestedName in recipesByResult:
                 isOverproduction = False
@@ -383,8 +1723,10 @@ def computeConsumptionRates(recipesByResult: RecipesByResult, inputRequestedRate
                         break
                 if isOverproduction:
                     # Move it in end
-                    printDebug("{}: move {} to end".format(counter, requestedName))
+                    if tracing:
+                        printDebug("{}: move {} to end", counter, requestedName, level=TRACE_LEVELS["detail"])
                     toProduceAtEnd.add(requestedName)
+                    action = "move-to-end"
                     continue
         else:
             # Get item from end, but try with order in overproductionEndOrder
@@ -397,12 +1739,32 @@ def computeConsumptionRates(recipesByResult: RecipesByResult, inputRequestedRate
                     break
             # If no item from overproductionEndOrder get first one
             if requestedName == "":
-                requestedName = toProduceAtEnd.pop()
+                requestedName = min(toProduceAtEnd, key=lambda itemName: itemsRank.get(itemName, len(itemsRank)))
+                toProduceAtEnd.remove(requestedName)
         # Produce this item
-        printDebug("{}: need to produce {} of {}".format(counter, requestedRates[requestedName], requestedName))
+        visits[requestedName] += 1
+        if tracing:
+            printDebug("{}: need to produce {} of {}", counter, requestedRates[requestedName], requestedName, level=TRACE_LEVELS["detail"])
+        action = "produce"
         assert(not math.isclose(requestedRates[requestedName], 0.0, abs_tol=ZERO_TOLERANCE))
         assert(requestedRates[requestedName] > 0.0)
-        if requestedName in recipesByResult:
+        unitConsumption = None
+        if unitConsumptionCache is not None:
+            unitConsumption = getUnitConsumption(requestedName, recipesByResult, craftingFactoriesByCategories, preferenciesKey, set())
+        if unitConsumption is not None:
+            # Produce the whole acyclic sub-chain at once from its consumption by unit rate
+            requestedRate = requestedRates.pop(requestedName)
+            if tracing:
+                printDebug("{}: produce {} of {} with unit consumption", counter, requestedRate, requestedName, level=TRACE_LEVELS["detail"])
+            addUnitConsumption(consumptionRate, unitConsumption, requestedRate, craftingFactoriesByCategories)
+            action = "unit-consumption"
+            if recording:
+                iterationDeltas[requestedName] = -requestedRate
+                for recipeName, recipeConsumption in unitConsumption[0].items():
+                    iterationRecipes[recipeName] = recipeConsumption["production-count"] * requestedRate
+            for itemName, unitRate in unitConsumption[1].items():
+                addRequestedRate(itemName, unitRate * requestedRate)
+        elif requestedName in recipesByResult:
             # We have at least 1 recipe
             # For each recipe to produce this item
             requestedRate = requestedRates[requestedName]
@@ -413,77 +1775,17 @@ def computeConsumptionRates(recipesByResult: RecipesByResult, inputRequestedRate
                     for ingredientName, ingredientPerProduction in recipe.ingredients.items():
                         if ingredientName in overproduction:
                             productionCountTmp = -requestedRates[ingredientName] / (ingredientPerProduction / recipe.time)
-                            printDebug("{}: try to produce {} with overproduction of {} and recipe {} compute {}".format(counter, requestedName, ingredientName, recipe.name, productionCountTmp))
+                            if tracing:
+                                printDebug("{}: try to produce {} with overproduction of {} and recipe {} compute {}", counter, requestedName, ingredientName, recipe.name, productionCountTmp, level=TRACE_LEVELS["detail"])
                             productionCount = max(productionCount, productionCountTmp)
                     if productionCount == 0.0:
                         continue
                 else:
                     # Compute rate to produce
                     productionCount = requestedRate * ratio / (recipe.results[requestedName] / recipe.time)
-                    printDebug("{}: produce {} of {} with {} recipe".format(counter, requestedRate*ratio, requestedName, recipe.name))
-                # If new recipe
-                if recipe.name not in consumptionRate:
-                    # Add empty template
-                    consumptionRate[recipe.name] = {"production-count": 0.0, "factories-name": craftingFactoriesByCategories[recipe.category].name, "factories-count": 0.0, "electric-consumption": 0.0, "category": recipe.category, "results": {}, "ingredients": {}}
-                # Update production count
-                consumptionRate[recipe.name]["production-count"] += productionCount
-                # Update factory count
-                consumptionRate[recipe.name]["factories-count"] += productionCount / craftingFactoriesByCategories[recipe.category].speed
-                # Update electric consumption
-                if craftingFactoriesByCategories[recipe.category].consumptionType == "electric":
-                    consumptionRate[recipe.name]["electric-consumption"] = consumptionRate[recipe.name]["factories-count"] * craftingFactoriesByCategories[recipe.category].consumptionQuantity
-                # Update item produce
-                for resultName, resultPerProduction in recipe.results.items():
-                    resultRate = resultPerProduction / recipe.time * productionCount
-                    if resultName not in consumptionRate[recipe.name]["results"]:
-                        consumptionRate[recipe.name]["results"][resultName] = 0.0
-                    consumptionRate[recipe.name]["results"][resultName] += resultRate
-                    if resultName not in requestedRates:
-                        requestedRates[resultName] = 0.0
-                        overproduction.add(resultName)
-                    requestedRates[resultName] -= resultRate
-                    printDebug("\t{}: produce {} -= {} => {}".format(counter, resultName, resultRate, requestedRates[resultName]))
-                    # If almost 0.0 remove it from all list
-                    if math.isclose(requestedRates[resultName], 0.0, abs_tol=ZERO_TOLERANCE):
-                        printDebug("\t{}: {} == 0.0 remove it from all list".format(counter, resultName))
-                        if resultName in toProduce:
-                            toProduce.remove(resultName)
-                        if resultName in toProduceAtEnd:
-                            toProduceAtEnd.remove(resultName)
-                        if resultName in overproduction:
-                            overproduction.remove(resultName)
-                        del requestedRates[resultName]
-                    # If was to produce and now overproduction
-                    elif requestedRates[resultName] < 0.0 and resultName in toProduce:
-                        printDebug("\t{}: overproduction of {}".format(counter, resultName))
-                        toProduce.remove(resultName)
-                        overproduction.add(resultName)
-                # Update item requested
-                for ingredientName, ingredientPerProduction in recipe.ingredients.items():
-                    ingredientRate = ingredientPerProduction / recipe.time * productionCount
-                    if ingredientName not in consumptionRate[recipe.name]["ingredients"]:
-                        consumptionRate[recipe.name]["ingredients"][ingredientName] = 0.0
-                    consumptionRate[recipe.name]["ingredients"][ingredientName] += ingredientRate
-                    if ingredientName not in requestedRates:
-                        requestedRates[ingredientName] = 0.0
-                        toProduce.add(ingredientName)
-                    requestedRates[ingredientName] += ingredientRate
-                    printDebug("\t{}: consume {} += {} => {}".format(counter, ingredientName, ingredientRate, requestedRates[ingredientName]))
-                    # If almost 0.0 remove it from all list
-                    if math.isclose(requestedRates[ingredientName], 0.0, abs_tol=ZERO_TOLERANCE):
-                        printDebug("\t{}: {} == 0.0 remove it from all list".format(counter, ingredientName))
-                        if ingredientName in toProduce:
-                            toProduce.remove(ingredientName)
-                        if ingredientName in toProduceAtEnd:
-                            toProduceAtEnd.remove(ingredientName)
-                        if ingredientName in overproduction:
-                            overproduction.remove(ingredientName)
-                        del requestedRates[ingredientName]
-                    # If was overproduction and now to produce
-                    elif requestedRates[ingredientName] > 0.0 and ingredientName in overproduction:
-                        printDebug("\t{}: remove from overproduction of {}".format(counter, ingredientName))
-                        overproduction.remove(ingredientName)
-                        toProduce.add(ingredientName)
+                    if tracing:
+                        printDebug("{}: produce {} of {} with {} recipe", counter, requestedRate*ratio, requestedName, recipe.name, level=TRACE_LEVELS["detail"])
+                produceRecipe(recipe, productionCount)
                 # If this recipe was for overproduction
                 if ratio == "overproduction":
                     # Use remaining rate for over ratio
@@ -491,14 +1793,463 @@ def computeConsumptionRates(recipesByResult: RecipesByResult, inputRequestedRate
                         requestedRate = requestedRates[requestedName]
                     else:
                         break
-
+            # An item ingredient of its own recipe is still requested
+            if requestedRates.get(requestedName, 0.0) > 0.0 and requestedName not in toProduce and requestedName not in toProduceAtEnd:
+                addToProduce(requestedName)
         else:
             # No recipe to produce this item
             noRecipes.add(requestedName)
-            printDebug("{}: no recipe for {}".format(counter, requestedName))
+            action = "no-recipe"
+            if tracing:
+                printDebug("{}: no recipe for {}", counter, requestedName, level=TRACE_LEVELS["detail"])
+    if recording:
+        if counter > 0:
+            writeTrace({"iteration": counter, "item": requestedName, "action": action, "recipes": iterationRecipes, "deltas": iterationDeltas})
+        writeTrace({"solved": counter})
+    consumptionSolverStats.clear()
+    consumptionSolverStats.update({"iterations": counter, "visits": sum(visits.values()), "revisits": sum(visits.values())-len(visits),
+                                   "cyclic-components": [component for component in components if len(component)>1]})
+    printDebug("Solved in {} iterations, {} visits of {} items", counter, sum(visits.values()), len(visits))
     return consumptionRate, {itemName: requestedRates[itemName] for itemName in noRecipes}, {itemName: requestedRates[itemName] for itemName in overproduction}
 
 
+def buildLinearConsumptionProblem(recipesByResult: RecipesByResult, inputRequestedRates: dict) -> tuple:
+    # Return recipes with their production columns and items reachable from requested items, with the equality matrix and requested vector:
+    # a production column by recipe of each item, then a column by item overproduction.
+    # A recipe used by several items, or also as overproduction recipe, has several columns so ratio preferencies
+    # only apply to the rate produced for their item, like the iterative solver
+    import numpy
+    import scipy.sparse
+    recipesIndex = {}
+    productionColumns = []
+    ratiosColumnsByItem = {}
+    itemsIndex = {}
+    toVisit = list(inputRequestedRates.keys())
+    while len(toVisit)>0:
+        itemName = toVisit.pop()
+        if itemName in itemsIndex:
+            continue
+        itemsIndex[itemName] = len(itemsIndex)
+        if itemName not in recipesByResult:
+            continue
+        ratiosColumnsByItem[itemName] = []
+        for ratio, recipe in recipesByResult[itemName]:
+            if recipe.name not in recipesIndex:
+                recipesIndex[recipe.name] = ([], recipe)
+                toVisit.extend(recipe.ingredients.keys())
+                toVisit.extend(recipe.results.keys())
+            recipesIndex[recipe.name][0].append(len(productionColumns))
+            ratiosColumnsByItem[itemName].append((ratio, recipe, len(productionColumns)))
+            productionColumns.append(recipe)
+    # Each item with a recipe have a balance row: produced - consumed - overproduction = requested
+    producibleItems = [itemName for itemName in itemsIndex.keys() if itemName in recipesByResult]
+    balanceRowIndex = {itemName: row for row, itemName in enumerate(producibleItems)}
+    rows, columns, values = [], [], []
+    for productionColumn, recipe in enumerate(productionColumns):
+        netRates = Counter()
+        for ingredientName, ingredientPerProduction in recipe.ingredients.items():
+            netRates[ingredientName] -= ingredientPerProduction / recipe.time
+        for resultName, resultPerProduction in recipe.results.items():
+            netRates[resultName] += resultPerProduction / recipe.time
+        for itemName, rate in netRates.items():
+            if itemName in balanceRowIndex:
+                rows.append(balanceRowIndex[itemName])
+                columns.append(productionColumn)
+                values.append(rate)
+    # An overproduction column per balance row, only used when the balance can not be reached
+    columnsCount = len(productionColumns)
+    for row in range(len(producibleItems)):
+        rows.append(row)
+        columns.append(columnsCount+row)
+        values.append(-1.0)
+    # Ratio preferences rows between recipes producing the same item:
+    # ratio2 * rate1 - ratio1 * rate2 = 0
+    # The column of an overproduction recipe stays free, the balance of the overproduced ingredient set its rate,
+    # ignored for items without preferencies when all recipes are kept
+    rowCount = len(producibleItems)
+    for itemName in producibleItems:
+        ratiosColumns = [(ratio, recipe, productionColumn) for ratio, recipe, productionColumn in ratiosColumnsByItem[itemName] if ratio != "overproduction"]
+        if any(ratio is None for ratio, _, _ in ratiosColumns):
+            continue
+        for (ratio1, recipe1, column1), (ratio2, recipe2, column2) in zip(ratiosColumns, ratiosColumns[1:]):
+            rows.extend([rowCount, rowCount])
+            columns.extend([column1, column2])
+            values.extend([ratio2 * recipe1.results[itemName] / recipe1.time, -ratio1 * recipe2.results[itemName] / recipe2.time])
+            rowCount += 1
+    matrix = scipy.sparse.csr_matrix((values, (rows, columns)), shape=(rowCount, columnsCount+len(producibleItems)))
+    requested = numpy.zeros(rowCount)
+    for itemName, rate in inputRequestedRates.items():
+        if itemName in balanceRowIndex:
+            requested[balanceRowIndex[itemName]] = rate
+    return recipesIndex, itemsIndex, producibleItems, matrix, requested
+
+
+def linearSolution2ConsumptionRates(recipesIndex: dict, itemsIndex: dict, productionCounts, inputRequestedRates: dict, craftingFactoriesByCategories: CraftingFactoriesByCategories) -> tuple[dict, dict, dict]:
+    # Convert production counts into consumption rates
+    consumptionRate = {}
+    itemsBalance = {itemName: -inputRequestedRates.get(itemName, 0.0) for itemName in itemsIndex.keys()}
+    for recipeName, (recipeColumns, recipe) in recipesIndex.items():
+        productionCount = float(productionCounts[recipeColumns].sum())
+        if math.isclose(productionCount, 0.0, abs_tol=ZERO_TOLERANCE):
+            continue
+        craftingFactory = craftingFactoriesByCategories[recipe.category]
+        consumptionRate[recipeName] = {"production-count": productionCount, "factories-name": craftingFactory.name, "factories-count": productionCount / craftingFactory.speed, "electric-consumption": 0.0, "category": recipe.category, "results": {}, "ingredients": {}}
+        if craftingFactory.consumptionType == "electric":
+            consumptionRate[recipeName]["electric-consumption"] = consumptionRate[recipeName]["factories-count"] * craftingFactory.consumptionQuantity
+        for resultName, resultPerProduction in recipe.results.items():
+            consumptionRate[recipeName]["results"][resultName] = resultPerProduction / recipe.time * productionCount
+            itemsBalance[resultName] += consumptionRate[recipeName]["results"][resultName]
+        for ingredientName, ingredientPerProduction in recipe.ingredients.items():
+            consumptionRate[recipeName]["ingredients"][ingredientName] = ingredientPerProduction / recipe.time * productionCount
+            itemsBalance[ingredientName] -= consumptionRate[recipeName]["ingredients"][ingredientName]
+    # Missing items are base rates (or unreachable balances), extra items are overproduction
+    noRecipes = {}
+    overproduction = {}
+    for itemName, balance in itemsBalance.items():
+        if math.isclose(balance, 0.0, abs_tol=ZERO_TOLERANCE):
+            continue
+        if balance < 0.0:
+            noRecipes[itemName] = -balance
+        else:
+            overproduction[itemName] = -balance
+    return consumptionRate, noRecipes, overproduction
+
+
+def computeConsumptionRatesLinear(recipesByResult: RecipesByResult, inputRequestedRates: dict, craftingFactoriesByName: CraftingFactoriesByName, factoriesPreferences: dict, overproductionEndOrder: list[str]) -> tuple[dict, dict, dict]:
+    # Solve all production counts at once instead of iterating item by item,
+    # overproductionEndOrder is not needed because there is no processing order
+    import numpy
+    import scipy.optimize
+    craftingFactoriesByCategories = craftingFactoriesByName2CraftingFactoriesByCategories(craftingFactoriesByName, factoriesPreferences)
+    recipesIndex, itemsIndex, producibleItems, matrix, requested = buildLinearConsumptionProblem(recipesByResult, inputRequestedRates)
+    # Minimize overproduction, and a little the production count to avoid useless loops
+    costs = numpy.concatenate((numpy.full(matrix.shape[1]-len(producibleItems), 1.0e-6), numpy.ones(len(producibleItems))))
+    solution = scipy.optimize.linprog(costs, A_eq=matrix, b_eq=requested, bounds=(0.0, None), method="highs")
+    if solution.status != 0:
+        raise ValueError("Linear solver failed to compute consumption: {}".format(solution.message))
+    return linearSolution2ConsumptionRates(recipesIndex, itemsIndex, solution.x, inputRequestedRates, craftingFactoriesByCategories)
+
+
+# Quantity minimized by the optimal solver once overproduction is minimal: "raw" items without recipe consumed, "factories" count or "electricity"
+OPTIMAL_OBJECTIVES = ["raw", "factories", "electricity"]
+
+
+def computeConsumptionRatesOptimal(recipesByResult: RecipesByResult, inputRequestedRates: dict, craftingFactoriesByName: CraftingFactoriesByName, factoriesPreferences: dict, overproductionEndOrder: list[str],
+                                   optimalObjective: str="raw") -> tuple[dict, dict, dict]:
+    # Choose the recipes mix itself, recipesByResult keep all recipes of items without preferencies (see recipesByName2recipesByResult),
+    # ratio preferencies are kept as constraints
+    import numpy
+    import scipy.optimize
+    craftingFactoriesByCategories = craftingFactoriesByName2CraftingFactoriesByCategories(craftingFactoriesByName, factoriesPreferences)
+    recipesIndex, itemsIndex, producibleItems, matrix, requested = buildLinearConsumptionProblem(recipesByResult, inputRequestedRates)
+    columnsCount = matrix.shape[1] - len(producibleItems)
+    # First minimize overproduction, like the linear solver
+    costs = numpy.concatenate((numpy.full(columnsCount, 1.0e-6), numpy.ones(len(producibleItems))))
+    solution = scipy.optimize.linprog(costs, A_eq=matrix, b_eq=requested, bounds=(0.0, None), method="highs")
+    if solution.status != 0:
+        raise ValueError("Optimal solver failed to compute consumption: {}".format(solution.message))
+    overproductionMin = float(solution.x[columnsCount:].sum())
+    # Then minimize the objective without more overproduction
+    costs = numpy.zeros(columnsCount+len(producibleItems))
+    for recipeColumns, recipe in recipesIndex.values():
+        craftingFactory = craftingFactoriesByCategories[recipe.category]
+        if optimalObjective == "raw":
+            costs[recipeColumns] = sum(ingredientPerProduction / recipe.time for ingredientName, ingredientPerProduction in recipe.ingredients.items() if ingredientName not in recipesByResult)
+        elif optimalObjective == "factories":
+            costs[recipeColumns] = 1.0 / craftingFactory.speed
+        elif optimalObjective == "electricity":
+            if craftingFactory.consumptionType == "electric":
+                costs[recipeColumns] = craftingFactory.consumptionQuantity / craftingFactory.speed
+        else:
+            raise ValueError("Unknown optimal objective {}, it must be one of {}".format(optimalObjective, OPTIMAL_OBJECTIVES))
+        # Avoid useless loops when the objective does not count a recipe
+        costs[recipeColumns] += 1.0e-6
+    overproductionRow = numpy.concatenate((numpy.zeros(columnsCount), numpy.ones(len(producibleItems)))).reshape(1, -1)
+    solution = scipy.optimize.linprog(costs, A_ub=overproductionRow, b_ub=[overproductionMin + max(overproductionMin, 1.0) * 1.0e-9],
+                                      A_eq=matrix, b_eq=requested, bounds=(0.0, None), method="highs")
+    if solution.status != 0:
+        raise ValueError("Optimal solver failed to compute consumption: {}".format(solution.message))
+    return linearSolution2ConsumptionRates(recipesIndex, itemsIndex, solution.x, inputRequestedRates, craftingFactoriesByCategories)
+
+
+# Packed recipes by result of the last vectorized solves, by id with the recipes by result to check it is the same object
+packedRecipesByResultCache = {}
+
+
+def packRecipesByResult(recipesByResult: RecipesByResult) -> dict:
+    # Items and recipes indexes, recipes items and rate by production count (ingredients positive, results negative) in CSR
+    # layout, and items produced by batch: single result recipes without overproduction ratio, with recipe index and production count by rate
+    import numpy
+    if id(recipesByResult) in packedRecipesByResultCache and packedRecipesByResultCache[id(recipesByResult)][0] is recipesByResult:
+        return packedRecipesByResultCache[id(recipesByResult)][1]
+    itemsRank, components = getItemsTopologicalRank(recipesByResult)
+    itemsName = list(itemsRank.keys())
+    itemsIndex = {itemName: index for index, itemName in enumerate(itemsName)}
+    recipes = list({recipe.name: recipe for recipesList in recipesByResult.values() for _, recipe in recipesList}.values())
+    recipesIndex = {recipe.name: index for index, recipe in enumerate(recipes)}
+    recipesOffset = [0]
+    recipesItems = []
+    recipesRates = []
+    # Result rate by production count of a recipe item, net of the same item used as ingredient
+    recipesNetResult = {}
+    for recipeIndex, recipe in enumerate(recipes):
+        recipeRates = {}
+        for ingredientName, ingredientPerProduction in recipe.ingredients.items():
+            recipeRates[itemsIndex[ingredientName]] = recipeRates.get(itemsIndex[ingredientName], 0.0) + ingredientPerProduction / recipe.time
+        for resultName, resultPerProduction in recipe.results.items():
+            recipeRates[itemsIndex[resultName]] = recipeRates.get(itemsIndex[resultName], 0.0) - resultPerProduction / recipe.time
+        for resultName in recipe.results.keys():
+            recipesNetResult[(recipeIndex, itemsIndex[resultName])] = -recipeRates[itemsIndex[resultName]]
+        recipesItems.extend(recipeRates.keys())
+        recipesRates.extend(recipeRates.values())
+        recipesOffset.append(len(recipesItems))
+    # Level of each item in the components graph, an item level is greater than the level of all items requesting it
+    componentByItem = {itemName: componentIndex for componentIndex, component in enumerate(components) for itemName in component}
+    componentsLevel = [0] * len(components)
+    for componentIndex, component in enumerate(components):
+        for itemName in component:
+            for _, recipe in recipesByResult.get(itemName, []):
+                for ingredientName in recipe.ingredients.keys():
+                    if componentByItem[ingredientName] != componentIndex:
+                        componentsLevel[componentByItem[ingredientName]] = max(componentsLevel[componentByItem[ingredientName]], componentsLevel[componentIndex]+1)
+    batchRecipes = {}
+    overproductionItems = set()
+    for resultName, recipesList in recipesByResult.items():
+        if any(ratio == "overproduction" for ratio, _ in recipesList):
+            overproductionItems.add(itemsIndex[resultName])
+        elif all(len(recipe.results) == 1 for _, recipe in recipesList):
+            batchRecipes[itemsIndex[resultName]] = [(recipesIndex[recipe.name], ratio / recipesNetResult[(recipesIndex[recipe.name], itemsIndex[resultName])]) for ratio, recipe in recipesList]
+    packedRecipesByResult = {"components": components, "itemsName": itemsName, "itemsIndex": itemsIndex,
+                             "itemsKey": [(componentsLevel[componentByItem[itemName]], itemsRank[itemName]) for itemName in itemsName],
+                             "recipes": recipes, "recipesIndex": recipesIndex, "recipesOffset": recipesOffset,
+                             "recipesItems": numpy.array(recipesItems, dtype=numpy.int64), "recipesRates": numpy.array(recipesRates, dtype=numpy.float64),
+                             "recipesSlice": [numpy.arange(recipesOffset[recipeIndex], recipesOffset[recipeIndex+1]) for recipeIndex in range(len(recipes))],
+                             "recipesNetResult": recipesNetResult, "batchRecipes": batchRecipes, "overproductionItems": overproductionItems}
+    if len(packedRecipesByResultCache) >= 16:
+        packedRecipesByResultCache.clear()
+    packedRecipesByResultCache[id(recipesByResult)] = (recipesByResult, packedRecipesByResult)
+    return packedRecipesByResult
+
+
+def computeConsumptionRatesVectorized(recipesByResult: RecipesByResult, inputRequestedRates: dict, craftingFactoriesByName: CraftingFactoriesByName, factoriesPreferences: dict, overproductionEndOrder: list[str]) -> tuple[dict, dict, dict]:
+    # Same processing as computeConsumptionRates but rates are in a numpy array by item index and each recipe is packed
+    # as item indexes and rate by production count, items with only single result recipes of a same level are produced together
+    import numpy
+    craftingFactoriesByCategories = craftingFactoriesByName2CraftingFactoriesByCategories(craftingFactoriesByName, factoriesPreferences)
+    packedRecipesByResult = packRecipesByResult(recipesByResult)
+    components = packedRecipesByResult["components"]
+    recipes = packedRecipesByResult["recipes"]
+    recipesIndex = packedRecipesByResult["recipesIndex"]
+    recipesOffset = packedRecipesByResult["recipesOffset"]
+    recipesItems = packedRecipesByResult["recipesItems"]
+    recipesRates = packedRecipesByResult["recipesRates"]
+    recipesSlice = packedRecipesByResult["recipesSlice"]
+    recipesNetResult = packedRecipesByResult["recipesNetResult"]
+    batchRecipes = packedRecipesByResult["batchRecipes"]
+    overproductionItems = packedRecipesByResult["overproductionItems"]
+    itemsName = packedRecipesByResult["itemsName"]
+    itemsIndex = packedRecipesByResult["itemsIndex"]
+    itemsKey = packedRecipesByResult["itemsKey"]
+    # Requested items unknown by recipes are added after the packed ones
+    unknownItemsName = [itemName for itemName in inputRequestedRates.keys() if itemName not in itemsIndex]
+    if len(unknownItemsName) > 0:
+        itemsName = itemsName + unknownItemsName
+        itemsIndex = dict(itemsIndex, **{itemName: len(itemsKey)+index for index, itemName in enumerate(unknownItemsName)})
+        itemsKey = itemsKey + [(len(components), len(itemsKey)+index) for index in range(len(unknownItemsName))]
+    # Item states
+    NONE, TO_PRODUCE, TO_PRODUCE_AT_END, OVERPRODUCTION, NO_RECIPE = range(5)
+    states = numpy.zeros(len(itemsName), dtype=numpy.int8)
+    rates = numpy.zeros(len(itemsName), dtype=numpy.float64)
+    productionCounts = numpy.zeros(len(recipes), dtype=numpy.float64)
+    recipesUsed = numpy.zeros(len(recipes), dtype=bool)
+    toProduceHeap = []
+    toProduceAtEndHeap = []
+    for itemName, rate in inputRequestedRates.items():
+        rates[itemsIndex[itemName]] = rate
+        states[itemsIndex[itemName]] = TO_PRODUCE
+        heapq.heappush(toProduceHeap, (itemsKey[itemsIndex[itemName]], itemsIndex[itemName]))
+    def produce(recipesIndexes: list[int], recipesProductionCount: list[float]):
+        # Add production count of recipes and update rates and states of all their items at once
+        numpy.add.at(productionCounts, recipesIndexes, recipesProductionCount)
+        recipesUsed[recipesIndexes] = True
+        itemsSlices = [recipesSlice[recipeIndex] for recipeIndex in recipesIndexes]
+        slicesLength = [recipesOffset[recipeIndex+1] - recipesOffset[recipeIndex] for recipeIndex in recipesIndexes]
+        itemsSlice = numpy.concatenate(itemsSlices)
+        numpy.add.at(rates, recipesItems[itemsSlice], recipesRates[itemsSlice] * numpy.repeat(recipesProductionCount, slicesLength))
+        touched = numpy.unique(recipesItems[itemsSlice])
+        touchedStates = states[touched]
+        touchedRates = rates[touched]
+        isZero = numpy.abs(touchedRates) <= ZERO_TOLERANCE
+        toProduce = ~isZero & (touchedRates > 0.0) & ((touchedStates == NONE) | (touchedStates == OVERPRODUCTION))
+        toOverproduction = ~isZero & (touchedRates < 0.0) & ((touchedStates == NONE) | (touchedStates == TO_PRODUCE))
+        # No recipe items keep their rate
+        isZero &= touchedStates != NO_RECIPE
+        states[touched[isZero]] = NONE
+        rates[touched[isZero]] = 0.0
+        states[touched[toOverproduction]] = OVERPRODUCTION
+        states[touched[toProduce]] = TO_PRODUCE
+        for itemIndex in touched[toProduce].tolist():
+            heapq.heappush(toProduceHeap, (itemsKey[itemIndex], itemIndex))
+    counter = 0
+    while True:
+        counter += 1
+        if len(toProduceHeap) > 0:
+            itemKey, itemIndex = heapq.heappop(toProduceHeap)
+            if states[itemIndex] != TO_PRODUCE:
+                continue
+            if itemIndex in overproductionItems:
+                states[itemIndex] = TO_PRODUCE_AT_END
+                heapq.heappush(toProduceAtEndHeap, (itemKey, itemIndex))
+                continue
+            if itemsName[itemIndex] not in recipesByResult:
+                states[itemIndex] = NO_RECIPE
+                continue
+            if itemIndex in batchRecipes:
+                # Produce with it all items to produce of the same level, their requested rate can't change anymore
+                batchItems = [itemIndex]
+                skippedItems = []
+                while len(toProduceHeap) > 0 and toProduceHeap[0][0][0] == itemKey[0]:
+                    otherKey, otherIndex = heapq.heappop(toProduceHeap)
+                    if states[otherIndex] != TO_PRODUCE:
+                        continue
+                    if otherIndex in batchRecipes:
+                        batchItems.append(otherIndex)
+                    else:
+                        skippedItems.append((otherKey, otherIndex))
+                for skippedItem in skippedItems:
+                    heapq.heappush(toProduceHeap, skippedItem)
+                batchRecipesIndexes = [recipeIndex for batchIndex in batchItems for recipeIndex, _ in batchRecipes[batchIndex]]
+                batchProductionCount = [rates[batchIndex] * productionCountByRate for batchIndex in batchItems for _, productionCountByRate in batchRecipes[batchIndex]]
+                # Remaining rate after production come back to be produced again
+                states[batchItems] = NONE
+                produce(batchRecipesIndexes, batchProductionCount)
+                continue
+        else:
+            # Get item from end, but try with order in overproductionEndOrder
+            while len(toProduceAtEndHeap) > 0 and states[toProduceAtEndHeap[0][1]] != TO_PRODUCE_AT_END:
+                heapq.heappop(toProduceAtEndHeap)
+            if len(toProduceAtEndHeap) == 0:
+                break
+            itemIndex = -1
+            while len(overproductionEndOrder) > 0:
+                itemName = overproductionEndOrder.pop(0)
+                if itemName in itemsIndex and states[itemsIndex[itemName]] == TO_PRODUCE_AT_END:
+                    itemIndex = itemsIndex[itemName]
+                    break
+            if itemIndex == -1:
+                itemIndex = heapq.heappop(toProduceAtEndHeap)[1]
+        # Produce this item one recipe after the other
+        requestedName = itemsName[itemIndex]
+        requestedRate = rates[itemIndex]
+        assert(requestedRate > ZERO_TOLERANCE)
+        states[itemIndex] = NONE
+        for ratio, recipe in recipesByResult[requestedName]:
+            recipeIndex = recipesIndex[recipe.name]
+            if ratio == "overproduction":
+                # Try to produce maximum rate from overproduction
+                recipeItems = recipesItems[recipesOffset[recipeIndex]:recipesOffset[recipeIndex+1]]
+                recipeRates = recipesRates[recipesOffset[recipeIndex]:recipesOffset[recipeIndex+1]]
+                isOverproduced = (states[recipeItems] == OVERPRODUCTION) & (recipeRates > 0.0)
+                productionCount = max(0.0, float(numpy.max(-rates[recipeItems][isOverproduced] / recipeRates[isOverproduced], initial=0.0)))
+                if productionCount == 0.0:
+                    continue
+            else:
+                productionCount = requestedRate * ratio / recipesNetResult[(recipeIndex, itemIndex)]
+            produce([recipeIndex], [productionCount])
+            # If this recipe was for overproduction use remaining rate for over ratio
+            if ratio == "overproduction":
+                if states[itemIndex] == TO_PRODUCE:
+                    requestedRate = rates[itemIndex]
+                else:
+                    break
+    consumptionSolverStats.clear()
+    consumptionSolverStats.update({"iterations": counter, "cyclic-components": [component for component in components if len(component)>1]})
+    # Build consumption from production counts
+    consumptionRate = {}
+    for recipeIndex in numpy.flatnonzero(recipesUsed).tolist():
+        recipe = recipes[recipeIndex]
+        productionCount = float(productionCounts[recipeIndex])
+        craftingFactory = craftingFactoriesByCategories[recipe.category]
+        consumptionRate[recipe.name] = {"production-count": productionCount, "factories-name": craftingFactory.name, "factories-count": productionCount / craftingFactory.speed, "electric-consumption": 0.0, "category": recipe.category,
+                                        "results": {resultName: resultPerProduction / recipe.time * productionCount for resultName, resultPerProduction in recipe.results.items()},
+                                        "ingredients": {ingredientName: ingredientPerProduction / recipe.time * productionCount for ingredientName, ingredientPerProduction in recipe.ingredients.items()}}
+        if craftingFactory.consumptionType == "electric":
+            consumptionRate[recipe.name]["electric-consumption"] = consumptionRate[recipe.name]["factories-count"] * craftingFactory.consumptionQuantity
+    noRecipes = {itemsName[itemIndex]: float(rates[itemIndex]) for itemIndex in numpy.flatnonzero(states == NO_RECIPE).tolist()}
+    overproduction = {itemsName[itemIndex]: float(rates[itemIndex]) for itemIndex in numpy.flatnonzero(states == OVERPRODUCTION).tolist()}
+    return consumptionRate, noRecipes, overproduction
+
+
+consumptionSolvers = {"iterative": computeConsumptionRates, "linear": computeConsumptionRatesLinear, "vectorized": computeConsumptionRatesVectorized, "optimal": computeConsumptionRatesOptimal}
+# Solvers choosing between all recipes of an item instead of requiring preferencies
+consumptionSolversWithAlternatives = {"optimal"}
+
+
+def getConsumptionSolver(consumptionSolverName: str, optimalObjective: str="raw"):
+    # Solver with the same arguments than computeConsumptionRates
+    if consumptionSolverName == "optimal":
+        return functools.partial(computeConsumptionRatesOptimal, optimalObjective=optimalObjective)
+    return consumptionSolvers[consumptionSolverName]
+
+
+def getModulesEffects(craftingFactory: CraftingFactory, factoryPreference: dict, factorioEquipment: FactorioEquipment) -> tuple[float, float, float]:
+    # Return speed multiplier, productivity bonus and consumption multiplier of factory and beacons modules:
+    # {"factory": name, "modules": {module: count}, "beacons": {"count": count, "modules": {module: count}}}
+    speedBonus, productivityBonus, consumptionBonus = 0.0, 0.0, 0.0
+    modulesConfigs = [(factoryPreference.get("modules", {}), 1.0, craftingFactory.moduleSlots, craftingFactory.name)]
+    beacon = factorioEquipment.beacon
+    if "beacons" in factoryPreference:
+        if beacon is None:
+            raise ValueError("No beacon in factorio data to use beacons with {}".format(craftingFactory.name))
+        modulesConfigs.append((factoryPreference["beacons"]["modules"], factoryPreference["beacons"]["count"] * beacon.distributionEffectivity, beacon.moduleSlots, beacon.name))
+    for modulesCount, effectivity, moduleSlots, factoryName in modulesConfigs:
+        if sum(modulesCount.values()) > moduleSlots:
+            raise ValueError("{} modules can't fit in the {} module slots of {}".format(sum(modulesCount.values()), moduleSlots, factoryName))
+        for moduleName, count in modulesCount.items():
+            if moduleName not in factorioEquipment.modulesByName:
+                raise ValueError("Unknown module {}, modules are read from factorio data file".format(moduleName))
+            module = factorioEquipment.modulesByName[moduleName]
+            if factoryName != craftingFactory.name and module.productivity != 0.0:
+                raise ValueError("Module {} with productivity can't be used in {}".format(moduleName, factoryName))
+            speedBonus += module.speed * count * effectivity
+            productivityBonus += module.productivity * count * effectivity
+            consumptionBonus += module.consumption * count * effectivity
+    # Like factorio, speed and consumption can't be reduced under 20%
+    return max(1.0 + speedBonus, 0.2), productivityBonus, max(1.0 + consumptionBonus, 0.2)
+
+
+def applyFactoriesModules(recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName, factoriesPreferences: dict,
+                          factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT) -> tuple[RecipesByName, dict]:
+    # Factories preferencies are by category or by recipe, with the factory name or its modules config (see getModulesEffects).
+    # Return recipes with productivity bonus in their results, and with a "category/recipe" category when they have their own preference,
+    # modules configs of returned factories preferencies get their "effects" so solvers do not need the modules
+    if all(isinstance(factoryPreference, str) and category not in recipesByName for category, factoryPreference in factoriesPreferences.items()):
+        return recipesByName, factoriesPreferences
+    modulesRecipesByName = RecipesByName(recipesByName)
+    modulesFactoriesPreferences = {}
+    productivityByCategory = {}
+    for category, factoryPreference in factoriesPreferences.items():
+        factoryName = factoryPreference if isinstance(factoryPreference, str) else factoryPreference["factory"]
+        if factoryName not in craftingFactoriesByName:
+            raise ValueError("Unknown factory {} in factories preferencies of {}".format(factoryName, category))
+        if category in recipesByName:
+            recipe = recipesByName[category]
+            if recipe.category not in craftingFactoriesByName[factoryName].categories:
+                raise ValueError("Factory {} can't craft recipe {} of category {}".format(factoryName, category, recipe.category))
+            modulesRecipesByName[category] = Recipe(recipe.name, recipe.ingredients, recipe.time, recipe.results, "{}/{}".format(recipe.category, recipe.name))
+            category = modulesRecipesByName[category].category
+        modulesFactoriesPreferences[category] = factoryPreference
+        if not isinstance(factoryPreference, str):
+            modulesFactoriesPreferences[category] = dict(factoryPreference, effects=getModulesEffects(craftingFactoriesByName[factoryName], factoryPreference, factorioEquipment))
+            productivityByCategory[category] = modulesFactoriesPreferences[category]["effects"][1]
+    for recipeName, recipe in modulesRecipesByName.items():
+        if productivityByCategory.get(recipe.category, 0.0) != 0.0:
+            modulesRecipesByName[recipeName] = Recipe(recipe.name, recipe.ingredients, recipe.time,
+                                                      {resultName: resultPerProduction * (1.0 + productivityByCategory[recipe.category]) for resultName, resultPerProduction in recipe.results.items()},
+                                                      recipe.category)
+    return modulesRecipesByName, modulesFactoriesPreferences
+
+
 def craftingFactoriesByName2CraftingFactoriesByCategories(craftingFactoriesByName: CraftingFactoriesByName, factoriesPreferences: dict) -> CraftingFactoriesByCategories:
     craftingFactoriesByCategories = CraftingFactoriesByCategories()
     for craftingFactory in craftingFactoriesByName.values():
@@ -511,6 +2262,18 @@ def craftingFactoriesByName2CraftingFactoriesByCategories(craftingFactoriesByNam
                 raise ValueError("There are more than one factory to produce with category {} you have to set your preferencies in consumption data file".format(category))
             else:
                 craftingFactoriesByCategories[category] = craftingFactory
+    # Factories with modules, and factories of recipes with their own category (see applyFactoriesModules)
+    for category, factoryPreference in factoriesPreferences.items():
+        if isinstance(factoryPreference, str):
+            if "/" in category:
+                craftingFactoriesByCategories[category] = craftingFactoriesByName[factoryPreference]
+            continue
+        craftingFactory = craftingFactoriesByName[factoryPreference["factory"]]
+        if "effects" not in factoryPreference:
+            raise ValueError("Modules of {} preference must be applied by applyFactoriesModules".format(category))
+        speedMultiplier, _, consumptionMultiplier = factoryPreference["effects"]
+        craftingFactoriesByCategories[category] = craftingFactory._replace(speed=craftingFactory.speed * speedMultiplier,
+                                                                           consumptionQuantity=craftingFactory.consumptionQuantity * consumptionMultiplier)
     return craftingFactoriesByCategories
 
 
@@ -531,136 +2294,536 @@ def toSiSuffix(quantity: float) -> tuple[float, str]:
     return quantity, ""
 
 
-def consumption2Html(requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict, htmlFilePath: string, itemsPngCopyFolderPath: string, prevHtmlPage=None, nextHtmlPage=None):
+def consumption2Html(requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict, htmlFilePath: string, itemsPngCopyFolderPath: string, prevHtmlPage=None, nextHtmlPage=None, spriteSheetCssPath: string=None,
+                     factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT):
     electricTotal = 0.0
     consumptionRate = dict(sorted(consumptionRate.items()))
     noRecipes = dict(sorted(noRecipes.items()))
     overproduction = dict(sorted(overproduction.items()))
-    doc, tag, text = yattag.Doc().tagtext()
-    with tag('html'):
-        with tag("head"):
-            with tag("style"):
-                text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
-                text("td {text-align: right}")
-                text("th {text-align: center}")
-        with tag('body'):
-            if prevHtmlPage != None:
-                with tag('a', href=prevHtmlPage):
-                    text("Prev")
-            if nextHtmlPage != None:
-                with tag('a', href=nextHtmlPage):
-                    text("Next")
-            with tag('table'):
-                with tag('tr'):
-                    with tag('th', colspan=str(len(requestedRates))):
-                        text("Requested (item/s)")
-                with tag('tr'):
-                    for ingredientName, ingredientRate in requestedRates.items():
-                        with tag('td'):
-                            text("{:.3f}".format(ingredientRate))
-                            doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, ingredientName+".png"), alt=ingredientName, title=ingredientName)
-            doc.stag('br')
-            with tag('table', id="mainTable"):
-                with tag('thead'):
+    recipesLanes, noRecipesLanes = getBeltsLanes(consumptionRate, noRecipes, factorioEquipment)
+    def beltsLanesHtml(lanes: dict[str, float]):
+        # Lanes of each belt, in red when even the fastest belt is not enough
+        with tag('span', klass="over-one-belt" if isOverOneBelt(lanes) else "belt", title=" / ".join(lanes.keys())):
+            text(" / ".join("{:.2f}".format(beltLanes) for beltLanes in lanes.values()))
+    with open(htmlFilePath, "w", encoding="utf8") as htmlFile:
+        doc, tag, text = HtmlStreamDoc(htmlFile, htmlIndent).tagtext()
+        with tag('html'):
+            with tag("head"):
+                if spriteSheetCssPath:
+                    doc.stag("link", rel="stylesheet", href=spriteSheetCssPath)
+                with tag("style"):
+                    text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
+                    text("td {text-align: right}")
+                    text("th {text-align: center}")
+                    if len(factorioEquipment.transportBeltsByName) > 0:
+                        text(".over-one-belt {color: red; font-weight: bold}")
+            with tag('body'):
+                if prevHtmlPage != None:
+                    with tag('a', href=prevHtmlPage):
+                        text("Prev")
+                if nextHtmlPage != None:
+                    with tag('a', href=nextHtmlPage):
+                        text("Next")
+                with tag('table'):
                     with tag('tr'):
-                        with tag('th', onclick='sortTable("mainTable", 0)'):
-                            text("result")
-                            doc.stag('br')
-                            text("rate (item/s)")
-                        with tag('th', onclick='sortTable("mainTable", 1)'):
-                            text("result")
-                            doc.stag('br')
-                            text("type")
-                        with tag('th'):
-                            text("others")
-                            doc.stag('br')
-                            text("result")
-                        with tag('th', onclick='sortTable("mainTable", 3)'):
-                            text("factory")
-                            doc.stag('br')
-                            text("count")
-                        with tag('th', onclick='sortTable("mainTable", 4)'):
-                            text("factory")
-                            doc.stag('br')
-                            text("type")
-                        with tag('th', onclick='sortTable("mainTable", 5)'):
-                            text("ingredients (item/s)")
-                        with tag('th', onclick='sortTable("mainTable", 6)'):
-                            text("electricity")
-                with tag('tbody'):
-                    for production in consumptionRate.values():
-                        with tag('tr'):
-                            print(production["results"])
-                            print(type(production["results"]))
-                            print(production["results"].keys())
-                            print(next(iter(production["results"])))
-                            resultNameMax = next(iter(production["results"].keys()))
-                            for resultName, resultRate in production["results"].items():
-                                if production["results"][resultName] > production["results"][resultNameMax]:
-                                    resultNameMax = resultName
-                            with tag('td', ("data-sort", str(production["results"][resultNameMax]))):
-                                text("{:.3f}".format(production["results"][resultNameMax]))
-                            with tag('td', ("data-sort", resultNameMax)):
-                                doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, resultName+".png"), alt=resultName, title=resultName)
+                        with tag('th', colspan=str(len(requestedRates))):
+                            text("Requested (item/s)")
+                    with tag('tr'):
+                        for ingredientName, ingredientRate in requestedRates.items():
                             with tag('td'):
+                                text("{:.3f}".format(ingredientRate))
+                                itemIconHtml(doc, ingredientName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                doc.stag('br')
+                with tag('table', id="mainTable"):
+                    with tag('thead'):
+                        with tag('tr'):
+                            with tag('th', onclick='sortTable("mainTable", 0)'):
+                                text("result")
+                                doc.stag('br')
+                                text("rate (item/s)")
+                            with tag('th', onclick='sortTable("mainTable", 1)'):
+                                text("result")
+                                doc.stag('br')
+                                text("type")
+                            with tag('th'):
+                                text("others")
+                                doc.stag('br')
+                                text("result")
+                            with tag('th', onclick='sortTable("mainTable", 3)'):
+                                text("factory")
+                                doc.stag('br')
+                                text("count")
+                            with tag('th', onclick='sortTable("mainTable", 4)'):
+                                text("factory")
+                                doc.stag('br')
+                                text("type")
+                            with tag('th', onclick='sortTable("mainTable", 5)'):
+                                text("ingredients (item/s)")
+                            with tag('th', onclick='sortTable("mainTable", 6)'):
+                                text("electricity")
+                            if len(factorioEquipment.transportBeltsByName) > 0:
+                                with tag('th'):
+                                    text("belt lanes")
+                                    doc.stag('br')
+                                    for transportBelt in factorioEquipment.transportBeltsByName.values():
+                                        itemIconHtml(doc, transportBelt.name, itemsPngCopyFolderPath, spriteSheetCssPath)
+                    with tag('tbody'):
+                        for recipeName, production in consumptionRate.items():
+                            with tag('tr'):
+                                resultNameMax = next(iter(production["results"].keys()))
                                 for resultName, resultRate in production["results"].items():
-                                    if resultName != resultNameMax:
-                                        text(" + {:.3f}".format(resultRate))
-                                        doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, resultName+".png"), alt=resultName, title=resultName)
-                            with tag('td', ("data-sort", str(production["factories-count"]))):
-                                text("{:.1f}".format(production["factories-count"]))
-                            with tag('td', ("data-sort", production["factories-name"])):
-                                doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, production["factories-name"]+".png"), alt=production["factories-name"], title=production["factories-name"])
-                            with tag('td', ("data-sort", str(max(production["ingredients"].values())))):
-                                isFirst = True
-                                for ingredientName, ingredientRate in production["ingredients"].items():
-                                    if not isFirst:
-                                        text(" + ")
-                                    text("{:.3f}".format(ingredientRate))
-                                    isFirst = False
-                                    doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, ingredientName+".png"), alt=ingredientName, title=ingredientName)
-                            with tag('td', ("data-sort", str(production["electric-consumption"]))):
-                                electric, suffix = toSiSuffix(production["electric-consumption"])
+                                    if production["results"][resultName] > production["results"][resultNameMax]:
+                                        resultNameMax = resultName
+                                with tag('td', ("data-sort", str(production["results"][resultNameMax]))):
+                                    text("{:.3f}".format(production["results"][resultNameMax]))
+                                with tag('td', ("data-sort", resultNameMax)):
+                                    itemIconHtml(doc, resultName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                                with tag('td'):
+                                    for resultName, resultRate in production["results"].items():
+                                        if resultName != resultNameMax:
+                                            text(" + {:.3f}".format(resultRate))
+                                            itemIconHtml(doc, resultName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                                with tag('td', ("data-sort", str(production["factories-count"]))):
+                                    text("{:.1f}".format(production["factories-count"]))
+                                with tag('td', ("data-sort", production["factories-name"])):
+                                    itemIconHtml(doc, production["factories-name"], itemsPngCopyFolderPath, spriteSheetCssPath)
+                                with tag('td', ("data-sort", str(max(production["ingredients"].values())))):
+                                    isFirst = True
+                                    for ingredientName, ingredientRate in production["ingredients"].items():
+                                        if not isFirst:
+                                            text(" + ")
+                                        text("{:.3f}".format(ingredientRate))
+                                        isFirst = False
+                                        itemIconHtml(doc, ingredientName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                                with tag('td', ("data-sort", str(production["electric-consumption"]))):
+                                    electric, suffix = toSiSuffix(production["electric-consumption"])
+                                    text("{:.1f}{}W".format(electric, suffix))
+                                    electricTotal += production["electric-consumption"]
+                                if len(factorioEquipment.transportBeltsByName) > 0:
+                                    with tag('td'):
+                                        for key in ["results", "ingredients"]:
+                                            for itemName, lanes in recipesLanes[recipeName][key].items():
+                                                with tag('div'):
+                                                    itemIconHtml(doc, itemName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                                                    beltsLanesHtml(lanes)
+                    with tag('tfoot'):
+                        with tag('tr'):
+                            doc.stag('td')
+                            doc.stag('td')
+                            doc.stag('td')
+                            doc.stag('td')
+                            doc.stag('td')
+                            doc.stag('td')
+                            with tag('td'):
+                                electric, suffix = toSiSuffix(electricTotal)
                                 text("{:.1f}{}W".format(electric, suffix))
-                                electricTotal += production["electric-consumption"]
-                with tag('tfoot'):
+                            if len(factorioEquipment.transportBeltsByName) > 0:
+                                doc.stag('td')
+                doc.stag('br')
+                with tag('table'):
+                    with tag('tr'):
+                        with tag('th', colspan=str(len(noRecipes))):
+                            text("base rate (item/s)")
                     with tag('tr'):
-                        doc.stag('td')
-                        doc.stag('td')
-                        doc.stag('td')
-                        doc.stag('td')
-                        doc.stag('td')
-                        doc.stag('td')
-                        with tag('td'):
-                            electric, suffix = toSiSuffix(electricTotal)
-                            text("{:.1f}{}W".format(electric, suffix))
-            doc.stag('br')
-            with tag('table'):
-                with tag('tr'):
-                    with tag('th', colspan=str(len(noRecipes))):
-                        text("base rate (item/s)")
-                with tag('tr'):
-                    for ingredientName, ingredientRate in noRecipes.items():
-                        with tag('td'):
-                            text("{:.3f}".format(ingredientRate))
-                            doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, ingredientName+".png"), alt=ingredientName, title=ingredientName)
-            doc.stag('br')
-            with tag('table'):
-                with tag('tr'):
-                    with tag('th', colspan=str(len(overproduction))):
-                        text("overproduction")
-                with tag('tr'):
-                    for ingredientName, ingredientRate in overproduction.items():
-                        with tag('td'):
-                            text("{:.3f}".format(ingredientRate))
-                            doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, ingredientName+".png"), alt=ingredientName, title=ingredientName)
-            with tag('script'):
-                with open("data/script.js", 'r') as javaScriptFile:
-                    doc.asis("\n")
-                    doc.asis(javaScriptFile.read())
-    html = yattag.indent(doc.getvalue())
-    with open(htmlFilePath, "wb") as htmlFile:
-        htmlFile.write(bytes(html, "utf8"))
+                        for ingredientName, ingredientRate in noRecipes.items():
+                            with tag('td'):
+                                text("{:.3f}".format(ingredientRate))
+                                itemIconHtml(doc, ingredientName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                    if len(factorioEquipment.transportBeltsByName) > 0:
+                        with tag('tr'):
+                            for ingredientName in noRecipes.keys():
+                                with tag('td'):
+                                    if ingredientName in noRecipesLanes:
+                                        beltsLanesHtml(noRecipesLanes[ingredientName])
+                doc.stag('br')
+                with tag('table'):
+                    with tag('tr'):
+                        with tag('th', colspan=str(len(overproduction))):
+                            text("overproduction")
+                    with tag('tr'):
+                        for ingredientName, ingredientRate in overproduction.items():
+                            with tag('td'):
+                                text("{:.3f}".format(ingredientRate))
+                                itemIconHtml(doc, ingredientName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                with tag('script'):
+                    with open("data/script.js", 'r') as javaScriptFile:
+                        doc.asis("\n")
+                        doc.asis(javaScriptFile.read())
+
+
+def writeConsumptionJsonFile(requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict, jsonFilePath: string, factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT):
+    jsonData = {"requested": requestedRates, "consumption": consumptionRate, "no-recipes": noRecipes, "overproduction": overproduction}
+    if len(factorioEquipment.transportBeltsByName) > 0:
+        recipesLanes, noRecipesLanes = getBeltsLanes(consumptionRate, noRecipes, factorioEquipment)
+        overOneBelt = [[recipeName, itemName] for recipeName, flowsLanes in recipesLanes.items() for key in ["results", "ingredients"] for itemName, lanes in flowsLanes[key].items() if isOverOneBelt(lanes)]
+        overOneBelt.extend([None, itemName] for itemName, lanes in noRecipesLanes.items() if isOverOneBelt(lanes))
+        jsonData["belts-lanes"] = {"recipes": recipesLanes, "no-recipes": noRecipesLanes, "over-one-belt": overOneBelt}
+    with open(jsonFilePath, 'w') as jsonFile:
+        json.dump(jsonData, jsonFile, ensure_ascii=False, indent=3)
+
+
+# Columns of csv and parquet consumption files, one row by requested rate, recipe result or ingredient, base rate and overproduction
+CONSUMPTION_COLUMNS = ["kind", "recipe", "category", "factory", "production-count", "factories-count", "electric-consumption", "item", "rate"]
+
+
+def consumptionRows(requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict):
+    # Yield rows with CONSUMPTION_COLUMNS values, recipes columns are None for items rows
+    for itemName, rate in requestedRates.items():
+        yield ("requested", None, None, None, None, None, None, itemName, rate)
+    for recipeName, production in consumptionRate.items():
+        recipeValues = (recipeName, production["category"], production["factories-name"], production["production-count"], production["factories-count"], production["electric-consumption"])
+        for resultName, resultRate in production["results"].items():
+            yield ("result",) + recipeValues + (resultName, resultRate)
+        for ingredientName, ingredientRate in production["ingredients"].items():
+            yield ("ingredient",) + recipeValues + (ingredientName, ingredientRate)
+    for itemName, rate in noRecipes.items():
+        yield ("no-recipe", None, None, None, None, None, None, itemName, rate)
+    for itemName, rate in overproduction.items():
+        yield ("overproduction", None, None, None, None, None, None, itemName, rate)
+
+
+def writeConsumptionCsvFile(requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict, csvFilePath: string):
+    with open(csvFilePath, 'w', newline='') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(CONSUMPTION_COLUMNS)
+        writer.writerows(["" if value is None else value for value in row] for row in consumptionRows(requestedRates, consumptionRate, noRecipes, overproduction))
+
+
+def writeConsumptionParquetFile(requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict, parquetFilePath: string, batchSize: int=4096):
+    # Rows are written by batch, pyarrow is only needed for this format
+    import pyarrow
+    import pyarrow.parquet
+    schema = pyarrow.schema([(column, pyarrow.float64() if column in {"production-count", "factories-count", "electric-consumption", "rate"} else pyarrow.string()) for column in CONSUMPTION_COLUMNS])
+    with pyarrow.parquet.ParquetWriter(str(parquetFilePath), schema) as writer:
+        rows = consumptionRows(requestedRates, consumptionRate, noRecipes, overproduction)
+        while True:
+            batch = list(itertools.islice(rows, batchSize))
+            if len(batch) == 0:
+                break
+            writer.write_table(pyarrow.Table.from_pydict(dict(zip(CONSUMPTION_COLUMNS, (list(values) for values in zip(*batch)))), schema=schema))
+
+
+# Consumption file formats with their file extension
+CONSUMPTION_FORMATS = {"html": ".html", "json": ".json", "csv": ".csv", "parquet": ".parquet"}
+
+
+def writeConsumptionFile(outputFormat: str, requestedRates: dict, consumptionRate: dict, noRecipes: dict, overproduction: dict, filePath: string, spriteSheetCssPath: string=None,
+                         factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT):
+    if outputFormat == "html":
+        consumption2Html(requestedRates, consumptionRate, noRecipes, overproduction, filePath, "img", spriteSheetCssPath=spriteSheetCssPath, factorioEquipment=factorioEquipment)
+    elif outputFormat == "json":
+        writeConsumptionJsonFile(requestedRates, consumptionRate, noRecipes, overproduction, filePath, factorioEquipment)
+    elif outputFormat == "csv":
+        writeConsumptionCsvFile(requestedRates, consumptionRate, noRecipes, overproduction, filePath)
+    elif outputFormat == "parquet":
+        writeConsumptionParquetFile(requestedRates, consumptionRate, noRecipes, overproduction, filePath)
+    else:
+        raise ValueError("Unknown consumption format {}, it must be one of {}".format(outputFormat, list(CONSUMPTION_FORMATS.keys())))
+
+
+# Recipes, factories and factorio equipment shared by all consumption data of a batch, set once by process
+consumptionBatchContext = {}
+
+
+def initConsumptionBatch(recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName, consumptionSolverName: str,
+                         factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT, optimalObjective: str="raw"):
+    consumptionBatchContext.clear()
+    consumptionBatchContext["recipesByName"] = recipesByName
+    consumptionBatchContext["craftingFactoriesByName"] = craftingFactoriesByName
+    consumptionBatchContext["factorioEquipment"] = factorioEquipment
+    consumptionBatchContext["consumptionSolver"] = getConsumptionSolver(consumptionSolverName, optimalObjective)
+    consumptionBatchContext["keepAlternatives"] = consumptionSolverName in consumptionSolversWithAlternatives
+    consumptionBatchContext["recipesByResultByPreferences"] = {}
+    # Unit consumptions already known by the batch process, the new ones are sent back to it
+    consumptionBatchContext["unitConsumptionKeys"] = set(unitConsumptionCache.keys()) if unitConsumptionCache is not None else set()
+
+
+def getConsumptionBatchGlobals() -> dict:
+    # Output and debug module globals set by main, given to workers that are not forked
+    return {"htmlIndent": htmlIndent, "traceLevel": traceLevel, "unitConsumptionCacheEnabled": unitConsumptionCache is not None}
+
+
+def initConsumptionBatchWorker(recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName, consumptionSolverName: str,
+                               factorioEquipment: FactorioEquipment, optimalObjective: str, batchGlobals: dict):
+    global htmlIndent, traceLevel, unitConsumptionCache, traceFile
+    htmlIndent, traceLevel = batchGlobals["htmlIndent"], batchGlobals["traceLevel"]
+    if not batchGlobals["unitConsumptionCacheEnabled"]:
+        unitConsumptionCache = None
+    elif unitConsumptionCache is None:
+        unitConsumptionCache = {}
+    # Workers do not write in the trace file of the batch process
+    traceFile = None
+    initConsumptionBatch(recipesByName, craftingFactoriesByName, consumptionSolverName, factorioEquipment, optimalObjective)
+
+
+def solveConsumptionBatchContext(consumptionDataName: str, consumptionData: tuple[dict, tuple[dict, list[str]], dict[str, str]]) -> tuple[dict, dict, dict]:
+    requestedRates, recipesPreferences, factoriesPreferences = consumptionData
+    # Consumption data with the same recipes preferencies and factories modules share the same recipes by result
+    recipesByName = consumptionBatchContext["recipesByName"]
+    modulesPreferences = {category: factoryPreference for category, factoryPreference in factoriesPreferences.items() if not isinstance(factoryPreference, str) or category in recipesByName}
+    recipesPreferencesKey = json.dumps([recipesPreferences[0], modulesPreferences], sort_keys=True)
+    recipesByResultByPreferences = consumptionBatchContext["recipesByResultByPreferences"]
+    if recipesPreferencesKey not in recipesByResultByPreferences:
+        modulesRecipesByName, modulesFactoriesPreferences = applyFactoriesModules(recipesByName, consumptionBatchContext["craftingFactoriesByName"], modulesPreferences, consumptionBatchContext["factorioEquipment"])
+        recipesByResultByPreferences[recipesPreferencesKey] = (recipesByName2recipesByResult(modulesRecipesByName, recipesPreferences[0], consumptionBatchContext["keepAlternatives"]), modulesFactoriesPreferences)
+    recipesByResult, modulesFactoriesPreferences = recipesByResultByPreferences[recipesPreferencesKey]
+    factoriesPreferences = {category: factoryPreference for category, factoryPreference in factoriesPreferences.items() if category not in modulesPreferences} | modulesFactoriesPreferences
+    if traceFile is not None:
+        writeTrace({"consumption": consumptionDataName})
+    return consumptionBatchContext["consumptionSolver"](recipesByResult, requestedRates, consumptionBatchContext["craftingFactoriesByName"], factoriesPreferences, list(recipesPreferences[1]))
+
+
+def getNewUnitConsumptions() -> dict:
+    # Unit consumptions computed since the last call, to send them back to the batch process
+    newUnitConsumptions = {}
+    if unitConsumptionCache is not None:
+        newUnitConsumptions = {cacheKey: unitConsumption for cacheKey, unitConsumption in unitConsumptionCache.items() if cacheKey not in consumptionBatchContext["unitConsumptionKeys"]}
+        consumptionBatchContext["unitConsumptionKeys"].update(newUnitConsumptions.keys())
+    return newUnitConsumptions
+
+
+def solveConsumptionBatchData(consumptionDataName: str, consumptionData: tuple[dict, tuple[dict, list[str]], dict[str, str]], outputDirPath: string, outputFormats: list[str], spriteSheetCssPath: string=None) -> tuple[list[str], dict]:
+    requestedRates = consumptionData[0]
+    consumption, noRecipes, overproduction = solveConsumptionBatchContext(consumptionDataName, consumptionData)
+    writtenFilePaths = []
+    for outputFormat in outputFormats:
+        writtenFilePaths.append(os.path.join(outputDirPath, consumptionDataName+CONSUMPTION_FORMATS[outputFormat]))
+        writeConsumptionFile(outputFormat, requestedRates, consumption, noRecipes, overproduction, writtenFilePaths[-1], spriteSheetCssPath, consumptionBatchContext["factorioEquipment"])
+    return writtenFilePaths, getNewUnitConsumptions()
+
+
+def solveConsumptionBatch(consumptionDataByName: dict, recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName, consumptionSolverName: str,
+                          outputDirPath: string, outputFormats: list[str], jobs: int, spriteSheetCssPath: string=None,
+                          factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT, optimalObjective: str="raw") -> list[str]:
+    writtenFilePaths = []
+    if jobs <= 1:
+        initConsumptionBatch(recipesByName, craftingFactoriesByName, consumptionSolverName, factorioEquipment, optimalObjective)
+        for consumptionDataName, consumptionData in consumptionDataByName.items():
+            writtenFilePaths.extend(solveConsumptionBatchData(consumptionDataName, consumptionData, outputDirPath, outputFormats, spriteSheetCssPath)[0])
+        return writtenFilePaths
+    # Each worker get recipes and factories once at start, then only consumption data are sent
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=initConsumptionBatchWorker, initargs=(recipesByName, craftingFactoriesByName, consumptionSolverName, factorioEquipment, optimalObjective, getConsumptionBatchGlobals())) as executor:
+        futures = [executor.submit(solveConsumptionBatchData, consumptionDataName, consumptionData, outputDirPath, outputFormats, spriteSheetCssPath)
+                   for consumptionDataName, consumptionData in consumptionDataByName.items()]
+        for future in futures:
+            dataWrittenFilePaths, newUnitConsumptions = future.result()
+            writtenFilePaths.extend(dataWrittenFilePaths)
+            if unitConsumptionCache is not None:
+                unitConsumptionCache.update(newUnitConsumptions)
+    return writtenFilePaths
+
+
+def loadSweep(sweepJsonFilePath: string, consumptionData: tuple[dict, tuple[dict, list[str]], dict[str, str]]) -> dict[str, tuple[dict, tuple[dict, tuple[dict, list[str]], dict[str, str]]]]:
+    # Sweep file give values to try for requested rates, factories and recipes preferencies:
+    # {"requested": {"item": [rate, ...]}, "factories": {"category": [factory, ...]}, "recipes": {"item": [[{"recipe": ratio}], ...]}}
+    # Return parameters and consumption data of each variant of the cartesian product, by variant name
+    with open(sweepJsonFilePath, 'r') as sweepJsonFile:
+        sweepJson = json.load(sweepJsonFile)
+    parametersValues = []
+    for section in ["requested", "factories", "recipes"]:
+        for key, values in sweepJson.get(section, {}).items():
+            if len(values) == 0:
+                raise ValueError("No value to sweep for {} {} in \"{}\"".format(section, key, sweepJsonFilePath))
+            parametersValues.append((section, key, values))
+    variants = {}
+    for valuesIndexes in itertools.product(*[range(len(values)) for _, _, values in parametersValues]):
+        requestedRates, recipesPreferences, factoriesPreferences = copy.deepcopy(consumptionData)
+        sections = {"requested": requestedRates, "factories": factoriesPreferences, "recipes": recipesPreferences[0]}
+        parameters = {}
+        for (section, key, values), valueIndex in zip(parametersValues, valuesIndexes):
+            sections[section][key] = values[valueIndex]
+            parameters["{}.{}".format(section, key)] = values[valueIndex]
+        variants["variant{}".format(len(variants))] = (parameters, (requestedRates, recipesPreferences, factoriesPreferences))
+    return variants
+
+
+def getConsumptionMetrics(consumptionRate: dict, noRecipes: dict, overproduction: dict) -> dict:
+    factoriesCount = Counter()
+    for production in consumptionRate.values():
+        factoriesCount[production["factories-name"]] += production["factories-count"]
+    return {"factories-count": sum(factoriesCount.values()), "factories": dict(factoriesCount),
+            "electric-consumption": sum(production["electric-consumption"] for production in consumptionRate.values()),
+            "raw": noRecipes, "overproduction": overproduction}
+
+
+def solveSweepVariant(variantName: str, consumptionData: tuple[dict, tuple[dict, list[str]], dict[str, str]]) -> tuple[dict, dict]:
+    return getConsumptionMetrics(*solveConsumptionBatchContext(variantName, consumptionData)), getNewUnitConsumptions()
+
+
+def solveSweep(variants: dict, recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName, consumptionSolverName: str, jobs: int,
+               factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT, optimalObjective: str="raw") -> dict[str, dict]:
+    # Same workers than consumption batch, but only metrics are sent back
+    metricsByVariant = {}
+    if jobs <= 1:
+        initConsumptionBatch(recipesByName, craftingFactoriesByName, consumptionSolverName, factorioEquipment, optimalObjective)
+        for variantName, (_, consumptionData) in variants.items():
+            metricsByVariant[variantName] = solveSweepVariant(variantName, consumptionData)[0]
+        return metricsByVariant
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=initConsumptionBatchWorker, initargs=(recipesByName, craftingFactoriesByName, consumptionSolverName, factorioEquipment, optimalObjective, getConsumptionBatchGlobals())) as executor:
+        futures = {variantName: executor.submit(solveSweepVariant, variantName, consumptionData) for variantName, (_, consumptionData) in variants.items()}
+        for variantName, future in futures.items():
+            metricsByVariant[variantName], newUnitConsumptions = future.result()
+            if unitConsumptionCache is not None:
+                unitConsumptionCache.update(newUnitConsumptions)
+    return metricsByVariant
+
+
+def writeSweepFile(variants: dict, metricsByVariant: dict[str, dict], sweepFilePath: string):
+    # Json file with parameters and metrics of each variant, or csv table with a column by parameter, factory, raw item and overproduced item
+    if not str(sweepFilePath).endswith(".csv"):
+        jsonData = {variantName: {"parameters": parameters, "metrics": metricsByVariant[variantName]} for variantName, (parameters, _) in variants.items()}
+        with open(sweepFilePath, 'w') as jsonFile:
+            json.dump(jsonData, jsonFile, ensure_ascii=False, indent=3)
+        return
+    parametersNames = list(dict.fromkeys(name for parameters, _ in variants.values() for name in parameters.keys()))
+    metricsColumns = {}
+    for key in ["factories", "raw", "overproduction"]:
+        metricsColumns[key] = sorted({name for metrics in metricsByVariant.values() for name in metrics[key].keys()})
+    with open(sweepFilePath, 'w', newline='') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(["variant"] + parametersNames + ["factories-count", "electric-consumption", "electric"] +
+                        ["{}:{}".format(key, name) for key, names in metricsColumns.items() for name in names])
+        for variantName, (parameters, _) in variants.items():
+            metrics = metricsByVariant[variantName]
+            electric, suffix = toSiSuffix(metrics["electric-consumption"])
+            row = [variantName]
+            for parameterName in parametersNames:
+                value = parameters.get(parameterName, "")
+                row.append(value if isinstance(value, (int, float, str)) else json.dumps(value))
+            row.extend([metrics["factories-count"], metrics["electric-consumption"], "{:.1f}{}W".format(electric, suffix)])
+            for key, names in metricsColumns.items():
+                row.extend(metrics[key].get(name, "") for name in names)
+            writer.writerow(row)
+
+
+class ConsumptionSession:
+    # Solved consumption kept in memory and updated when requested rates or preferencies change
+    def __init__(self, recipesByName: RecipesByName, craftingFactoriesByName: CraftingFactoriesByName, consumptionSolverName: str,
+                 requestedRates: dict, recipesPreferences: tuple[dict, list[str]], factoriesPreferences: dict[str, str],
+                 factorioEquipment: FactorioEquipment=NO_FACTORIO_EQUIPMENT, optimalObjective: str="raw"):
+        self.recipesByName = recipesByName
+        self.craftingFactoriesByName = craftingFactoriesByName
+        self.consumptionSolverName = consumptionSolverName
+        self.consumptionSolver = getConsumptionSolver(consumptionSolverName, optimalObjective)
+        self.factorioEquipment = factorioEquipment
+        self.requestedRates = dict(requestedRates)
+        self.recipesPreferences = (dict(recipesPreferences[0]), list(recipesPreferences[1]))
+        self.factoriesPreferences = dict(factoriesPreferences)
+        self.recipesByResult, self.modulesFactoriesPreferences = self.getRecipesByResult(self.recipesPreferences[0], self.factoriesPreferences)
+        self.solve()
+
+    def getRecipesByResult(self, recipesPreferences: dict, factoriesPreferences: dict) -> tuple[RecipesByResult, dict]:
+        # Recipes by result with the productivity of factories modules
+        modulesRecipesByName, modulesFactoriesPreferences = applyFactoriesModules(self.recipesByName, self.craftingFactoriesByName, factoriesPreferences, self.factorioEquipment)
+        return recipesByName2recipesByResult(modulesRecipesByName, recipesPreferences, self.consumptionSolverName in consumptionSolversWithAlternatives), modulesFactoriesPreferences
+
+    def solve(self) -> tuple[dict, dict, dict]:
+        self.craftingFactoriesByCategories = craftingFactoriesByName2CraftingFactoriesByCategories(self.craftingFactoriesByName, self.modulesFactoriesPreferences)
+        self.consumptionRate, self.noRecipes, self.overproduction = self.consumptionSolver(self.recipesByResult, self.requestedRates, self.craftingFactoriesByName,
+                                                                                           self.modulesFactoriesPreferences, list(self.recipesPreferences[1]))
+        return self.consumptionRate, self.noRecipes, self.overproduction
+
+    def getState(self) -> tuple:
+        # Copy of everything commands change, consumption is updated in place by addRequestedUnitConsumption
+        return (dict(self.requestedRates), (dict(self.recipesPreferences[0]), list(self.recipesPreferences[1])), dict(self.factoriesPreferences),
+                self.recipesByResult, self.modulesFactoriesPreferences, self.craftingFactoriesByCategories,
+                copy.deepcopy(self.consumptionRate), dict(self.noRecipes), dict(self.overproduction))
+
+    def setState(self, state: tuple):
+        (self.requestedRates, self.recipesPreferences, self.factoriesPreferences, self.recipesByResult, self.modulesFactoriesPreferences,
+         self.craftingFactoriesByCategories, self.consumptionRate, self.noRecipes, self.overproduction) = state
+
+    def addRequestedRate(self, itemName: str, rate: float) -> tuple[dict, dict, dict]:
+        requestedRate = self.requestedRates.get(itemName, 0.0) + rate
+        if math.isclose(requestedRate, 0.0, abs_tol=ZERO_TOLERANCE):
+            self.requestedRates.pop(itemName, None)
+        elif requestedRate < 0.0:
+            raise ValueError("Requested rate of {} can't be negative".format(itemName))
+        else:
+            self.requestedRates[itemName] = requestedRate
+        if self.addRequestedUnitConsumption(itemName, rate):
+            return self.consumptionRate, self.noRecipes, self.overproduction
+        return self.solve()
+
+    def setRequestedRate(self, itemName: str, rate: float) -> tuple[dict, dict, dict]:
+        return self.addRequestedRate(itemName, rate - self.requestedRates.get(itemName, 0.0))
+
+    def setFactoryPreference(self, category: str, factoryPreference: str | dict) -> tuple[dict, dict, dict]:
+        # Category or recipe name, with factory name or its modules config
+        factoryName = factoryPreference if isinstance(factoryPreference, str) else factoryPreference["factory"]
+        if category in self.recipesByName:
+            factoryCategory = self.recipesByName[category].category
+        else:
+            factoryCategory = category
+        if factoryName not in self.craftingFactoriesByName or factoryCategory not in self.craftingFactoriesByName[factoryName].categories:
+            raise ValueError("Factory {} can't craft category {}".format(factoryName, factoryCategory))
+        factoriesPreferences = dict(self.factoriesPreferences)
+        factoriesPreferences[category] = factoryPreference
+        self.recipesByResult, self.modulesFactoriesPreferences = self.getRecipesByResult(self.recipesPreferences[0], factoriesPreferences)
+        self.factoriesPreferences = factoriesPreferences
+        return self.solve()
+
+    def setRecipesPreference(self, resultName: str, recipesNamesRatiosList: list[dict[str, float]]) -> tuple[dict, dict, dict]:
+        recipesPreferences = dict(self.recipesPreferences[0])
+        recipesPreferences[resultName] = recipesNamesRatiosList
+        self.recipesByResult, self.modulesFactoriesPreferences = self.getRecipesByResult(recipesPreferences, self.factoriesPreferences)
+        self.recipesPreferences[0][resultName] = recipesNamesRatiosList
+        return self.solve()
+
+    def addRequestedUnitConsumption(self, itemName: str, rate: float) -> bool:
+        # Update the solved consumption without solving again when the item sub-chain only request items without recipe
+        if self.consumptionSolverName != "iterative" or unitConsumptionCache is None or itemName in self.overproduction:
+            return False
+        unitConsumption = getUnitConsumption(itemName, self.recipesByResult, self.craftingFactoriesByCategories,
+                                             getUnitConsumptionPreferenciesKey(self.recipesByResult, self.craftingFactoriesByCategories), set())
+        if unitConsumption is None or any(requestedName in self.recipesByResult for requestedName in unitConsumption[1].keys()):
+            return False
+        addUnitConsumption(self.consumptionRate, unitConsumption, rate, self.craftingFactoriesByCategories)
+        for recipeName in unitConsumption[0].keys():
+            if math.isclose(self.consumptionRate[recipeName]["production-count"], 0.0, abs_tol=ZERO_TOLERANCE):
+                del self.consumptionRate[recipeName]
+        for requestedName, unitRate in unitConsumption[1].items():
+            self.noRecipes[requestedName] = self.noRecipes.get(requestedName, 0.0) + unitRate * rate
+            if math.isclose(self.noRecipes[requestedName], 0.0, abs_tol=ZERO_TOLERANCE):
+                del self.noRecipes[requestedName]
+        return True
+
+
+def runConsumptionService(consumptionSession: ConsumptionSession, inputFile, outputFile):
+    # One json command by line, answer one json line with the updated consumption or the error:
+    # {"add": {"item": rate}}, {"set": {"item": rate}}, {"factories": {"category or recipe": "factory" or {"factory", "modules", "beacons"}}}, {"recipes": {"item": [{"recipe": ratio}]}}, {"solve": true}
+    for line in inputFile:
+        if line.strip() == "":
+            continue
+        # A command failing on one of its changes leaves the session as before the line
+        state = consumptionSession.getState()
+        try:
+            command = json.loads(line)
+            if not isinstance(command, dict) or any(not isinstance(command[key], dict) for key in ["add", "set", "factories", "recipes"] if key in command):
+                raise ValueError("Command must be an object with add, set, factories and recipes objects")
+            for key in ["add", "set"]:
+                for itemName, rate in command.get(key, {}).items():
+                    if not isinstance(rate, (int, float)) or isinstance(rate, bool):
+                        raise ValueError("Rate of {} must be a number".format(itemName))
+            startTime = time.perf_counter()
+            for itemName, rate in command.get("add", {}).items():
+                consumptionSession.addRequestedRate(itemName, rate)
+            for itemName, rate in command.get("set", {}).items():
+                consumptionSession.setRequestedRate(itemName, rate)
+            for category, factoryPreference in command.get("factories", {}).items():
+                consumptionSession.setFactoryPreference(category, factoryPreference)
+            for resultName, recipesNamesRatiosList in command.get("recipes", {}).items():
+                consumptionSession.setRecipesPreference(resultName, recipesNamesRatiosList)
+            if command.get("solve", False):
+                consumptionSession.solve()
+            answer = {"requested": consumptionSession.requestedRates, "consumption": consumptionSession.consumptionRate,
+                      "no-recipes": consumptionSession.noRecipes, "overproduction": consumptionSession.overproduction,
+                      "duration": time.perf_counter() - startTime}
+        except (ValueError, KeyError, TypeError, AttributeError, AssertionError, json.JSONDecodeError) as error:
+            consumptionSession.setState(state)
+            answer = {"error": "{}: {}".format(type(error).__name__, error)}
+        outputFile.write(json.dumps(answer, ensure_ascii=False) + "\n")
+        outputFile.flush()
 
 
 def loadGroups(jsonFilePath: string) -> dict[str, list[str]]:
@@ -669,56 +2832,167 @@ def loadGroups(jsonFilePath: string) -> dict[str, list[str]]:
     return recipesGroups
 
 
-def getRequestedAndProvidedList(recipes: RecipesByName) -> tuple[set[str], set[str]]:
-    ingredients = set()
-    results = set()
-    for recipe in recipes.values():
-        {ingredient: ingredients.add(ingredient) for ingredient in recipe.ingredients.keys()}
-        {result: results.add(result) for result in recipe.results.keys()}
-    return (ingredients.difference(results), results)
-
-
-def generateGroupsDependencies(requestedAndProvidedListByGroup: dict[str, tuple[set[str], set[str]]]) -> dict[str, dict[str, set[str]]]:
-    # Compute a list of all item request from a group to another
-    groupRequestItems = set()
-    for groupName, (requestedList, _) in requestedAndProvidedListByGroup.items():
-        groupRequestItems.update(requestedList)
-    # Compute group provider for each group requested item
-    itemProvider = {}
-    for groupName, (_, providedList) in requestedAndProvidedListByGroup.items():
-        for providedItemName in providedList:
-            if providedItemName in groupRequestItems:
-                if providedItemName not in itemProvider:
-                    itemProvider[providedItemName] = set()
-                itemProvider[providedItemName].add(groupName)
-    # Compute group dependencies
-    groupsDependencies = dict()
-    for group1Name, (requestedList, _) in requestedAndProvidedListByGroup.items():
-        groupsDependencies[group1Name] = dict()
-        for requestedItemName in requestedList:
-            if requestedItemName in itemProvider:
-                if len(itemProvider[requestedItemName])>1:
-                    print('Warning: "{}" in "{}" provided by [{}]'.format(requestedItemName, group1Name, ", ".join(itemProvider[requestedItemName])))
-                group2Name = next(iter(itemProvider[requestedItemName]))
-            else:
-                group2Name = ""
-            if group2Name not in groupsDependencies[group1Name]:
-                groupsDependencies[group1Name][group2Name] = set()
-            groupsDependencies[group1Name][group2Name].add(requestedItemName)
-    return groupsDependencies
-
-
-def generateItemsUsedByGroup(groupsDependencies: dict[str, dict[str, set[str]]]) -> dict[str, dict[str, set[str]]]:
-    itemsUsedByGroup = dict()
-    for group1Name, dependencies in groupsDependencies.items():
-        for group2Name, itemsNames in dependencies.items():
-            for itemName in itemsNames:
-                if group2Name not in itemsUsedByGroup:
-                    itemsUsedByGroup[group2Name] = dict()
-                if itemName not in itemsUsedByGroup[group2Name]:
-                    itemsUsedByGroup[group2Name][itemName] = set()
-                itemsUsedByGroup[group2Name][itemName].add(group1Name)
-    return itemsUsedByGroup
+def writeGroupsFile(recipesGroups: dict[str, list[str]], jsonFilePath: string):
+    # Same layout than data/recipesGroups.json, one line by group
+    with open(jsonFilePath, 'w') as jsonFile:
+        jsonFile.write("{\n")
+        jsonFile.write(",\n".join("   {}: {}".format(json.dumps(groupName), json.dumps(recipesNames, ensure_ascii=False)) for groupName, recipesNames in recipesGroups.items()))
+        jsonFile.write("\n}\n")
+
+
+def getRecipesLinks(recipeGraph: RecipeGraph) -> dict[str, dict[str, float]]:
+    # Undirected weighted graph of recipes, each item link a recipe producing it to a recipe consuming it
+    links = {recipeName: {} for recipeName in recipeGraph.recipes.keys()}
+    for itemName in recipeGraph.items():
+        for producer in recipeGraph.producingRecipes(itemName):
+            for consumer in recipeGraph.consumingRecipes(itemName):
+                if producer.name != consumer.name:
+                    links[producer.name][consumer.name] = links[producer.name].get(consumer.name, 0.0) + 1.0
+                    links[consumer.name][producer.name] = links[consumer.name].get(producer.name, 0.0) + 1.0
+    return links
+
+
+def partitionRecipes(recipeGraph: RecipeGraph, groupsCount: int, refinePasses: int=4) -> dict[str, list[str]]:
+    # Greedy modularity clustering (Clauset-Newman-Moore) merging groups until groupsCount remain, then recipes are moved
+    # to the neighbor group improving the modularity, so items flows stay mostly inside groups
+    links = getRecipesLinks(recipeGraph)
+    degrees = {recipeName: sum(recipeLinks.values()) for recipeName, recipeLinks in links.items()}
+    totalWeight = sum(degrees.values()) / 2
+    if totalWeight == 0:
+        totalWeight = 1.0
+    def mergeGain(weight: float, degree1: float, degree2: float) -> float:
+        return weight / totalWeight - degree1 * degree2 / (2 * totalWeight * totalWeight)
+    # Each recipe start in its own group named by the recipe
+    groupsLinks = {recipeName: dict(recipeLinks) for recipeName, recipeLinks in links.items()}
+    groupsDegrees = dict(degrees)
+    groupsMembers = {recipeName: [recipeName] for recipeName in links.keys()}
+    versions = {recipeName: 0 for recipeName in links.keys()}
+    # Heap of merges with the versions of both groups when pushed, a merge is outdated when one group changed since
+    heap = [(-mergeGain(weight, groupsDegrees[group1], groupsDegrees[group2]), group1, 0, group2, 0)
+            for group1, groupLinks in groupsLinks.items() for group2, weight in groupLinks.items() if group1 < group2]
+    heapq.heapify(heap)
+    while len(groupsMembers) > groupsCount and len(heap) > 0:
+        _, group1, version1, group2, version2 = heapq.heappop(heap)
+        if group1 not in groupsMembers or group2 not in groupsMembers or versions[group1] != version1 or versions[group2] != version2:
+            continue
+        # Merge the smaller group in the bigger one
+        if len(groupsMembers[group1]) < len(groupsMembers[group2]):
+            group1, group2 = group2, group1
+        groupsMembers[group1].extend(groupsMembers.pop(group2))
+        groupsDegrees[group1] += groupsDegrees.pop(group2)
+        for neighbor, weight in groupsLinks.pop(group2).items():
+            del groupsLinks[neighbor][group2]
+            if neighbor != group1:
+                groupsLinks[group1][neighbor] = groupsLinks[group1].get(neighbor, 0.0) + weight
+                groupsLinks[neighbor][group1] = groupsLinks[group1][neighbor]
+        versions[group1] += 1
+        for neighbor, weight in groupsLinks[group1].items():
+            heapq.heappush(heap, (-mergeGain(weight, groupsDegrees[group1], groupsDegrees[neighbor]), group1, versions[group1], neighbor, versions[neighbor]))
+    # Groups without links between them are merged by size
+    while len(groupsMembers) > groupsCount:
+        group2, group1 = sorted(groupsMembers.keys(), key=lambda groupName: len(groupsMembers[groupName]))[:2]
+        groupsMembers[group1].extend(groupsMembers.pop(group2))
+        groupsDegrees[group1] += groupsDegrees.pop(group2)
+    # Refine by moving recipes one by one, a group is never emptied
+    recipesGroup = {recipeName: groupName for groupName, members in groupsMembers.items() for recipeName in members}
+    groupsSize = {groupName: len(members) for groupName, members in groupsMembers.items()}
+    for _ in range(refinePasses):
+        movesCount = 0
+        for recipeName, recipeLinks in links.items():
+            currentGroup = recipesGroup[recipeName]
+            if groupsSize[currentGroup] == 1:
+                continue
+            weightsByGroup = {}
+            for neighbor, weight in recipeLinks.items():
+                weightsByGroup[recipesGroup[neighbor]] = weightsByGroup.get(recipesGroup[neighbor], 0.0) + weight
+            currentDegree = groupsDegrees[currentGroup] - degrees[recipeName]
+            currentGain = mergeGain(weightsByGroup.get(currentGroup, 0.0), degrees[recipeName], currentDegree)
+            bestGroup, bestGain = currentGroup, currentGain
+            for groupName, weight in weightsByGroup.items():
+                gain = mergeGain(weight, degrees[recipeName], groupsDegrees[groupName])
+                if groupName != currentGroup and gain > bestGain + ZERO_TOLERANCE / totalWeight:
+                    bestGroup, bestGain = groupName, gain
+            if bestGroup != currentGroup:
+                recipesGroup[recipeName] = bestGroup
+                groupsSize[currentGroup] -= 1
+                groupsSize[bestGroup] += 1
+                groupsDegrees[currentGroup] -= degrees[recipeName]
+                groupsDegrees[bestGroup] += degrees[recipeName]
+                movesCount += 1
+        if movesCount == 0:
+            break
+    # Groups sorted by size, named after their most linked recipe in the same camel case than data/recipesGroups.json
+    membersByGroup = {}
+    for recipeName in recipeGraph.recipes.keys():
+        if recipesGroup[recipeName] not in membersByGroup:
+            membersByGroup[recipesGroup[recipeName]] = []
+        membersByGroup[recipesGroup[recipeName]].append(recipeName)
+    recipesGroups = {}
+    for members in sorted(membersByGroup.values(), key=len, reverse=True):
+        mainRecipeName = max(members, key=lambda recipeName: degrees[recipeName])
+        words = mainRecipeName.replace(" ", "-").split("-")
+        groupName = words[0] + "".join(word[:1].upper() + word[1:] for word in words[1:])
+        if groupName in recipesGroups:
+            groupName += str(len(recipesGroups))
+        recipesGroups[groupName] = members
+    return recipesGroups
+
+
+def countCrossGroupsItems(recipesGroups: dict[str, list[str]], recipesByName: RecipesByName) -> int:
+    # Count of items requested by a group and provided by another one, as reported by analyzeGroups
+    groupsAnalysis = analyzeGroups({groupName: getRequestedAndProvidedList(RecipeGraph({recipeName: recipesByName[recipeName] for recipeName in recipesNames}))
+                                    for groupName, recipesNames in recipesGroups.items()})
+    return sum(len(itemsNames) for dependencies in groupsAnalysis.groupsDependencies.values() for providerName, itemsNames in dependencies.items() if providerName != "")
+
+
+def getRequestedAndProvidedList(recipeGraph: RecipeGraph) -> tuple[set[str], set[str]]:
+    requested = set()
+    provided = set()
+    for itemName in recipeGraph.items():
+        if recipeGraph.inDegree(itemName)>0:
+            provided.add(itemName)
+        else:
+            requested.add(itemName)
+    return (requested, provided)
+
+
+def analyzeGroups(requestedAndProvidedListByGroup: dict[str, tuple[set[str], set[str]]]) -> GroupsAnalysis:
+    # Index groups providing and requesting each item in one pass
+    itemsGroups = {}
+    for groupName, (requestedList, providedList) in requestedAndProvidedListByGroup.items():
+        for itemsList, index in [(providedList, 0), (requestedList, 1)]:
+            for itemName in itemsList:
+                if itemName not in itemsGroups:
+                    itemsGroups[itemName] = ([], [])
+                itemsGroups[itemName][index].append(groupName)
+    # The first provider in groups order is used for items with several providers
+    groupsDependencies = {groupName: {} for groupName in requestedAndProvidedListByGroup.keys()}
+    itemsUsedByGroup = {}
+    conflicts = {}
+    for itemName, (providers, consumers) in itemsGroups.items():
+        if len(consumers) == 0:
+            continue
+        if len(providers) > 1:
+            conflicts[itemName] = providers
+        providerName = providers[0] if len(providers) > 0 else ""
+        for consumerName in consumers:
+            if providerName not in groupsDependencies[consumerName]:
+                groupsDependencies[consumerName][providerName] = set()
+            groupsDependencies[consumerName][providerName].add(itemName)
+        if providerName not in itemsUsedByGroup:
+            itemsUsedByGroup[providerName] = {}
+        itemsUsedByGroup[providerName][itemName] = consumers
+    # Components come after the ones they depend on, so their depth is computed from already known depths
+    dependenciesByGroup = {groupName: [providerName for providerName in dependencies.keys() if providerName != ""] for groupName, dependencies in groupsDependencies.items()}
+    components = stronglyConnectedComponents(dependenciesByGroup)
+    depths = {}
+    for component in components:
+        componentSet = set(component)
+        depth = max((depths[providerName] + 1 for groupName in component for providerName in dependenciesByGroup[groupName] if providerName not in componentSet), default=0)
+        for groupName in component:
+            depths[groupName] = depth
+    cycles = [component[::-1] for component in components if len(component) > 1]
+    return GroupsAnalysis(itemsGroups, groupsDependencies, itemsUsedByGroup, conflicts, cycles, depths)
 
 
 def groupsDependenciesToDot(groupsDependencies: dict[str, dict[str, str]], dotFilePath: str, itemsPngCopyFolderPath: str):
@@ -739,72 +3013,111 @@ def groupsDependenciesToDot(groupsDependencies: dict[str, dict[str, str]], dotFi
         dotFile.write("}\n")
 
 
-def groupsDependenciesToHtml(groupsDependencies: dict[str, dict[str, str]], htmlFilePath: str, itemsPngCopyFolderPath: str):
-    doc, tag, text = yattag.Doc().tagtext()
-    with tag('html'):
-        with tag("head"):
-            with tag("style"):
-                text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
-        with tag('body'):
-            with tag('table', id="dependenciesTable"):
-                with tag('thead'):
-                    with tag('tr'):
-                        with tag('th', onclick='sortTable("dependenciesTable", 0)'):
-                            text("group")
-                        with tag('th', onclick='sortTable("dependenciesTable", 1)'):
-                            text("count")
-                        with tag('th'):
-                            text("dependencies")
-                with tag('tbody'):
-                    for group1Name, dependencies in groupsDependencies.items():
+def groupsDependenciesToSvg(groupsDependencies: dict[str, dict[str, str]], svgFilePath: str, itemsPngCopyFolderPath: str):
+    # Same graph than groupsDependenciesToDot without graphviz, each group is a box with its name
+    CHAR_WIDTH, PADDING = 8, 8
+    def nodeSvg(doc: HtmlStreamDoc, groupName: str, x: float, y: float, width: int, height: int):
+        with doc.tag('g'):
+            doc.stag('rect', x="{:.1f}".format(x), y="{:.1f}".format(y), width=str(width), height=str(height), rx="4", fill="white", stroke="black")
+            doc.line('text', groupName, ("text-anchor", "middle"), ("dominant-baseline", "central"), x="{:.1f}".format(x + width / 2), y="{:.1f}".format(y + height / 2))
+    edges = [(group1Name, group2Name) for group1Name, dependencies in groupsDependencies.items() for group2Name in dependencies.keys()]
+    groupsNames = list(dict.fromkeys(list(groupsDependencies.keys()) + [groupName for edge in edges for groupName in edge]))
+    writeLayeredSvg(groupsNames, edges, svgFilePath, lambda groupName: len(groupName) * CHAR_WIDTH + 2 * PADDING, nodeSvg)
+
+
+def groupsDependenciesToHtml(groupsAnalysis: GroupsAnalysis, htmlFilePath: str, itemsPngCopyFolderPath: str, spriteSheetCssPath: string=None):
+    with open(htmlFilePath, "w", encoding="utf8") as htmlFile:
+        doc, tag, text = HtmlStreamDoc(htmlFile, htmlIndent).tagtext()
+        with tag('html'):
+            with tag("head"):
+                if spriteSheetCssPath:
+                    doc.stag("link", rel="stylesheet", href=spriteSheetCssPath)
+                with tag("style"):
+                    text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
+            with tag('body'):
+                with tag('table', id="dependenciesTable"):
+                    with tag('thead'):
                         with tag('tr'):
-                            with tag('td', ("data-sort", group1Name)):
-                                text(group1Name)
-                            count = sum([len(itemNameList) for itemNameList in dependencies.values()])
-                            with tag('td', ("data-sort", str(count))):
-                                text(count)
-                            with tag('td'):
-                                with tag('table'):
-                                    with tag('tr'):
-                                        for group2Name, itemNameList in dependencies.items():
-                                            with tag('td'):
-                                                if group2Name != "":
-                                                    text(group2Name)
-                                                    doc.stag('br')
-                                                for itemName in itemNameList:
-                                                    doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, itemName+".png"), alt=itemName, title=itemName)
-            doc.stag('br')
-            itemsUsedByGroup = generateItemsUsedByGroup(groupsDependencies)
-            with tag('table', id="usedByTable"):
-                with tag('thead'):
-                    with tag('tr'):
-                        with tag('th', onclick='sortTable("usedByTable", 0)'):
-                            text("group")
-                        with tag('th', onclick='sortTable("usedByTable", 1)'):
-                            text("item")
-                        with tag('th', onclick='sortTable("usedByTable", 2)'):
-                            text("count")
-                        with tag('th'):
-                            text("used by")
-                with tag('tbody'):
-                    for group1Name, itemUsedBy in itemsUsedByGroup.items():
-                        for itemName, groups in itemUsedBy.items():
+                            with tag('th', onclick='sortTable("dependenciesTable", 0)'):
+                                text("group")
+                            with tag('th', onclick='sortTable("dependenciesTable", 1)'):
+                                text("count")
+                            with tag('th', onclick='sortTable("dependenciesTable", 2)'):
+                                text("depth")
+                            with tag('th'):
+                                text("dependencies")
+                    with tag('tbody'):
+                        for group1Name, dependencies in groupsAnalysis.groupsDependencies.items():
                             with tag('tr'):
                                 with tag('td', ("data-sort", group1Name)):
                                     text(group1Name)
-                                with tag('td', ("data-sort", itemName)):
-                                    doc.stag("img", src=os.path.join(itemsPngCopyFolderPath, itemName+".png"), alt=itemName, title=itemName)
-                                with tag('td', ("data-sort", str(len(groups)))):
-                                    text(len(groups))
+                                count = sum([len(itemNameList) for itemNameList in dependencies.values()])
+                                with tag('td', ("data-sort", str(count))):
+                                    text(count)
+                                with tag('td', ("data-sort", str(groupsAnalysis.depths[group1Name]))):
+                                    text(groupsAnalysis.depths[group1Name])
+                                with tag('td'):
+                                    with tag('table'):
+                                        with tag('tr'):
+                                            for group2Name, itemNameList in dependencies.items():
+                                                with tag('td'):
+                                                    if group2Name != "":
+                                                        text(group2Name)
+                                                        doc.stag('br')
+                                                    for itemName in itemNameList:
+                                                        itemIconHtml(doc, itemName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                doc.stag('br')
+                with tag('table', id="usedByTable"):
+                    with tag('thead'):
+                        with tag('tr'):
+                            with tag('th', onclick='sortTable("usedByTable", 0)'):
+                                text("group")
+                            with tag('th', onclick='sortTable("usedByTable", 1)'):
+                                text("item")
+                            with tag('th', onclick='sortTable("usedByTable", 2)'):
+                                text("count")
+                            with tag('th'):
+                                text("used by")
+                    with tag('tbody'):
+                        for group1Name, itemUsedBy in groupsAnalysis.itemsUsedByGroup.items():
+                            for itemName, groups in itemUsedBy.items():
+                                with tag('tr'):
+                                    with tag('td', ("data-sort", group1Name)):
+                                        text(group1Name)
+                                    with tag('td', ("data-sort", itemName)):
+                                        itemIconHtml(doc, itemName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                                    with tag('td', ("data-sort", str(len(groups)))):
+                                        text(len(groups))
+                                    with tag('td'):
+                                        text(", ".join(groups))
+                if len(groupsAnalysis.conflicts) > 0:
+                    doc.stag('br')
+                    with tag('table'):
+                        with tag('tr'):
+                            with tag('th'):
+                                text("item")
+                            with tag('th'):
+                                text("provided by")
+                        for itemName, providers in groupsAnalysis.conflicts.items():
+                            with tag('tr'):
+                                with tag('td'):
+                                    itemIconHtml(doc, itemName, itemsPngCopyFolderPath, spriteSheetCssPath)
                                 with tag('td'):
-                                    text(", ".join(groups))
-            with tag('script'):
-                with open("data/script.js", 'r') as javaScriptFile:
-                    doc.asis("\n")
-                    doc.asis(javaScriptFile.read())
-    html = yattag.indent(doc.getvalue())
-    with open(htmlFilePath, "wb") as htmlFile:
-        htmlFile.write(bytes(html, "utf8"))
+                                    text(", ".join(providers))
+                if len(groupsAnalysis.cycles) > 0:
+                    doc.stag('br')
+                    with tag('table'):
+                        with tag('tr'):
+                            with tag('th'):
+                                text("groups cycle")
+                        for cycle in groupsAnalysis.cycles:
+                            with tag('tr'):
+                                with tag('td'):
+                                    text(", ".join(cycle))
+                with tag('script'):
+                    with open("data/script.js", 'r') as javaScriptFile:
+                        doc.asis("\n")
+                        doc.asis(javaScriptFile.read())
 
 
 if __name__ == '__main__':
@@ -812,92 +3125,221 @@ if __name__ == '__main__':
     # Recipes loarders
     recipesLoarderArgs = parser.add_mutually_exclusive_group(required=True)
     recipesLoarderArgs.add_argument("--factorio-path", type=pathlib.Path, help="Load recipes from factorio path")
-    recipesLoarderArgs.add_argument("--input-json", type=pathlib.Path, help="Load recipes from json file")
+    recipesLoarderArgs.add_argument("--input-json", type=pathlib.Path, help="Load recipes from json file, or msgpack file with .msgpack extension (need msgpack), or packed recipes file with .recipes extension read lazily")
+    parser.add_argument("--load-all-prototypes", action="store_true", help="Load recipes, crafting factories and items icon from every prototype file of factorio path instead of recipe.lua only")
+    parser.add_argument("--factorio-mods", type=pathlib.Path, nargs='+', default=[], help="Mod folders loaded after base with --load-all-prototypes")
+    parser.add_argument('--jobs', type=int, default=1, help="Process count used to generate png and groups svg, and solve consumption batch")
     # Recipes filters
     recipesFilterArgs = parser.add_argument_group("Recipes filters")
     recipesFilterArgs.add_argument("--remove-recipes", type=str, nargs='+', help="To remove recipes list by recipe name")
     recipesFilterArgs.add_argument('--remove-items', type=str, nargs='+', help="To remove items list by ingredients or result name")
+    recipesFilterArgs.add_argument('--items', type=str, nargs='+', help="To keep only recipes producing or consuming these items, within the depth limits")
+    recipesFilterArgs.add_argument('--items-upstream-depth', type=int, default=-1, help="Recipes count from --items to their farthest kept ingredient, negative for no limit")
+    recipesFilterArgs.add_argument('--items-downstream-depth', type=int, default=0, help="Recipes count from --items to their farthest kept result, negative for no limit")
     recipesFilterArgs.add_argument("--remove-leafes", action="store_true", help="To remove items at the end of the tree")
     recipesFilterArgs.add_argument("--keep-leafes-only", action="store_true", help="To keep only recipe with at least one result at the end of the tree")
+    recipesFilterArgs.add_argument("--compact-recipes", action="store_true", help="Store filtered recipes in read only compact buffers with interned item names")
     # Recipes writers
     recipesWritersArgs = parser.add_argument_group("Recipes writers")
-    recipesWritersArgs.add_argument("--output-json", type=pathlib.Path, help="Generate the given json file")
+    recipesWritersArgs.add_argument("--output-json", type=pathlib.Path, help="Generate the given json file, or msgpack file with .msgpack extension (need msgpack), or packed recipes file with .recipes extension")
     recipesWritersArgs.add_argument("--output-html-usage", type=pathlib.Path, help="Generate the given HTML page with for each ingredient the usage")
     recipesWritersArgs.add_argument("--output-dot", type=pathlib.Path, help="Generate the given graphviz dot file")
+    recipesWritersArgs.add_argument("--output-svg", type=pathlib.Path, help="Generate the given svg file with the recipes graph laid out without graphviz")
     recipesWritersArgs.add_argument("--output-html-consumption", type=pathlib.Path, help="Generate the given HTML page with for each recipes the consume rate")
+    recipesWritersArgs.add_argument("--output-consumption-dir", type=pathlib.Path, help="Folder path to generate a consumption file for each consumption data of the batch")
+    recipesWritersArgs.add_argument('--output-json-consumption', type=pathlib.Path, help="Generate the given json file with the consume rate of each recipe")
+    recipesWritersArgs.add_argument('--output-csv-consumption', type=pathlib.Path, help="Generate the given csv file with a row by recipe result and ingredient, base rate and overproduction")
+    recipesWritersArgs.add_argument('--output-parquet-consumption', type=pathlib.Path, help="Generate the given parquet file with the csv consumption columns, need pyarrow")
+    recipesWritersArgs.add_argument("--output-consumption-formats", choices=list(CONSUMPTION_FORMATS.keys()), nargs='+', default=["html"], help="Consumption file formats generated in consumption dir, parquet need pyarrow")
+    recipesWritersArgs.add_argument('--output-sweep', type=pathlib.Path, help="Generate the given csv or json file with metrics of each variant of --input-sweep")
+    recipesWritersArgs.add_argument('--output-groups-data', type=pathlib.Path, help="Generate the given recipes groups file by clustering recipes into --groups-count groups, used by groups writers without --input-groups-data")
     recipesWritersArgs.add_argument('--output-groups-dir', type=pathlib.Path, help="Folder path to generate recipe file from group")
     recipesWritersArgs.add_argument('--output-groups-dot', type=pathlib.Path, help="Generate the given graphviz dot file from group")
+    recipesWritersArgs.add_argument('--output-groups-svg', type=pathlib.Path, help="Generate the given svg file with groups dependencies laid out without graphviz")
+    recipesWritersArgs.add_argument('--output-groups-svg-dir', type=pathlib.Path, help="Folder path to generate the recipes graph svg file of each group, laid out in parallel with --jobs")
     recipesWritersArgs.add_argument('--output-groups-html', type=pathlib.Path, help="Generate the given HTML file dependencies from group")
     recipesWritersArgs.add_argument('--output-png-dir', type=pathlib.Path, help="Folder path to generate png for each item from factorio path")
+    recipesWritersArgs.add_argument('--output-sprite-sheet', type=pathlib.Path, help="Generate the given png with all items icon from factorio path, and its json index and css file next to it")
     # Additionnal input arguments
     recipesAddInputsArgs = parser.add_argument_group("Additionnal input arguments")
     recipesAddInputsArgs.add_argument('--input-factorio-data', type=pathlib.Path, help="Recipes and factories data used when generate consumption and recipes from factorio path")
     recipesAddInputsArgs.add_argument('--input-consumption-data', type=pathlib.Path, help="Consumption requested and preferencies used when generate consumption")
+    recipesAddInputsArgs.add_argument('--input-consumption-batch', type=str, nargs='+', help="Consumption data files or glob patterns, jsonl file contain one consumption data by line, used when generate consumption dir")
+    recipesAddInputsArgs.add_argument('--input-sweep', type=pathlib.Path, help="Values to try for requested rates, factories and recipes preferencies of consumption data, used when generate sweep")
+    recipesAddInputsArgs.add_argument('--html-no-indent', action="store_true", help="Do not indent generated HTML pages")
+    recipesAddInputsArgs.add_argument('--html-sprite-sheet', type=str, help="Css file generated with --output-sprite-sheet used by HTML pages instead of one png by item")
     recipesAddInputsArgs.add_argument('--input-groups-data', type=pathlib.Path, help="Generate a json recipe file for each group in the given file")
+    recipesAddInputsArgs.add_argument('--groups-count', type=int, default=20, help="Groups count generated with --output-groups-data")
+    # Cache
+    cacheArgs = parser.add_argument_group("Cache")
+    cacheArgs.add_argument('--cache-dir', type=pathlib.Path, help="Folder path to store recipes loaded from factorio path (out/cache by default) and consumption by unit rate (only kept in memory by default)")
+    cacheArgs.add_argument('--rebuild-cache', action="store_true", help="Ignore cached recipes and reload them from factorio path")
+    cacheArgs.add_argument('--no-unit-consumption-cache', action="store_true", help="Do not reuse consumption by unit rate of acyclic sub-chains when solving consumption")
+    # Consumption solvers
+    consumptionSolverArgs = parser.add_argument_group("Consumption solver")
+    consumptionSolverArgs.add_argument('--consumption-solver', choices=list(consumptionSolvers.keys()), default="iterative", help="Algorithm used to compute consumption, linear and optimal need numpy and scipy, vectorized need numpy. Optimal choose recipes of items without preferencies itself")
+    consumptionSolverArgs.add_argument('--optimal-objective', choices=OPTIMAL_OBJECTIVES, default="raw", help="Quantity minimized by the optimal solver: raw items consumed, factories count or electricity")
+    consumptionSolverArgs.add_argument('--consumption-service', action="store_true", help="Solve consumption data then read json commands from stdin to update it, and write updated consumption as json lines on stdout")
+    # Debug
+    debugArgs = parser.add_argument_group("Debug")
+    debugArgs.add_argument('--trace-level', choices=list(TRACE_LEVELS.keys()), default="off", help="Print debug messages, detail print each step of the iterative consumption solver")
+    debugArgs.add_argument('--trace-file', type=pathlib.Path, help="Write each iteration of the iterative consumption solver in the given json lines file, read by traceViewer.py (solves of parallel jobs are not traced)")
     args = parser.parse_args()
+    cacheDirPath = args.cache_dir if args.cache_dir else pathlib.Path("out", "cache")
+    htmlIndent = not args.html_no_indent
+    traceLevel = TRACE_LEVELS[args.trace_level]
+    if args.trace_file:
+        traceFile = open(args.trace_file, 'w')
+    serviceOutputFile = sys.stdout
+    if args.consumption_service:
+        # Keep stdout for service answers
+        sys.stdout = sys.stderr
 
     # Load factorio data
     craftingFactoriesByName = {}
+    factorioEquipment = NO_FACTORIO_EQUIPMENT
     recipesToAdd = RecipesByName()
     recipesToRemove = set()
     itemPngRenames = {}
+    itemsIconPath = {}
     if args.input_factorio_data:
         craftingFactoriesByName, recipesToAdd, recipesToRemove, itemPngRenames = loadFactorioData(args.input_factorio_data)
+        factorioEquipment = loadFactorioEquipment(args.input_factorio_data)
 
     # Recipes loarders
     if args.factorio_path:
         factorioVersion = getVersion(args.factorio_path)
         print("Load recipes from factorio version {}".format(factorioVersion))
-        recipesByName = getRecipes(args.factorio_path, recipesToRemove)
+        if args.load_all_prototypes:
+            recipesByName, prototypesCraftingFactoriesByName, itemsIconPath = getPrototypesCached(args.factorio_path, args.factorio_mods, recipesToRemove, cacheDirPath, args.rebuild_cache)
+            # Factories from factorio data file overwrite the loaded ones
+            prototypesCraftingFactoriesByName.update(craftingFactoriesByName)
+            craftingFactoriesByName = prototypesCraftingFactoriesByName
+        else:
+            recipesByName = getRecipesCached(args.factorio_path, recipesToRemove, cacheDirPath, args.rebuild_cache)
         recipesByName.update(recipesToAdd)
     if args.input_json:
         print("Load recipes from {}".format(args.input_json))
         recipesByName = loadRecipes(args.input_json)
 
+    recipeGraph = RecipeGraph(recipesByName)
+
     # Recipes filters
     if args.remove_recipes:
         print("Filter recipes {}".format(args.remove_recipes))
         for recipeToRemove in args.remove_recipes:
-            recipesByName.popitem(recipeToRemove)
+            recipeGraph.removeRecipe(recipeToRemove)
     if args.remove_items:
         print("Filter items {}".format(args.remove_items))
-        recipesRemoveItem(recipesByName, set(args.remove_items))
+        recipesRemoveItem(recipeGraph, set(args.remove_items))
+    if args.items:
+        print("Keep items {} subgraph".format(args.items))
+        keepItemsSubgraph(recipeGraph, args.items, args.items_upstream_depth, args.items_downstream_depth)
     if args.remove_leafes:
         print("Filter leafes")
-        removeLeafe(recipesByName)
+        removeLeafe(recipeGraph)
     if args.keep_leafes_only:
         print("Keep only leafes")
-        keepOnlyLeafe(recipesByName)
+        keepOnlyLeafe(recipeGraph)
+    if args.compact_recipes:
+        print("Compact recipes")
+        recipesByName = CompactRecipes(recipesByName)
+        craftingFactoriesByName = compactCraftingFactories(craftingFactoriesByName)
+        recipeGraph = RecipeGraph(recipesByName)
 
     # Recipes writers
     if args.output_json:
-        writeRecipesJsonFile(recipesByName, args.output_json)
+        writeRecipesFile(recipesByName, args.output_json)
         print("Recipe jsonfile \"{}\" writen".format(args.output_json))
     if args.output_html_usage:
-        usage = ingredientsByUsage(recipesByName)
-        ingredientsByUsage2Html(usage, args.output_html_usage, "img")
+        usage = ingredientsByUsage(recipeGraph)
+        ingredientsByUsage2Html(usage, args.output_html_usage, "img", args.html_sprite_sheet)
         print("HTML file \"{}\" writen".format(args.output_html_usage))
     if args.output_dot:
-        generateDot(recipesByName, args.output_dot, "img")
+        generateDot(recipeGraph, args.output_dot, "img")
         print("Graphviz dot file \"{}\" writen".format(args.output_dot))
+    if args.output_svg:
+        generateSvg(recipeGraph, args.output_svg, "img")
+        print("Svg file \"{}\" writen".format(args.output_svg))
     if args.output_png_dir:
         if not args.factorio_path:
             raise ValueError("To generate png dir you need to provide factorio path")
         if not os.path.exists(args.output_png_dir):
             os.makedirs(args.output_png_dir)
-        itemsPngCopy(recipesByName, args.factorio_path, args.output_png_dir, itemPngRenames)
-        print("Item png file in {} writen".format(args.output_png_dir))
-    if args.output_html_consumption:
+        writtenCount, skippedCount = itemsPngCopy(recipeGraph, args.factorio_path, args.output_png_dir, itemPngRenames, itemsIconPath, args.jobs)
+        print("Item png file in {} writen ({} writen, {} skipped)".format(args.output_png_dir, writtenCount, skippedCount))
+    if args.output_sprite_sheet:
+        if not args.factorio_path:
+            raise ValueError("To generate sprite sheet you need to provide factorio path")
+        itemsCount = itemsSpriteSheet(recipeGraph, args.factorio_path, args.output_sprite_sheet, itemPngRenames, itemsIconPath)
+        print("Sprite sheet \"{}\" with {} items writen".format(args.output_sprite_sheet, itemsCount))
+    consumptionOutputs = {"html": args.output_html_consumption, "json": args.output_json_consumption, "csv": args.output_csv_consumption, "parquet": args.output_parquet_consumption}
+    outputConsumption = any(consumptionOutputs.values())
+    # Unit consumptions are only saved in an explicit cache dir, commands reading recipes do not write in the default one
+    unitConsumptionCacheFilePathArg = None
+    if args.no_unit_consumption_cache:
+        unitConsumptionCache = None
+    elif args.cache_dir and (outputConsumption or args.output_consumption_dir or args.output_sweep or args.consumption_service):
+        unitConsumptionCacheFilePathArg = unitConsumptionCacheFilePath(args.cache_dir, recipesByName, craftingFactoriesByName)
+        if not args.rebuild_cache:
+            loadUnitConsumptionCache(unitConsumptionCacheFilePathArg)
+    if outputConsumption:
         if not args.input_consumption_data:
             raise ValueError("To generate consumtion you need to provide consumption data file")
         requestedRates, recipesPreferences, factoriesPreferences = loadConsumptionData(args.input_consumption_data)
-        recipesByResult = recipesByName2recipesByResult(recipesByName, recipesPreferences[0])
-        consumption, noRecipes, overproduction = computeConsumptionRates(recipesByResult, requestedRates, craftingFactoriesByName, factoriesPreferences, recipesPreferences[1])
-        consumption2Html(requestedRates, consumption, noRecipes, overproduction, args.output_html_consumption, "img")
-        print("HTML consumption file \"{}\" writen".format(args.output_html_consumption))
-    if args.output_groups_dir or args.output_groups_dot or args.output_groups_html:
-        print("Load recipes groups from {}".format(args.input_groups_data))
-        recipesGroups = loadGroups(args.input_groups_data)
+        modulesRecipesByName, factoriesPreferences = applyFactoriesModules(recipesByName, craftingFactoriesByName, factoriesPreferences, factorioEquipment)
+        recipesByResult = recipesByName2recipesByResult(modulesRecipesByName, recipesPreferences[0], args.consumption_solver in consumptionSolversWithAlternatives)
+        consumptionSolver = getConsumptionSolver(args.consumption_solver, args.optimal_objective)
+        consumption, noRecipes, overproduction = consumptionSolver(recipesByResult, requestedRates, craftingFactoriesByName, factoriesPreferences, recipesPreferences[1])
+        for outputFormat, consumptionFilePath in consumptionOutputs.items():
+            if consumptionFilePath:
+                writeConsumptionFile(outputFormat, requestedRates, consumption, noRecipes, overproduction, consumptionFilePath, args.html_sprite_sheet, factorioEquipment)
+                print("Consumption {} file \"{}\" writen".format(outputFormat, consumptionFilePath))
+    if args.output_consumption_dir:
+        if not args.input_consumption_batch:
+            raise ValueError("To generate consumption dir you need to provide consumption batch files")
+        consumptionDataByName = loadConsumptionBatch(args.input_consumption_batch, args.input_consumption_data)
+        if not os.path.exists(args.output_consumption_dir):
+            os.makedirs(args.output_consumption_dir)
+        writtenFilePaths = solveConsumptionBatch(consumptionDataByName, recipesByName, craftingFactoriesByName, args.consumption_solver,
+                                                 args.output_consumption_dir, args.output_consumption_formats, args.jobs, args.html_sprite_sheet, factorioEquipment, args.optimal_objective)
+        print("{} consumption files in {} writen".format(len(writtenFilePaths), args.output_consumption_dir))
+    if args.output_sweep:
+        if not args.input_sweep or not args.input_consumption_data:
+            raise ValueError("To generate sweep you need to provide sweep file and consumption data file")
+        variants = loadSweep(args.input_sweep, loadConsumptionData(args.input_consumption_data))
+        metricsByVariant = solveSweep(variants, recipesByName, craftingFactoriesByName, args.consumption_solver, args.jobs, factorioEquipment, args.optimal_objective)
+        writeSweepFile(variants, metricsByVariant, args.output_sweep)
+        print("Sweep file \"{}\" with {} variants writen".format(args.output_sweep, len(variants)))
+    if args.consumption_service:
+        requestedRates, recipesPreferences, factoriesPreferences = {}, ({}, []), {}
+        if args.input_consumption_data:
+            requestedRates, recipesPreferences, factoriesPreferences = loadConsumptionData(args.input_consumption_data)
+        consumptionSession = ConsumptionSession(recipesByName, craftingFactoriesByName, args.consumption_solver, requestedRates, recipesPreferences, factoriesPreferences,
+                                                factorioEquipment, args.optimal_objective)
+        print("Consumption service ready")
+        runConsumptionService(consumptionSession, sys.stdin, serviceOutputFile)
+    if unitConsumptionCache is not None and unitConsumptionCacheFilePathArg is not None:
+        saveUnitConsumptionCache(unitConsumptionCacheFilePathArg)
+    if traceFile is not None:
+        traceFile.close()
+        print("Trace file \"{}\" writen".format(args.trace_file))
+    recipesGroups = None
+    if args.output_groups_data:
+        recipesGroups = partitionRecipes(recipeGraph, args.groups_count)
+        writeGroupsFile(recipesGroups, args.output_groups_data)
+        print("Recipes groups file \"{}\" with {} groups and {} items between groups writen".format(args.output_groups_data, len(recipesGroups), countCrossGroupsItems(recipesGroups, recipesByName)))
+    if args.output_groups_dir or args.output_groups_dot or args.output_groups_html or args.output_groups_svg or args.output_groups_svg_dir:
+        if args.input_groups_data:
+            print("Load recipes groups from {}".format(args.input_groups_data))
+            recipesGroups = loadGroups(args.input_groups_data)
+        elif recipesGroups is None:
+            raise ValueError("To generate groups outputs you need to provide groups data file or to generate it")
+        # Groups data can be older than recipes, missing recipes are skipped
+        missingRecipesNames = [recipeName for recipesNames in recipesGroups.values() for recipeName in recipesNames if recipeName not in recipesByName]
+        if len(missingRecipesNames) > 0:
+            print("Warning: recipes [{}] of groups not found".format(", ".join(missingRecipesNames)))
+            recipesGroups = {groupName: [recipeName for recipeName in recipesNames if recipeName in recipesByName] for groupName, recipesNames in recipesGroups.items()}
         requestedAndProvidedListByGroup = {}
         for groupName, recipesNames in recipesGroups.items():
             recipesGroup = {}
@@ -908,12 +3350,25 @@ if __name__ == '__main__':
                 writeRecipesJsonFile(recipesGroup, recipesJsonFilePath)
                 print("Recipe jsonfile \"{}\" writen".format(recipesJsonFilePath))
             if groupName not in {"noNeed", "onlyOnce"}:
-                requestedAndProvidedListByGroup[groupName] = getRequestedAndProvidedList(recipesGroup)
-        if args.output_groups_dot or args.output_groups_html:
-            groupsDependencies = generateGroupsDependencies(requestedAndProvidedListByGroup)
+                requestedAndProvidedListByGroup[groupName] = getRequestedAndProvidedList(RecipeGraph(recipesGroup))
+        if args.output_groups_svg_dir:
+            if not os.path.exists(args.output_groups_svg_dir):
+                os.makedirs(args.output_groups_svg_dir)
+            svgFilePaths = generateGroupsSvg(recipesGroups, recipesByName, args.output_groups_svg_dir, "img", args.jobs)
+            print("{} groups recipes svg files in {} writen".format(len(svgFilePaths), args.output_groups_svg_dir))
+        if args.output_groups_dot or args.output_groups_html or args.output_groups_svg:
+            groupsAnalysis = analyzeGroups(requestedAndProvidedListByGroup)
+            for itemName, providers in groupsAnalysis.conflicts.items():
+                print('Warning: "{}" in "{}" provided by [{}]'.format(itemName, ", ".join(groupsAnalysis.itemsGroups[itemName][1]), ", ".join(providers)))
+            for cycle in groupsAnalysis.cycles:
+                print("Warning: groups cycle [{}]".format(", ".join(cycle)))
+            groupsDependencies = groupsAnalysis.groupsDependencies
             if args.output_groups_dot:
                 groupsDependenciesToDot(groupsDependencies, args.output_groups_dot, "img")
                 print("Groups dependencies dot file \"{}\" writen".format(args.output_groups_dot))
+            if args.output_groups_svg:
+                groupsDependenciesToSvg(groupsDependencies, args.output_groups_svg, "img")
+                print("Groups dependencies svg file \"{}\" writen".format(args.output_groups_svg))
             if args.output_groups_html:
-                groupsDependenciesToHtml(groupsDependencies, args.output_groups_html, "img")
+                groupsDependenciesToHtml(groupsAnalysis, args.output_groups_html, "img", args.html_sprite_sheet)
                 print("Groups dependencies HTML file \"{}\" writen".format(args.output_groups_html))
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+repositoryDirPath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repositoryDirPath)
+
+import factorioRecipeDependency as frd
+
+
+def dataPath(*names: str) -> str:
+    return os.path.join(repositoryDirPath, "data", *names)
+
+
+@pytest.fixture(scope="session")
+def factorioData():
+    return frd.loadFactorioData(dataPath("factorio-1.1.76.json"))
+
+
+@pytest.fixture(scope="session")
+def craftingFactoriesByName(factorioData) -> frd.CraftingFactoriesByName:
+    return factorioData[0]
+
+
+@pytest.fixture(scope="session")
+def recipesByName(factorioData) -> frd.RecipesByName:
+    # Same recipes than out/recipesAll.json, from the recipe.lua fixture of the benchmark
+    _, recipesToAdd, recipesToRemove, _ = factorioData
+    recipesByName = frd.getRecipes(dataPath("benchmark"), recipesToRemove)
+    recipesByName.update(recipesToAdd)
+    return recipesByName
+
+
+@pytest.fixture
+def recipeGraph(recipesByName) -> frd.RecipeGraph:
+    # Filters remove recipes from the graph recipes
+    return frd.RecipeGraph(dict(recipesByName))
+
+
+@pytest.fixture(autouse=True)
+def emptyUnitConsumptionCache():
+    frd.unitConsumptionCache.clear()
+    yield
+    frd.unitConsumptionCache.clear()
@@ -0,0 +1,42 @@
+import io
+import json
+
+import pytest
+
+import factorioRecipeDependency as frd
+from conftest import dataPath
+
+
+@pytest.fixture
+def consumptionSession(recipesByName, craftingFactoriesByName) -> frd.ConsumptionSession:
+    return frd.ConsumptionSession(recipesByName, craftingFactoriesByName, "iterative", *frd.loadConsumptionData(dataPath("consumptionTest.json")))
+
+
+def runService(consumptionSession: frd.ConsumptionSession, commands: list[str]) -> list[dict]:
+    outputFile = io.StringIO()
+    frd.runConsumptionService(consumptionSession, io.StringIO("\n".join(commands) + "\n"), outputFile)
+    return [json.loads(line) for line in outputFile.getvalue().splitlines()]
+
+
+def test_serviceUpdateConsumption(consumptionSession, recipesByName, craftingFactoriesByName):
+    answers = runService(consumptionSession, ['{"add": {"electronic-circuit": 1}}', '', '{"set": {"electronic-circuit": 0}}'])
+    assert len(answers) == 2
+    assert answers[0]["requested"]["electronic-circuit"] == 1.0
+    assert answers[0]["consumption"]["electronic-circuit"]["results"]["electronic-circuit"] == pytest.approx(1.0)
+    expected = frd.ConsumptionSession(recipesByName, craftingFactoriesByName, "iterative", *frd.loadConsumptionData(dataPath("consumptionTest.json")))
+    assert "electronic-circuit" not in answers[1]["requested"]
+    assert answers[1]["consumption"].keys() == expected.consumptionRate.keys()
+
+
+@pytest.mark.parametrize("command", ['{"add": ', '[1]', '"add"', '{"add": 5}', '{"add": {"iron-plate": "a"}}', '{"add": {"iron-plate": true}}',
+                                     '{"set": {"iron-plate": -1}}', '{"factories": {"crafting": "not-a-factory"}}', '{"factories": []}',
+                                     '{"recipes": {"iron-plate": [{"not-a-recipe": 1.0}]}}', '{"recipes": {"iron-plate": 1}}',
+                                     '{"add": {"iron-plate": 1}, "factories": {"crafting": "not-a-factory"}}'])
+def test_serviceMalformedCommand(command, consumptionSession):
+    # Each malformed line is answered by an error, and the session stays as before the line
+    before = runService(consumptionSession, ['{"solve": true}'])[0]
+    answers = runService(consumptionSession, [command, '{"solve": true}'])
+    assert len(answers) == 2
+    assert "error" in answers[0]
+    del before["duration"], answers[1]["duration"]
+    assert answers[1] == before
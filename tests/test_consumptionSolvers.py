@@ -0,0 +1,64 @@
+import glob
+import math
+
+import pytest
+
+import factorioRecipeDependency as frd
+from conftest import dataPath
+
+consumptionDataFilesPaths = sorted(glob.glob(dataPath("consumption*.json")))
+
+
+def withoutZeros(rates: dict) -> dict:
+    return {name: rate for name, rate in rates.items() if not math.isclose(rate, 0.0, abs_tol=frd.ZERO_TOLERANCE)}
+
+
+def assertSameConsumption(expected: tuple[dict, dict, dict], actual: tuple[dict, dict, dict]):
+    expectedConsumption, expectedNoRecipes, expectedOverproduction = expected
+    consumption, noRecipes, overproduction = actual
+    assert consumption.keys() == expectedConsumption.keys()
+    for recipeName, production in consumption.items():
+        expectedProduction = expectedConsumption[recipeName]
+        assert production["factories-name"] == expectedProduction["factories-name"]
+        for key in ["production-count", "factories-count", "electric-consumption"]:
+            assert production[key] == pytest.approx(expectedProduction[key], rel=1.0e-4, abs=1.0e-3), (recipeName, key)
+        for key in ["results", "ingredients"]:
+            assert withoutZeros(production[key]) == pytest.approx(withoutZeros(expectedProduction[key]), rel=1.0e-4, abs=1.0e-3), (recipeName, key)
+    assert withoutZeros(noRecipes) == pytest.approx(withoutZeros(expectedNoRecipes), rel=1.0e-4, abs=1.0e-3)
+    assert withoutZeros(overproduction) == pytest.approx(withoutZeros(expectedOverproduction), rel=1.0e-4, abs=1.0e-3)
+
+
+def solve(consumptionSolverName: str, recipesByName: frd.RecipesByName, craftingFactoriesByName: frd.CraftingFactoriesByName, consumptionData: tuple) -> tuple[dict, dict, dict]:
+    requestedRates, recipesPreferences, factoriesPreferences = consumptionData
+    recipesByResult = frd.recipesByName2recipesByResult(recipesByName, recipesPreferences[0])
+    return frd.consumptionSolvers[consumptionSolverName](recipesByResult, requestedRates, craftingFactoriesByName, factoriesPreferences, list(recipesPreferences[1]))
+
+
+@pytest.mark.parametrize("consumptionDataFilePath", consumptionDataFilesPaths)
+@pytest.mark.parametrize("consumptionSolverName", ["linear", "vectorized", "optimal"])
+def test_solverMatchIterative(consumptionSolverName, consumptionDataFilePath, recipesByName, craftingFactoriesByName):
+    pytest.importorskip("scipy" if consumptionSolverName != "vectorized" else "numpy")
+    consumptionData = frd.loadConsumptionData(consumptionDataFilePath)
+    expected = solve("iterative", recipesByName, craftingFactoriesByName, consumptionData)
+    assertSameConsumption(expected, solve(consumptionSolverName, recipesByName, craftingFactoriesByName, consumptionData))
+
+
+@pytest.mark.parametrize("consumptionDataFilePath", consumptionDataFilesPaths)
+def test_iterativeWithoutUnitConsumptionCache(consumptionDataFilePath, recipesByName, craftingFactoriesByName, monkeypatch):
+    consumptionData = frd.loadConsumptionData(consumptionDataFilePath)
+    expected = solve("iterative", recipesByName, craftingFactoriesByName, consumptionData)
+    monkeypatch.setattr(frd, "unitConsumptionCache", None)
+    assertSameConsumption(expected, solve("iterative", recipesByName, craftingFactoriesByName, consumptionData))
+
+
+def test_iterativeSolveSelfCycle(recipesByName, craftingFactoriesByName):
+    # Kovarex consume 40 and produce 41 uranium-235, 0.9 of the 1/s requested is produced by it
+    pytest.importorskip("scipy")
+    uraniumRecipesByName = {recipeName: recipesByName[recipeName] for recipeName in ["kovarex-enrichment-process", "uranium-processing"]}
+    factoriesPreferences = frd.loadConsumptionData(dataPath("consumptionTest.json"))[2]
+    consumptionData = ({"uranium-235": 1.0}, ({"uranium-235": [{"kovarex-enrichment-process": 0.9}, {"uranium-processing": 0.1}], "uranium-238": [{"uranium-processing": 1.0}]}, []), factoriesPreferences)
+    consumption, _, _ = solve("iterative", uraniumRecipesByName, craftingFactoriesByName, consumptionData)
+    producedRate = 1.0 / (1.0 - 0.9 * 40.0 / 41.0)
+    assert consumption["kovarex-enrichment-process"]["results"]["uranium-235"] == pytest.approx(0.9 * producedRate)
+    assert consumption["uranium-processing"]["results"]["uranium-235"] >= 0.1 * producedRate - frd.ZERO_TOLERANCE
+    assert frd.consumptionSolverStats["iterations"] < 10
@@ -0,0 +1,73 @@
+import pytest
+
+import factorioRecipeDependency as frd
+
+
+def test_analyzeGroupsDependencies():
+    groupsAnalysis = frd.analyzeGroups({"plates": ({"iron-ore", "copper-ore"}, {"iron-plate", "copper-plate"}),
+                                        "circuits": ({"iron-plate", "copper-plate"}, {"electronic-circuit"}),
+                                        "science": ({"electronic-circuit", "iron-plate"}, {"science-pack"})})
+    assert groupsAnalysis.groupsDependencies == {"plates": {"": {"iron-ore", "copper-ore"}},
+                                                 "circuits": {"plates": {"iron-plate", "copper-plate"}},
+                                                 "science": {"circuits": {"electronic-circuit"}, "plates": {"iron-plate"}}}
+    assert sorted(groupsAnalysis.itemsUsedByGroup["plates"]["iron-plate"]) == ["circuits", "science"]
+    assert groupsAnalysis.itemsGroups["science-pack"] == (["science"], [])
+    assert groupsAnalysis.conflicts == {}
+    assert groupsAnalysis.cycles == []
+    assert groupsAnalysis.depths == {"plates": 0, "circuits": 1, "science": 2}
+
+
+def test_analyzeGroupsConflicts():
+    groupsAnalysis = frd.analyzeGroups({"plates": (set(), {"iron-plate"}),
+                                        "smelting": (set(), {"iron-plate"}),
+                                        "gears": ({"iron-plate"}, {"iron-gear-wheel"})})
+    assert groupsAnalysis.conflicts == {"iron-plate": ["plates", "smelting"]}
+    # The first provider in groups order is kept as the dependency
+    assert groupsAnalysis.groupsDependencies["gears"] == {"plates": {"iron-plate"}}
+
+
+def test_analyzeGroupsCycles():
+    groupsAnalysis = frd.analyzeGroups({"ores": (set(), {"ore"}),
+                                        "uranium": ({"ore", "uranium-235"}, {"uranium-238"}),
+                                        "kovarex": ({"uranium-238"}, {"uranium-235"}),
+                                        "fuel": ({"uranium-235", "uranium-238"}, {"fuel"})})
+    assert [sorted(cycle) for cycle in groupsAnalysis.cycles] == [["kovarex", "uranium"]]
+    # Groups of a cycle share the same depth
+    assert groupsAnalysis.depths == {"ores": 0, "uranium": 1, "kovarex": 1, "fuel": 2}
+
+
+def test_analyzeGroupsOnFixture(recipesByName):
+    recipesGroups = {"intermediate": [recipeName for recipeName in recipesByName.keys() if recipeName != "electronic-circuit"],
+                     "circuit": ["electronic-circuit"]}
+    groupsAnalysis = frd.analyzeGroups({groupName: frd.getRequestedAndProvidedList(frd.RecipeGraph({recipeName: recipesByName[recipeName] for recipeName in recipesNames}))
+                                        for groupName, recipesNames in recipesGroups.items()})
+    assert groupsAnalysis.groupsDependencies["circuit"]["intermediate"] == set(recipesByName["electronic-circuit"].ingredients.keys())
+    assert set(groupsAnalysis.itemsUsedByGroup["circuit"].keys()) == {"electronic-circuit"}
+    assert set(groupsAnalysis.depths.keys()) == {"intermediate", "circuit"}
+
+
+@pytest.mark.parametrize("groupsCount", [1, 3, 6])
+def test_partitionRecipes(groupsCount, recipeGraph, recipesByName):
+    recipesGroups = frd.partitionRecipes(recipeGraph, groupsCount)
+    assert 0 < len(recipesGroups) <= groupsCount
+    recipesNames = [recipeName for recipesNames in recipesGroups.values() for recipeName in recipesNames]
+    assert sorted(recipesNames) == sorted(recipesByName.keys())
+    assert all(len(recipesNames) > 0 for recipesNames in recipesGroups.values())
+    assert frd.partitionRecipes(frd.RecipeGraph(dict(recipesByName)), groupsCount) == recipesGroups
+
+
+def test_partitionRecipesSingleGroup(recipeGraph, recipesByName):
+    recipesGroups = frd.partitionRecipes(recipeGraph, 1)
+    assert frd.countCrossGroupsItems(recipesGroups, recipesByName) == 0
+
+
+def test_countCrossGroupsItems(recipeGraph, recipesByName):
+    recipesGroups = frd.partitionRecipes(recipeGraph, 6)
+    groupsAnalysis = frd.analyzeGroups({groupName: frd.getRequestedAndProvidedList(frd.RecipeGraph({recipeName: recipesByName[recipeName] for recipeName in recipesNames}))
+                                        for groupName, recipesNames in recipesGroups.items()})
+    crossGroupsItems = {(groupName, itemName) for groupName, dependencies in groupsAnalysis.groupsDependencies.items()
+                        for providerName, itemsNames in dependencies.items() if providerName != "" for itemName in itemsNames}
+    assert frd.countCrossGroupsItems(recipesGroups, recipesByName) == len(crossGroupsItems)
+    # A recipe per group has more cross groups items than the partition
+    singleRecipeGroups = {recipeName: [recipeName] for recipeName in recipesByName.keys()}
+    assert frd.countCrossGroupsItems(recipesGroups, recipesByName) < frd.countCrossGroupsItems(singleRecipeGroups, recipesByName)
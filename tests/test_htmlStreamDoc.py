@@ -0,0 +1,90 @@
+import contextlib
+import io
+
+import pytest
+
+import factorioRecipeDependency as frd
+from conftest import dataPath
+
+yattag = pytest.importorskip("yattag")
+
+
+class YattagFileDoc(yattag.Doc):
+    # yattag.Doc used like HtmlStreamDoc, each top level tag is written indented like the pages used to be
+    def __init__(self, htmlFile, indent: bool=True):
+        super().__init__()
+        self.htmlFile = htmlFile
+        self.indentOutput = indent
+        self.depth = 0
+
+    def tagtext(self):
+        return self, self.fileTag, self.text
+
+    @contextlib.contextmanager
+    def fileTag(self, tagName: str, *attrs, **kwargs):
+        self.depth += 1
+        with self.tag(tagName, *attrs, **kwargs):
+            yield
+        self.depth -= 1
+        if self.depth == 0:
+            self.htmlFile.write(yattag.indent(self.getvalue()) if self.indentOutput else self.getvalue())
+            self.result = []
+
+
+def writePage(doc, tag, text):
+    # Children tags are written before knowing if a text follows them, so mixed content starts with its text like in the pages
+    with tag("html"):
+        with tag("head"):
+            doc.stag("link", rel="stylesheet", href="sprites.css")
+            with tag("style"):
+                text("td {text-align: right}")
+        with tag("body"):
+            with tag("table", klass="usage"):
+                with tag("tr"):
+                    doc.line("th", "Item & <count>", title='"quoted"')
+                    with tag("td"):
+                        text("3 x ")
+                        doc.stag("img", src="img/iron-plate.png", title="iron-plate")
+                with tag("tr"):
+                    with tag("td"):
+                        with tag("span", klass="belt"):
+                            text("0.50 / 0.25")
+                    with tag("td"):
+                        pass
+                    with tag("td"):
+                        text("")
+            with tag("script"):
+                doc.asis("\nlet a = 1 < 2;")
+
+
+@pytest.mark.parametrize("indent", [True, False])
+def test_samePageThanYattag(indent):
+    expected = io.StringIO()
+    writePage(*YattagFileDoc(expected, indent).tagtext())
+    stream = io.StringIO()
+    writePage(*frd.HtmlStreamDoc(stream, indent).tagtext())
+    assert stream.getvalue() == expected.getvalue()
+
+
+def writePages(htmlDirPath, recipesByName, craftingFactoriesByName):
+    recipeGraph = frd.RecipeGraph(dict(recipesByName))
+    frd.ingredientsByUsage2Html(frd.ingredientsByUsage(recipeGraph), str(htmlDirPath / "usage.html"), "img")
+    requestedRates, recipesPreferences, factoriesPreferences = frd.loadConsumptionData(dataPath("consumptionTest.json"))
+    recipesByResult = frd.recipesByName2recipesByResult(recipesByName, recipesPreferences[0])
+    consumption = frd.computeConsumptionRates(recipesByResult, requestedRates, craftingFactoriesByName, factoriesPreferences, list(recipesPreferences[1]))
+    frd.consumption2Html(requestedRates, *consumption, str(htmlDirPath / "consumption.html"), "img", "prev.html", "next.html",
+                         factorioEquipment=frd.loadFactorioEquipment(dataPath("factorio-1.1.76.json")))
+    recipesGroups = frd.partitionRecipes(recipeGraph, 6)
+    groupsAnalysis = frd.analyzeGroups({groupName: frd.getRequestedAndProvidedList(frd.RecipeGraph({recipeName: recipesByName[recipeName] for recipeName in recipesNames}))
+                                        for groupName, recipesNames in recipesGroups.items()})
+    frd.groupsDependenciesToHtml(groupsAnalysis, str(htmlDirPath / "groups.html"), "img")
+
+
+def test_samePagesThanYattag(recipesByName, craftingFactoriesByName, tmp_path, monkeypatch):
+    (tmp_path / "stream").mkdir()
+    writePages(tmp_path / "stream", recipesByName, craftingFactoriesByName)
+    (tmp_path / "yattag").mkdir()
+    monkeypatch.setattr(frd, "HtmlStreamDoc", YattagFileDoc)
+    writePages(tmp_path / "yattag", recipesByName, craftingFactoriesByName)
+    for htmlFileName in ["usage.html", "consumption.html", "groups.html"]:
+        assert (tmp_path / "stream" / htmlFileName).read_text() == (tmp_path / "yattag" / htmlFileName).read_text()
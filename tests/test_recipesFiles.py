@@ -0,0 +1,75 @@
+import json
+import pickle
+
+import pytest
+
+import factorioRecipeDependency as frd
+
+
+def recipeValues(recipe: frd.Recipe) -> tuple:
+    return (recipe.name, dict(recipe.ingredients), float(recipe.time), dict(recipe.results), recipe.category)
+
+
+def recipesValues(recipes: frd.RecipesByName) -> dict[str, tuple]:
+    return {recipeName: recipeValues(recipe) for recipeName, recipe in recipes.items()}
+
+
+@pytest.mark.parametrize("extension", [".json", ".msgpack", ".recipes"])
+def test_writeLoadRoundTrip(extension, recipesByName, tmp_path):
+    if extension == ".msgpack":
+        pytest.importorskip("msgpack")
+    recipesFilePath = str(tmp_path / ("recipes" + extension))
+    frd.writeRecipesFile(recipesByName, recipesFilePath)
+    loadedRecipes = frd.loadRecipes(recipesFilePath)
+    assert list(loadedRecipes.keys()) == list(recipesByName.keys())
+    assert recipesValues(loadedRecipes) == recipesValues(recipesByName)
+
+
+def test_jsonFileFromMsgpack(recipesByName, tmp_path):
+    # Recipes loaded from msgpack are written to the same json file, packed files give integral numbers back as integers
+    pytest.importorskip("msgpack")
+    frd.writeRecipesFile(recipesByName, str(tmp_path / "expected.json"))
+    frd.writeRecipesFile(recipesByName, str(tmp_path / "recipes.msgpack"))
+    frd.writeRecipesFile(frd.loadRecipes(str(tmp_path / "recipes.msgpack")), str(tmp_path / "recipes.json"))
+    assert (tmp_path / "recipes.json").read_bytes() == (tmp_path / "expected.json").read_bytes()
+
+
+def test_loadJsonWithoutOrjson(recipesByName, tmp_path, monkeypatch):
+    recipesFilePath = str(tmp_path / "recipes.json")
+    frd.writeRecipesFile(recipesByName, recipesFilePath)
+    with open(recipesFilePath, 'r') as jsonFile:
+        expected = recipesValues(frd.fromJsonRecipes(json.load(jsonFile)))
+    assert recipesValues(frd.loadRecipesJson(recipesFilePath)) == expected
+    monkeypatch.setitem(__import__("sys").modules, "orjson", None)
+    assert recipesValues(frd.loadRecipesJson(recipesFilePath)) == expected
+
+
+def test_packedRecipesFloatResults(recipesByName, tmp_path):
+    # Results with productivity bonus are not integers
+    recipe = recipesByName["electronic-circuit"]
+    recipes = {recipe.name: frd.Recipe(recipe.name, recipe.ingredients, 0.25, {"electronic-circuit": 1.1}, recipe.category)}
+    frd.writeRecipesFile(recipes, str(tmp_path / "recipes.recipes"))
+    assert recipesValues(frd.loadRecipes(str(tmp_path / "recipes.recipes"))) == recipesValues(recipes)
+
+
+def test_packedRecipesMutableMapping(recipesByName, tmp_path):
+    frd.writeRecipesFile(recipesByName, str(tmp_path / "recipes.recipes"))
+    packedRecipes = frd.loadRecipes(str(tmp_path / "recipes.recipes"))
+    expected = dict(recipesByName)
+    del packedRecipes["electronic-circuit"]
+    del expected["electronic-circuit"]
+    with pytest.raises(KeyError):
+        packedRecipes["electronic-circuit"]
+    with pytest.raises(KeyError):
+        del packedRecipes["electronic-circuit"]
+    addedRecipe = frd.Recipe("added", {"iron-plate": 1}, 1.0, {"added": 1}, "crafting")
+    packedRecipes["added"] = addedRecipe
+    expected["added"] = addedRecipe
+    packedRecipes["iron-plate"] = addedRecipe._replace(name="iron-plate")
+    expected["iron-plate"] = addedRecipe._replace(name="iron-plate")
+    assert len(packedRecipes) == len(expected)
+    assert "electronic-circuit" not in packedRecipes
+    assert set(packedRecipes.keys()) == set(expected.keys())
+    assert recipesValues(packedRecipes) == recipesValues(expected)
+    # Workers get a plain dict
+    assert recipesValues(pickle.loads(pickle.dumps(packedRecipes))) == recipesValues(expected)
@@ -0,0 +1,52 @@
+import pytest
+
+import factorioRecipeDependency as frd
+
+
+def keptRecipesNames(recipesByName: frd.RecipesByName, itemsNames: list[str], upstreamDepth: int, downstreamDepth: int) -> set[str]:
+    recipeGraph = frd.RecipeGraph(dict(recipesByName))
+    frd.keepItemsSubgraph(recipeGraph, itemsNames, upstreamDepth, downstreamDepth)
+    return set(recipeGraph.recipes.keys())
+
+
+def consumingRecipesNames(recipesByName: frd.RecipesByName, itemsNames: set[str]) -> set[str]:
+    return {recipeName for recipeName, recipe in recipesByName.items() if any(itemName in recipe.ingredients for itemName in itemsNames)}
+
+
+@pytest.mark.parametrize("upstreamDepth, expected", [(1, {"electronic-circuit"}),
+                                                     (2, {"electronic-circuit", "copper-cable", "iron-plate"}),
+                                                     (-1, {"electronic-circuit", "copper-cable", "iron-plate", "copper-plate"})])
+def test_keepItemsUpstreamDepth(upstreamDepth, expected, recipesByName):
+    assert keptRecipesNames(recipesByName, ["electronic-circuit"], upstreamDepth, 0) == expected
+
+
+def test_keepItemsDownstreamDepth(recipesByName):
+    firstRecipesNames = consumingRecipesNames(recipesByName, {"electronic-circuit"})
+    assert keptRecipesNames(recipesByName, ["electronic-circuit"], 0, 1) == firstRecipesNames
+    firstResultsNames = {resultName for recipeName in firstRecipesNames for resultName in recipesByName[recipeName].results.keys()}
+    assert keptRecipesNames(recipesByName, ["electronic-circuit"], 0, 2) == firstRecipesNames | consumingRecipesNames(recipesByName, firstResultsNames)
+
+
+@pytest.mark.parametrize("upstreamDepth, downstreamDepth", [(0, 1), (1, 0), (1, 1), (2, 3), (-1, 1), (1, -1)])
+def test_keepItemsDeeperKeepMore(upstreamDepth, downstreamDepth, recipesByName):
+    recipesNames = keptRecipesNames(recipesByName, ["electronic-circuit"], upstreamDepth, downstreamDepth)
+    assert len(recipesNames) > 0
+    assert recipesNames <= keptRecipesNames(recipesByName, ["electronic-circuit"], upstreamDepth + (upstreamDepth > 0), downstreamDepth + (downstreamDepth > 0))
+    assert recipesNames <= keptRecipesNames(recipesByName, ["electronic-circuit"], -1, -1)
+
+
+def test_keepItemsDepthZeroInBothDirections(recipeGraph):
+    with pytest.raises(ValueError):
+        frd.keepItemsSubgraph(recipeGraph, ["electronic-circuit"], 0, 0)
+    assert len(recipeGraph.recipes) > 0
+
+
+def test_keepItemsSkipMissingItems(recipesByName, capsys):
+    expected = keptRecipesNames(recipesByName, ["electronic-circuit"], -1, 0)
+    assert keptRecipesNames(recipesByName, ["electronic-circuit", "not-an-item"], -1, 0) == expected
+    assert "not-an-item" in capsys.readouterr().out
+
+
+def test_keepItemsAllMissing(recipeGraph):
+    with pytest.raises(ValueError):
+        frd.keepItemsSubgraph(recipeGraph, ["not-an-item"], -1, 0)
@@ -0,0 +1,157 @@
+#!/bin/python3
+
+import argparse
+import json
+import os
+import pathlib
+import factorioRecipeDependency as frd
+
+
+def loadTraceSolves(traceFilePath: str) -> list[dict]:
+    # Split trace records by solve: {"name", "requested", "iterations"}
+    solves = []
+    consumptionName = None
+    with open(traceFilePath, 'r') as traceFile:
+        for line in traceFile:
+            record = json.loads(line)
+            if "consumption" in record:
+                consumptionName = record["consumption"]
+            elif "requested" in record:
+                solves.append({"name": consumptionName if consumptionName is not None else str(len(solves)), "requested": record["requested"], "iterations": []})
+                consumptionName = None
+            elif "iteration" in record:
+                solves[-1]["iterations"].append(record)
+    return solves
+
+
+def replayTraceSolve(solve: dict):
+    # Yield each iteration record with requested rates and production counts after it
+    requestedRates = dict(solve["requested"])
+    productionCounts = {}
+    for record in solve["iterations"]:
+        for itemName, delta in record["deltas"].items():
+            requestedRates[itemName] = requestedRates.get(itemName, 0.0) + delta
+            if abs(requestedRates[itemName]) <= frd.ZERO_TOLERANCE:
+                del requestedRates[itemName]
+        for recipeName, productionCount in record["recipes"].items():
+            productionCounts[recipeName] = productionCounts.get(recipeName, 0.0) + productionCount
+        yield record, requestedRates, productionCounts
+
+
+def iterationHtmlFileName(iteration: int) -> str:
+    return "{}.html".format(iteration)
+
+
+def iteration2Html(record: dict, requestedRates: dict, productionCounts: dict, htmlFilePath: str, itemsPngCopyFolderPath: str, prevHtmlPage=None, nextHtmlPage=None, spriteSheetCssPath: str=None):
+    with open(htmlFilePath, "w", encoding="utf8") as htmlFile:
+        doc, tag, text = frd.HtmlStreamDoc(htmlFile, frd.htmlIndent).tagtext()
+        with tag('html'):
+            with tag("head"):
+                if spriteSheetCssPath:
+                    doc.stag("link", rel="stylesheet", href=spriteSheetCssPath)
+                with tag("style"):
+                    text("table, th, td {border: 1px solid black;border-collapse: collapse;}")
+                    text("td {text-align: right}")
+                    text("th {text-align: center}")
+            with tag('body'):
+                if prevHtmlPage != None:
+                    with tag('a', href=prevHtmlPage):
+                        text("Prev")
+                with tag('a', href="index.html"):
+                    text("Index")
+                if nextHtmlPage != None:
+                    with tag('a', href=nextHtmlPage):
+                        text("Next")
+                with tag('h1'):
+                    text("Iteration {}: {} ".format(record["iteration"], record["action"]))
+                    frd.itemIconHtml(doc, record["item"], itemsPngCopyFolderPath, spriteSheetCssPath)
+                    text(" {}".format(record["item"]))
+                with tag('table'):
+                    with tag('tr'):
+                        with tag('th'):
+                            text("recipe")
+                        with tag('th'):
+                            text("production count")
+                        with tag('th'):
+                            text("total production count")
+                    for recipeName, productionCount in sorted(record["recipes"].items()):
+                        with tag('tr'):
+                            with tag('td'):
+                                text(recipeName)
+                            with tag('td'):
+                                text("{:.3f}".format(productionCount))
+                            with tag('td'):
+                                text("{:.3f}".format(productionCounts[recipeName]))
+                doc.stag('br')
+                # Positive rates are still to produce, negative rates are overproduction
+                with tag('table'):
+                    with tag('tr'):
+                        with tag('th'):
+                            text("item")
+                        with tag('th'):
+                            text("requested (item/s)")
+                        with tag('th'):
+                            text("change (item/s)")
+                    for itemName in sorted(set(requestedRates.keys()) | set(record["deltas"].keys())):
+                        with tag('tr'):
+                            with tag('td'):
+                                frd.itemIconHtml(doc, itemName, itemsPngCopyFolderPath, spriteSheetCssPath)
+                                text(" {}".format(itemName))
+                            with tag('td'):
+                                text("{:.3f}".format(requestedRates.get(itemName, 0.0)))
+                            with tag('td'):
+                                if itemName in record["deltas"]:
+                                    text("{:+.3f}".format(record["deltas"][itemName]))
+
+
+def traceSolve2Html(solve: dict, iterations: set, outputDirPath: str, itemsPngCopyFolderPath: str, spriteSheetCssPath: str=None) -> list[int]:
+    # Write a page for each iteration in iterations (all when empty) and an index page linking them
+    writtenIterations = [record["iteration"] for record in solve["iterations"] if len(iterations) == 0 or record["iteration"] in iterations]
+    pageIndex = 0
+    for record, requestedRates, productionCounts in replayTraceSolve(solve):
+        if pageIndex >= len(writtenIterations) or record["iteration"] != writtenIterations[pageIndex]:
+            continue
+        prevHtmlPage = iterationHtmlFileName(writtenIterations[pageIndex-1]) if pageIndex > 0 else None
+        nextHtmlPage = iterationHtmlFileName(writtenIterations[pageIndex+1]) if pageIndex+1 < len(writtenIterations) else None
+        iteration2Html(record, requestedRates, productionCounts, os.path.join(outputDirPath, iterationHtmlFileName(record["iteration"])),
+                       itemsPngCopyFolderPath, prevHtmlPage, nextHtmlPage, spriteSheetCssPath)
+        pageIndex += 1
+    recordsByIteration = {record["iteration"]: record for record in solve["iterations"]}
+    with open(os.path.join(outputDirPath, "index.html"), "w", encoding="utf8") as htmlFile:
+        doc, tag, text = frd.HtmlStreamDoc(htmlFile, frd.htmlIndent).tagtext()
+        with tag('html'):
+            with tag('body'):
+                with tag('h1'):
+                    text("Solve {} in {} iterations".format(solve["name"], len(solve["iterations"])))
+                with tag('ul'):
+                    for iteration in writtenIterations:
+                        with tag('li'):
+                            with tag('a', href=iterationHtmlFileName(iteration)):
+                                text("{}: {} {}".format(iteration, recordsByIteration[iteration]["action"], recordsByIteration[iteration]["item"]))
+    return writtenIterations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render iterations of a consumption solver trace file as HTML pages")
+    parser.add_argument('--trace-file', type=pathlib.Path, required=True, help="Json lines file generated with --trace-file")
+    parser.add_argument('--output-dir', type=pathlib.Path, default=pathlib.Path("out", "trace"), help="Folder path to generate one HTML page by iteration and an index page")
+    parser.add_argument('--solve', type=str, default="0", help="Consumption data name of the solve to render, or its index in trace file")
+    parser.add_argument('--iterations', type=int, nargs='+', default=[], help="Iterations to render, all by default")
+    parser.add_argument('--items-png-dir', type=str, default="img", help="Folder of item png used by HTML pages")
+    parser.add_argument('--html-sprite-sheet', type=str, help="Css file generated with --output-sprite-sheet used by HTML pages instead of one png by item")
+    parser.add_argument('--html-no-indent', action="store_true", help="Do not indent generated HTML pages")
+    args = parser.parse_args()
+    frd.htmlIndent = not args.html_no_indent
+
+    solves = loadTraceSolves(args.trace_file)
+    solvesByName = {solve["name"]: solve for solve in solves}
+    if args.solve in solvesByName:
+        solve = solvesByName[args.solve]
+    elif args.solve.isdigit() and int(args.solve) < len(solves):
+        solve = solves[int(args.solve)]
+    else:
+        raise ValueError("Solve {} not found in trace file {} with {} solves".format(args.solve, args.trace_file, len(solves)))
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    writtenIterations = traceSolve2Html(solve, set(args.iterations), args.output_dir, args.items_png_dir, args.html_sprite_sheet)
+    print("{} iterations HTML pages of solve {} in {} writen".format(len(writtenIterations), solve["name"], args.output_dir))